@@ -0,0 +1,302 @@
+import asyncio
+
+import logging
+from datetime import datetime, timedelta, timezone
+from time import sleep
+
+from fastapi.concurrency import asynccontextmanager
+from pydantic import BaseModel
+from typing import Literal
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import RedirectResponse
+from fastapi.middleware.cors import CORSMiddleware
+
+from src.lib.graph.project_setup import ProfileGraph
+from src.lib.graph.project_setup.node.drafter import RecommendationOutput
+from src.lib.graph.project_setup.state import Context, ProfileState
+from src.lib.graph.project_setup.tools.web_scraper import aweb_scraper
+from src.lib.reddit_profile_analysis import analyze_reddit_user
+from src.models.simple_submission import SimpleSubmission
+from supabase import create_client
+
+from src.interfaces import db
+from src.models.project import Project
+from src.lib.engine import engine
+from src.lib.coordinator import SHARDING_ENABLED, coordinator
+from src.interfaces import control
+from src.models import ControlCommand
+from src.lib import streaming
+from src.lib.backfill import BACKFILL_DAYS, backfills
+from src.lib.critino import invalidate_critiques
+from src.lib.generate_response import generate_response
+from src.lib.usage import usage_recorder
+from src.runtime import configure, start_services, stop_services
+from praw.models import Submission
+
+from sse_starlette import EventSourceResponse
+
+configure()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await start_services()
+
+    # Otherwise the streams run in `python -m src.worker`
+    if streaming.WORKER_MODE == "embedded":
+        await streaming.start_streaming()
+
+    yield
+    
+    if streaming.WORKER_MODE == "embedded":
+        await streaming.stop_streaming()
+
+    await stop_services()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.get("/")
+def redirect_to_docs():
+    logging.info("Redirecting to /docs")
+    return RedirectResponse(url="/docs")
+
+
+class StartStreamRequest(BaseModel):
+    project: Project
+    team_name: str
+
+
+@app.post("/start")
+async def start_project_stream(q: StartStreamRequest):
+    if streaming.WORKER_MODE == "external":
+        command = ControlCommand(action="start", project_id=q.project.id, project=q.project, team_name=q.team_name)
+        if not await control.publish(command):
+            logging.error(f"No stream worker received the start command for project: {q.project.id}")
+            return {"status": "error", "message": "No stream worker is running"}
+
+        return {"status": "success", "message": "Stream started"}
+
+    await streaming.start_project(q.project, q.team_name)
+    return {"status": "success", "message": "Stream started"}
+
+
+class StopStreamRequest(BaseModel):
+    project_id: str
+
+
+@app.post("/stop")
+async def stop_project_stream(q: StopStreamRequest):
+    if streaming.WORKER_MODE == "external":
+        if not await control.publish(ControlCommand(action="stop", project_id=q.project_id)):
+            logging.error(f"No stream worker received the stop command for project: {q.project_id}")
+            return {"status": "error", "message": "No stream worker is running"}
+
+        return {"status": "success", "message": "Stream stopped"}
+
+    if not await streaming.stop_project(q.project_id):
+        logging.error(f"Worker not found for project: {q.project_id}")
+        return {"status": "success", "message": "Stream not found (probably already stopped or never started)"}
+
+    return {"status": "success", "message": "Stream stopped"}
+
+
+class BackfillRequest(BaseModel):
+    project: Project
+    team_name: str
+    days: int = BACKFILL_DAYS
+
+
+@app.post("/backfill")
+async def start_backfill(q: BackfillRequest):
+    """
+    Evaluates the last `days` of the project's subreddits. Calling it again
+    after an interruption continues where the backfill stopped.
+    """
+    if streaming.WORKER_MODE == "external":
+        command = ControlCommand(action="backfill", project_id=q.project.id, project=q.project, team_name=q.team_name, days=q.days)
+        if not await control.publish(command):
+            return {"status": "error", "message": "No stream worker is running"}
+
+        return {"status": "success", "message": "Backfill started"}
+
+    if not await backfills.start(q.project, q.team_name, q.days):
+        return {"status": "success", "message": "Backfill already running"}
+
+    return {"status": "success", "message": "Backfill started"}
+
+
+@app.get("/backfill/{project_id}")
+async def backfill_progress(project_id: str):
+    progress = await backfills.progress(project_id)
+
+    return {
+        "status": "success",
+        "done": bool(progress) and all(subreddit.done for subreddit in progress),
+        "fetched": sum(subreddit.fetched for subreddit in progress),
+        "evaluated": sum(subreddit.evaluated for subreddit in progress),
+        "subreddits": [subreddit.model_dump() for subreddit in progress],
+    }
+
+
+class InvalidateCritiquesRequest(BaseModel):
+    project_id: str
+    team_name: str
+    project_name: str
+    agent_name: str | None = None
+
+
+@app.post("/critiques/invalidate")
+async def invalidate_critique_cache(q: InvalidateCritiquesRequest):
+    """
+    Drops the cached critiques of a project's agent (or all its agents) after they were edited.
+    """
+    dropped = await asyncio.to_thread(invalidate_critiques, q.team_name, q.project_name, q.agent_name)
+
+    if streaming.WORKER_MODE == "external":
+        await control.publish(ControlCommand(
+            action="invalidate_critiques",
+            project_id=q.project_id,
+            team_name=q.team_name,
+            project_name=q.project_name,
+            agent_name=q.agent_name,
+        ))
+
+    return {"status": "success", "dropped": dropped}
+
+
+@app.get("/pipeline")
+async def pipeline_stats():
+    if streaming.WORKER_MODE == "external":
+        return {"status": "success", "workers": await control.worker_stats()}
+
+    return {
+        "status": "success",
+        **engine.stats(),
+        **({"coordinator": coordinator.stats()} if SHARDING_ENABLED else {}),
+    }
+
+
+@app.get("/usage")
+async def llm_usage(days: int = 30, project_id: str | None = None):
+    """
+    Tokens, latency and estimated cost of the LLM calls per project, stage and model.
+    """
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    rows = await usage_recorder.summary(since, project_id)
+
+    return {
+        "status": "success",
+        "since": since,
+        "cost_usd": sum(float(row["cost_usd"] or 0) for row in rows),
+        "usage": rows,
+    }
+
+
+class SetupProjectRequest(BaseModel):
+    url: str | None = None
+    description: str | None = None
+    objective: Literal["find_leads", "find_competitors", "find_ideas", "find_influencers", "find_investors", "find_partners"]
+    mode: Literal["standard", "advanced"]
+
+
+@app.post("/setup-project")
+async def setup_project(q: SetupProjectRequest):
+    if q.url is not None:
+        link_or_profile = "link"
+    elif q.description is not None:
+        link_or_profile = "description"
+    else:
+        raise HTTPException(status_code=400, detail="Either url or description must be provided")
+
+    context = Context(
+        type=link_or_profile,
+        value=str(q.url if link_or_profile == "link" else q.description)
+    )
+
+    if context.type == "link":
+        context.value = f"# URL: \n{context.value}" + f"## URL DATA: \n{await aweb_scraper(context.value)}"
+    
+    initial_state = ProfileState(
+        context=context,
+        objective=q.objective,
+        messages=[],
+        mode=q.mode  # Pass mode to state
+    )
+    
+    graph = ProfileGraph(initial_state).graph()
+  
+    final_state = await graph.ainvoke(initial_state)
+    
+    parsed_results = RecommendationOutput(**final_state["messages"][-1].tool_calls[0]["args"])
+
+    return {
+        "project_name": parsed_results.project_name,
+        "subreddits": [subreddit.name for subreddit in parsed_results.subreddits],
+        "filtering_prompt": parsed_results.filtering_prompt,
+    }
+
+class GenerateResponseRequest(BaseModel):
+    author_name: str
+    project_id: str
+    submission_title: str
+    submission_selftext: str
+    team_name: str
+    is_dm: bool = False
+    feedback: str = ""
+
+@app.post("/generate-response")
+def generate_project_response(q: GenerateResponseRequest):
+    try:
+        logging.info(f"Generating response for project {q.project_id}, isDM: {q.is_dm}")
+        simple_submission = SimpleSubmission(
+            title=q.submission_title,
+            selftext=q.submission_selftext,
+            author_name=q.author_name
+        )
+        response = generate_response(
+            simple_submission, 
+            team_name=q.team_name, 
+            project_id=q.project_id, 
+            is_dm=q.is_dm,
+            feedback=q.feedback
+        )
+        logging.info("Response generated successfully")
+        return {"status": "success", "response": response}
+    except Exception as e:
+        logging.error(f"Error generating response: {e}", exc_info=True)  # Add full traceback
+        return {"status": "error", "message": str(e)}
+
+class ProfileAnalysisRequest(BaseModel):
+    username: str
+
+@app.post("/analyze-profile")
+async def analyze_profile(request: ProfileAnalysisRequest):
+    """
+    Analyze a Reddit user's profile and return insights
+    """
+    try:
+        if not request.username:
+            raise HTTPException(status_code=400, detail="Username is required")
+            
+        analysis = analyze_reddit_user(request.username, "")  # Empty project prompt since we're just analyzing the profile
+        
+        if not analysis:
+            raise HTTPException(status_code=404, detail="Profile not found or has been deleted")
+            
+        return {
+            "status": "success",
+            "analysis": analysis
+        }
+    except Exception as e:
+        # Log the error for debugging
+        print(f"Error analyzing profile for {request.username}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to analyze profile: {str(e)}") 
\ No newline at end of file
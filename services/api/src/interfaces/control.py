@@ -0,0 +1,86 @@
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+from src.models import ControlCommand
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Pub/sub channel the API sends start/stop commands to the stream workers on
+CONTROL_CHANNEL = os.getenv("CONTROL_CHANNEL", "reletino:control")
+
+# Hash where every stream worker process publishes its pipeline stats
+WORKER_STATS_KEY = os.getenv("WORKER_STATS_KEY", "reletino:worker-stats")
+
+# Seconds before reconnecting after losing the control channel
+RECONNECT_DELAY = 5
+
+_client: redis.Redis | None = None
+
+
+def client() -> redis.Redis:
+    """
+    Returns the process-wide Redis client, creating it on first use.
+    """
+    global _client
+
+    if _client is None:
+        _client = redis.from_url(REDIS_URL, decode_responses=True)
+
+    return _client
+
+
+async def publish(command: ControlCommand) -> int:
+    """
+    Sends a command to the stream workers. Returns how many workers received it.
+    """
+    return await client().publish(CONTROL_CHANNEL, command.model_dump_json())
+
+
+async def listen() -> AsyncIterator[ControlCommand]:
+    """
+    Yields commands sent on the control channel, reconnecting when the connection drops.
+    """
+    while True:
+        pubsub = client().pubsub(ignore_subscribe_messages=True)
+
+        try:
+            await pubsub.subscribe(CONTROL_CHANNEL)
+            logging.info(f"Listening for commands on {CONTROL_CHANNEL}")
+
+            async for message in pubsub.listen():
+                try:
+                    command = ControlCommand.model_validate_json(message["data"])
+                except Exception as e:
+                    logging.error(f"Ignoring invalid control command: {e}")
+                    continue
+
+                yield command
+        except redis.RedisError as e:
+            logging.error(f"Lost the control channel, reconnecting in {RECONNECT_DELAY}s: {e}")
+            await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            await pubsub.aclose()
+
+
+async def report_stats(worker_id: str, stats: dict) -> None:
+    await client().hset(WORKER_STATS_KEY, worker_id, json.dumps(stats))
+
+
+async def remove_stats(worker_id: str) -> None:
+    await client().hdel(WORKER_STATS_KEY, worker_id)
+
+
+async def worker_stats() -> dict[str, dict]:
+    """
+    Returns the last stats published by each stream worker process.
+    """
+    stats = await client().hgetall(WORKER_STATS_KEY)
+    return {worker_id: json.loads(value) for worker_id, value in stats.items()}
@@ -1,7 +1,7 @@
 import logging
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import AsyncClient, Client, acreate_client, create_client
 
 
 def client() -> Client:
@@ -20,3 +20,31 @@ def client() -> Client:
 
     return create_client(url, key)
 
+
+
+_async_client: AsyncClient | None = None
+
+
+async def async_client() -> AsyncClient:
+    """
+    Returns the process-wide async Supabase client, creating it on first use.
+    """
+    global _async_client
+
+    if _async_client is None:
+        logging.debug("Creating async Supabase client")
+        load_dotenv()
+        url: str | None = os.environ.get("PUBLIC_SUPABASE_URL")
+        key: str | None = os.environ.get("SUPABASE_ANON_KEY")
+
+        if url is None:
+            logging.error("PUBLIC_SUPABASE_URL must be set")
+            raise ValueError("PUBLIC_SUPABASE_URL must be set")
+
+        if key is None:
+            logging.error("SUPABASE_ANON_KEY must be set")
+            raise ValueError("SUPABASE_ANON_KEY must be set")
+
+        _async_client = await acreate_client(url, key)
+
+    return _async_client
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, TypeVar
+
+import aiohttp
+
+T = TypeVar("T")
+
+# Seconds to open a connection, to wait for each read, and for a whole request
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "60"))
+
+# Connections kept open in total and per host, and seconds an idle one is kept alive
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_CONNECTIONS_PER_HOST", "16"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "60"))
+
+# Largest (decompressed) response body read
+HTTP_MAX_RESPONSE_BYTES = int(os.getenv("HTTP_MAX_RESPONSE_BYTES", str(5 * 1024 * 1024)))
+
+USER_AGENT = "Reletino/1.0 (+https://releti.no)"
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+        self.url = url
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+class HttpResponse:
+    def __init__(self, status: int, url: str, headers: dict[str, str], content: bytes, encoding: str):
+        self.status = status
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise HttpError(self.status, self.url)
+
+
+# All requests run on one event loop thread, which owns the connection pool.
+# Async callers await them from their own loop, threads block on them.
+_loop: asyncio.AbstractEventLoop | None = None
+_session: aiohttp.ClientSession | None = None
+_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="http-client", daemon=True).start()
+
+    return _loop
+
+
+def _timeout(total: float | None) -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(
+        total=total or HTTP_TOTAL_TIMEOUT,
+        connect=HTTP_CONNECT_TIMEOUT,
+        sock_read=HTTP_READ_TIMEOUT,
+    )
+
+
+def _session_for_loop() -> aiohttp.ClientSession:
+    """
+    Returns the shared session, creating it on first use. Only called on the background loop.
+    """
+    global _session
+
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_MAX_CONNECTIONS,
+                limit_per_host=HTTP_CONNECTIONS_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE,
+                ttl_dns_cache=300,
+            ),
+            timeout=_timeout(None),
+            headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"},
+        )
+
+    return _session
+
+
+async def _request(
+    method: str,
+    url: str,
+    params: dict[str, Any] | None,
+    headers: dict[str, str] | None,
+    json_body: Any,
+    timeout: float | None,
+    max_bytes: int,
+    truncate: bool,
+) -> HttpResponse:
+    session = _session_for_loop()
+    query = {key: str(value) for key, value in (params or {}).items() if value is not None}
+
+    async with session.request(method, url, params=query, headers=headers, json=json_body, timeout=_timeout(timeout)) as response:
+        if not truncate and (response.content_length or 0) > max_bytes:
+            raise ResponseTooLarge(f"{url} sent {response.content_length} bytes, more than {max_bytes}")
+
+        # Counted after decompression, so a small gzip body can't expand without bound
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body.extend(chunk)
+
+            if len(body) > max_bytes:
+                if not truncate:
+                    raise ResponseTooLarge(f"{url} sent more than {max_bytes} bytes")
+                del body[max_bytes:]
+                break
+
+        return HttpResponse(
+            status=response.status,
+            url=str(response.url),
+            headers=dict(response.headers),
+            content=bytes(body),
+            encoding=response.charset or "utf-8",
+        )
+
+
+def _submit(coroutine: Coroutine[Any, Any, T]) -> "Future[T]":
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop())
+
+
+async def request(
+    method: str,
+    url: str,
+    params: dict[str, Any] | None = None,
+    headers: dict[str, str] | None = None,
+    json_body: Any = None,
+    timeout: float | None = None,
+    max_bytes: int = HTTP_MAX_RESPONSE_BYTES,
+    truncate: bool = False,
+) -> HttpResponse:
+    """
+    Sends a request through the shared connection pool.
+
+    Bodies larger than `max_bytes` raise `ResponseTooLarge`, or are cut off
+    with `truncate`. `timeout` bounds the whole request, on top of the
+    connect and read deadlines.
+    """
+    return await asyncio.wrap_future(
+        _submit(_request(method, url, params, headers, json_body, timeout, max_bytes, truncate))
+    )
+
+
+async def get(url: str, **kwargs) -> HttpResponse:
+    return await request("GET", url, **kwargs)
+
+
+def request_sync(
+    method: str,
+    url: str,
+    params: dict[str, Any] | None = None,
+    headers: dict[str, str] | None = None,
+    json_body: Any = None,
+    timeout: float | None = None,
+    max_bytes: int = HTTP_MAX_RESPONSE_BYTES,
+    truncate: bool = False,
+) -> HttpResponse:
+    """
+    Blocking version of `request`, for code running in threads. Don't call it from an event loop.
+    """
+    return _submit(_request(method, url, params, headers, json_body, timeout, max_bytes, truncate)).result()
+
+
+def get_sync(url: str, **kwargs) -> HttpResponse:
+    return request_sync("GET", url, **kwargs)
+
+
+async def close() -> None:
+    """
+    Closes the pooled connections.
+    """
+    async def _close() -> None:
+        global _session
+
+        if _session is not None:
+            await _session.close()
+            _session = None
+
+    if _loop is not None:
+        await asyncio.wrap_future(_submit(_close()))
@@ -1,11 +1,84 @@
+import functools
+import logging
 import os
+import threading
+from typing import Callable, TypeVar
 
+import httpx
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 from pydantic import SecretStr
 from langchain_community.chat_models import ChatPerplexity
 
+from src.lib.usage import usage_recorder
 
-def gemini_flash_2(temperature: float = 0.5) -> ChatOpenAI:
+# Connections kept open per provider. Requests beyond this wait for a free
+# connection, which also caps how many calls run against a provider at once.
+PROVIDER_MAX_CONNECTIONS = {
+    "azure": int(os.getenv("AZURE_MAX_CONNECTIONS", "32")),
+    "openrouter": int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "16")),
+    "openai": int(os.getenv("OPENAI_MAX_CONNECTIONS", "16")),
+}
+
+# Retries are done by src.lib.resilience, so the clients themselves don't retry by default
+LLM_CLIENT_MAX_RETRIES = int(os.getenv("LLM_CLIENT_MAX_RETRIES", "0"))
+
+# Seconds a single LLM request may take
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+
+# Seconds an idle connection is kept alive
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "120"))
+
+OPENROUTER_API_URL = "https://openrouter.ai/api/v1"
+OPENAI_API_URL = "https://api.openai.com/v1"
+
+Client = TypeVar("Client")
+
+_lock = threading.Lock()
+_clients: dict[tuple, object] = {}
+_http_clients: dict[str, tuple[httpx.Client, httpx.AsyncClient]] = {}
+
+
+def _pooled_http(provider: str) -> dict:
+    """
+    HTTP clients shared by every model of a provider, so their connections are reused.
+    """
+    with _lock:
+        if provider not in _http_clients:
+            limits = httpx.Limits(
+                max_connections=PROVIDER_MAX_CONNECTIONS[provider],
+                max_keepalive_connections=PROVIDER_MAX_CONNECTIONS[provider],
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            )
+            _http_clients[provider] = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+
+        http_client, http_async_client = _http_clients[provider]
+
+    return {"http_client": http_client, "http_async_client": http_async_client}
+
+
+def _registered(factory: Callable[..., Client]) -> Callable[..., Client]:
+    """
+    Returns one long-lived client per model and parameters instead of a new one per call.
+    """
+    @functools.wraps(factory)
+    def wrapper(*args, **kwargs) -> Client:
+        key = (factory.__name__, args, tuple(sorted(kwargs.items())))
+
+        with _lock:
+            client = _clients.get(key)
+
+        if client is None:
+            client = factory(*args, **kwargs)
+            with _lock:
+                client = _clients.setdefault(key, client)
+
+        return client  # type: ignore
+
+    return wrapper
+
+
+def _openrouter(model: str, temperature: float) -> ChatOpenAI:
     OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
     assert (
         OPENROUTER_API_KEY is not None
@@ -13,30 +86,43 @@ def gemini_flash_2(temperature: float = 0.5) -> ChatOpenAI:
 
     return ChatOpenAI(
         api_key=SecretStr(OPENROUTER_API_KEY),
-        base_url="https://openrouter.ai/api/v1",
-        model="google/gemini-2.0-flash-001",
+        base_url=OPENROUTER_API_URL,
+        **_pooled_http("openrouter"),
+        callbacks=[usage_recorder],
+        model=model,
         temperature=temperature,
-        max_retries=20,
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        timeout=LLM_REQUEST_TIMEOUT,
         default_headers={"HTTP-Referer": "https://releti.no", "X-Title": "Reletino"},
     )
 
 
+@_registered
+def gemini_flash_2(temperature: float = 0.5) -> ChatOpenAI:
+    return _openrouter("google/gemini-2.0-flash-001", temperature)
+
+
+@_registered
 def openrouter_r1(temperature: float = 0.5) -> ChatOpenAI:
-    OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-    assert (
-        OPENROUTER_API_KEY is not None
-    ), "Environment variable 'OPENROUTER_API_KEY' is not set"
+    return _openrouter("deepseek/deepseek-r1", temperature)
 
-    return ChatOpenAI(
-        api_key=SecretStr(OPENROUTER_API_KEY),
-        base_url="https://openrouter.ai/api/v1",
-        model="deepseek/deepseek-r1",
-        temperature=temperature,
-        max_retries=20,
-        default_headers={"HTTP-Referer": "https://releti.no", "X-Title": "Reletino"},
-    )
+
+@_registered
+def openrouter_gpt_4o(temperature: float = 0.5) -> ChatOpenAI:
+    return _openrouter("openai/gpt-4o", temperature)
+
+
+@_registered
+def openrouter_gpt_4o_mini(temperature: float = 0.5) -> ChatOpenAI:
+    return _openrouter("openai/gpt-4o-mini", temperature)
+
+
+@_registered
+def openrouter_o3_mini(temperature: float = 0.5) -> ChatOpenAI:
+    return _openrouter("openai/o3-mini", temperature)
 
 
+@_registered
 def gpt_o3_mini(temperature: float = 0.5) -> AzureChatOpenAI:
     AZURE_API_KEY = os.getenv("AZURE_API_KEY")
     assert AZURE_API_KEY is not None, "Environment variable 'AZURE_API_KEY' is not set"
@@ -55,7 +141,10 @@ def gpt_o3_mini(temperature: float = 0.5) -> AzureChatOpenAI:
         model="o3-mini",
         azure_endpoint=AZURE_API_URL,
         api_version=AZURE_API_VERSION,
-        max_retries=20,
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        timeout=LLM_REQUEST_TIMEOUT,
+        **_pooled_http("azure"),
+        callbacks=[usage_recorder],
     )
 
 
@@ -85,6 +174,7 @@ def gpt_o3_mini(temperature: float = 0.5) -> AzureChatOpenAI:
 #     )
 
 
+@_registered
 def gpt_o1(temperature: float = 0.5) -> AzureChatOpenAI:
     AZURE_API_KEY = os.getenv("AZURE_API_KEY")
     assert AZURE_API_KEY is not None, "Environment variable 'AZURE_API_KEY' is not set"
@@ -103,10 +193,14 @@ def gpt_o1(temperature: float = 0.5) -> AzureChatOpenAI:
         model="o1",
         azure_endpoint=AZURE_API_URL,
         api_version=AZURE_API_VERSION,
-        max_retries=20,
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        timeout=LLM_REQUEST_TIMEOUT,
+        **_pooled_http("azure"),
+        callbacks=[usage_recorder],
     )
 
 
+@_registered
 def gpt_4o_mini(temperature: float = 0.5) -> AzureChatOpenAI:
     AZURE_API_KEY = os.getenv("AZURE_API_KEY")
     assert AZURE_API_KEY is not None, "Environment variable 'AZURE_API_KEY' is not set"
@@ -127,10 +221,14 @@ def gpt_4o_mini(temperature: float = 0.5) -> AzureChatOpenAI:
         azure_endpoint=AZURE_API_URL,
         model="gpt-4o-mini",
         api_version=AZURE_API_VERSION,
-        max_retries=20,
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        timeout=LLM_REQUEST_TIMEOUT,
+        **_pooled_http("azure"),
+        callbacks=[usage_recorder],
     )
 
 
+@_registered
 def gpt_4o(temperature: float = 0.5) -> AzureChatOpenAI:
     AZURE_API_KEY = os.getenv("AZURE_API_KEY")
     assert AZURE_API_KEY is not None, "Environment variable 'AZURE_API_KEY' is not set"
@@ -151,10 +249,14 @@ def gpt_4o(temperature: float = 0.5) -> AzureChatOpenAI:
         azure_endpoint=AZURE_API_URL,
         model="gpt-4o",
         api_version=AZURE_API_VERSION,
-        max_retries=20,
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        timeout=LLM_REQUEST_TIMEOUT,
+        **_pooled_http("azure"),
+        callbacks=[usage_recorder],
     )
 
 
+@_registered
 def gpt_4o_mini_not_azure(temperature: float = 0.5) -> ChatOpenAI:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
@@ -167,9 +269,14 @@ def gpt_4o_mini_not_azure(temperature: float = 0.5) -> ChatOpenAI:
         model="gpt-4o-mini",
         temperature=temperature,
         api_key=SecretStr(OPENAI_API_KEY),
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        timeout=LLM_REQUEST_TIMEOUT,
+        **_pooled_http("openai"),
+        callbacks=[usage_recorder],
     )
 
 
+@_registered
 def gpt_4o_not_azure(temperature: float = 0.5) -> ChatOpenAI:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
@@ -181,9 +288,14 @@ def gpt_4o_not_azure(temperature: float = 0.5) -> ChatOpenAI:
         model="gpt-4o",
         temperature=temperature,
         api_key=SecretStr(OPENAI_API_KEY),
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+        timeout=LLM_REQUEST_TIMEOUT,
+        **_pooled_http("openai"),
+        callbacks=[usage_recorder],
     )
 
 
+@_registered
 def perplexity(temperature: float = 0.7) -> ChatPerplexity:
     """
     Models: https://docs.perplexity.ai/guides/model-cards
@@ -198,5 +310,73 @@ def perplexity(temperature: float = 0.7) -> ChatPerplexity:
         temperature=temperature,
         model="llama-3.1-sonar-small-128k-online",
         timeout=15,
+        callbacks=[usage_recorder],
         api_key=PERPLEXITY_AI_KEY,
     )
+
+
+# Provider of each model, which their circuit breakers are shared by
+PROVIDERS = {
+    gemini_flash_2: "openrouter",
+    openrouter_r1: "openrouter",
+    openrouter_gpt_4o: "openrouter",
+    openrouter_gpt_4o_mini: "openrouter",
+    openrouter_o3_mini: "openrouter",
+    gpt_o3_mini: "azure",
+    gpt_o1: "azure",
+    gpt_4o_mini: "azure",
+    gpt_4o: "azure",
+    gpt_4o_mini_not_azure: "openai",
+    gpt_4o_not_azure: "openai",
+    perplexity: "perplexity",
+}
+
+# The same (or a comparable) model on another provider, used while the first one's provider is failing
+FAILOVER = {
+    gpt_4o: openrouter_gpt_4o,
+    gpt_4o_mini: openrouter_gpt_4o_mini,
+    gpt_o3_mini: openrouter_o3_mini,
+    gemini_flash_2: gpt_4o_mini,
+    openrouter_gpt_4o: gpt_4o,
+    openrouter_gpt_4o_mini: gpt_4o_mini,
+    openrouter_o3_mini: gpt_o3_mini,
+}
+
+
+def model_name(factory: Callable[..., BaseChatModel]) -> str:
+    """
+    The provider and model a registered factory's client calls, e.g. "azure:gpt-4o".
+    """
+    try:
+        client = factory()
+    except AssertionError:
+        # Not configured, so it can't serve any call either
+        return f"{PROVIDERS[factory]}:{factory.__name__}:unconfigured"
+
+    return f"{PROVIDERS[factory]}:{getattr(client, 'model_name', None) or getattr(client, 'model', '')}"
+
+
+def warm_up() -> None:
+    """
+    Creates the clients used for evaluations and opens a connection to each
+    provider, so the first requests don't pay for the TLS handshake.
+    """
+    for factory in (gpt_4o, gpt_o3_mini, gpt_4o_mini, gemini_flash_2):
+        try:
+            factory()
+        except AssertionError as e:
+            logging.info(f"Skipping warm-up of {factory.__name__}: {e}")
+
+    urls = {"azure": os.getenv("AZURE_API_URL"), "openrouter": OPENROUTER_API_URL, "openai": OPENAI_API_URL}
+
+    for provider, url in urls.items():
+        if url is None or provider not in _http_clients:
+            continue
+
+        try:
+            # Any response will do, the connection stays in the pool
+            _http_clients[provider][0].head(url, timeout=5)
+        except httpx.HTTPError as e:
+            logging.warning(f"Could not open a connection to {provider}: {e}")
+
+    logging.info(f"Warmed up {len(_clients)} LLM clients")
@@ -1,5 +1,15 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Iterator
+
 from praw import Reddit
-from praw.models import Subreddits
+from prawcore import Requestor
 from dotenv import load_dotenv
 import os
 
@@ -10,25 +20,157 @@ REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
 REDDIT_PASSWORD = os.getenv("REDDIT_PASSWORD")
 REDDIT_USERNAME = os.getenv("REDDIT_USERNAME")
 
+# Upper bound for the request rate; Reddit's rate-limit headers can only lower it
+REDDIT_REQUESTS_PER_MINUTE = float(os.getenv("REDDIT_REQUESTS_PER_MINUTE", "100"))
+REDDIT_BURST = float(os.getenv("REDDIT_BURST", "10"))
+
+
+class Priority(IntEnum):
+    """
+    Lower values are served first when requests are waiting for the rate limit.
+    """
+
+    STREAM = 0
+    INTERACTIVE = 1
+    BACKGROUND = 2
+
+
+_priority: ContextVar[Priority] = ContextVar("reddit_priority", default=Priority.BACKGROUND)
+
+
+@contextmanager
+def reddit_priority(priority: Priority) -> Iterator[None]:
+    """
+    Sets the priority of the Reddit requests made inside the block, including
+    those made from `asyncio.to_thread`, which copies the current context.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimitScheduler:
+    """
+    Process-wide token bucket for Reddit requests.
+
+    Every request made by a Reddit client takes a token. Waiting requests are
+    served by priority, then in arrival order, and the refill rate follows the
+    `x-ratelimit-*` headers Reddit sends back.
+    """
+
+    def __init__(self, requests_per_minute: float = REDDIT_REQUESTS_PER_MINUTE, burst: float = REDDIT_BURST):
+        self.max_rate = requests_per_minute / 60
+        self.rate = self.max_rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []
+        self._tickets = itertools.count()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: Priority = Priority.BACKGROUND) -> None:
+        with self._cond:
+            ticket = (int(priority), next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+
+            try:
+                while True:
+                    self._refill()
 
-def get_reddit_instance():
+                    if self._waiting[0] == ticket and self._tokens >= 1:
+                        heapq.heappop(self._waiting)
+                        self._tokens -= 1
+                        self._cond.notify_all()
+                        return
+
+                    # Wake up when the next token is due, or when the queue changes
+                    self._cond.wait(timeout=max((1 - self._tokens) / self.rate, 0.01))
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def update(self, remaining: float | None, reset_seconds: float | None) -> None:
+        """
+        Paces the remaining requests evenly over the current rate-limit window.
+        """
+        if remaining is None or not reset_seconds or reset_seconds <= 0:
+            return
+
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, remaining)
+            self.rate = min(self.max_rate, max(remaining, 1) / reset_seconds)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill()
+            return {
+                "tokens": self._tokens,
+                "requests_per_minute": self.rate * 60,
+                "waiting": len(self._waiting),
+            }
+
+
+scheduler = RateLimitScheduler()
+
+
+class ScheduledRequestor(Requestor):
+    """
+    prawcore requestor that takes a token from the shared scheduler before each HTTP request.
+    """
+
+    def request(self, *args, **kwargs):
+        scheduler.acquire(_priority.get())
+        response = super().request(*args, **kwargs)
+
+        try:
+            scheduler.update(
+                float(response.headers["x-ratelimit-remaining"]),
+                float(response.headers["x-ratelimit-reset"]),
+            )
+        except (KeyError, ValueError):
+            pass
+
+        return response
+
+
+def _create_reddit_instance() -> Reddit:
     return Reddit(
         client_id=REDDIT_CLIENT_ID,
         client_secret=REDDIT_CLIENT_SECRET,
         password=REDDIT_PASSWORD,
         user_agent="reletino bot by u/antopia_hk",
         username=REDDIT_USERNAME,
+        requestor_class=ScheduledRequestor,
     )
 
 
-def get_subreddits(subreddits: list[str]):
-    
-    subreddits_formatted: str = "+".join(subreddits)
-    
-    reddit = get_reddit_instance()
+# praw clients aren't thread-safe, so every thread gets its own
+_clients = threading.local()
+
+
+def get_reddit_instance() -> Reddit:
+    """
+    Returns the calling thread's Reddit client, creating it on first use.
 
-    print("Reddit sign in success! Username: ", reddit.user.me())
+    All clients sign in as the same account, so more of them wouldn't raise
+    the rate limit; the shared scheduler paces their requests together.
+    """
+    reddit: Reddit | None = getattr(_clients, "reddit", None)
 
-    subreddits: Subreddits = reddit.subreddit(subreddits_formatted)
+    if reddit is None:
+        reddit = _clients.reddit = _create_reddit_instance()
+        logging.info(f"Created Reddit client for thread: {threading.current_thread().name}")
 
-    return subreddits
+    return reddit
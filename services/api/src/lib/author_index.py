@@ -0,0 +1,98 @@
+import os
+import time
+from pathlib import Path
+
+import diskcache as dc
+
+current_directory = Path(__file__).resolve().parent
+
+# Kept apart from the submission cache so lookups never have to scan it
+author_index_filepath = current_directory / "cache" / "authors"
+
+# Submissions from the same author within this window are skipped
+AUTHOR_RECENCY_WINDOW = int(os.getenv("AUTHOR_RECENCY_WINDOW", "300"))
+
+
+class AuthorRecencyIndex:
+    """
+    Remembers when each author last posted, per project.
+
+    Entries are keyed by project and author and expire on their own once the
+    recency window has passed, so a lookup is a single keyed read no matter how
+    many submissions have been cached over time.
+    """
+
+    def __init__(self, directory: Path | str = author_index_filepath, window: int = AUTHOR_RECENCY_WINDOW):
+        self.window = window
+        self._cache = dc.Cache(str(directory))
+
+    @staticmethod
+    def _key(project_id: str, author_name: str) -> str:
+        return f"{project_id}:{author_name}"
+
+    def last_seen(self, project_id: str, author_name: str) -> float | None:
+        return self._cache.get(self._key(project_id, author_name))
+
+    def seen_recently(self, project_id: str, author_name: str, timestamp: float) -> bool:
+        """
+        Whether the author posted in this project within the window before `timestamp`.
+        """
+        last_seen = self.last_seen(project_id, author_name)
+
+        if last_seen is None:
+            return False
+
+        return timestamp - last_seen < self.window
+
+    def record(self, project_id: str, author_name: str, timestamp: float) -> None:
+        # Expiry is relative to now, so older submissions (e.g. replays) age out sooner
+        remaining = self.window - (time.time() - timestamp)
+
+        if remaining <= 0:
+            return
+
+        self._cache.set(self._key(project_id, author_name), timestamp, expire=remaining)
+
+    def expire(self) -> int:
+        """
+        Removes expired entries. Returns the number of entries removed.
+        """
+        return self._cache.expire()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+author_index = AuthorRecencyIndex()
+
+
+if __name__ == "__main__":
+    # Benchmark: lookup cost should stay flat as the index grows.
+    # Usage: python -m src.lib.author_index [max_entries]
+    import random
+    import sys
+    import tempfile
+
+    max_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lookups = 10_000
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = AuthorRecencyIndex(directory, window=10**9)
+        now = time.time()
+        size = 0
+        target = 1_000
+
+        while target <= max_entries:
+            for i in range(size, target):
+                index.record(f"project-{i % 50}", f"author-{i}", now)
+            size = target
+
+            keys = [(f"project-{i % 50}", f"author-{random.randrange(size)}") for i in range(lookups)]
+
+            start = time.perf_counter()
+            for project_id, author_name in keys:
+                index.seen_recently(project_id, author_name, now)
+            elapsed = time.perf_counter() - start
+
+            print(f"{size:>10,} entries: {elapsed / lookups * 1e6:8.2f} µs/lookup")
+            target *= 10
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import time
+
+from praw.models import Submission
+
+from src.interfaces import db
+from src.interfaces.reddit import Priority, get_reddit_instance, reddit_priority
+from src.lib.reddit_worker import RedditStreamWorker
+from src.lib.subreddit_stream import normalize_subreddit
+from src.models import BackfillProgress
+from src.models.project import Project
+
+# Days of history pulled for a project when none are given
+BACKFILL_DAYS = int(os.getenv("BACKFILL_DAYS", "7"))
+
+# Submissions evaluated at once across every backfill, apart from the live pipeline
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+
+# Listing pages fetched per minute by each backfill, on top of the Reddit scheduler's BACKGROUND priority
+BACKFILL_PAGES_PER_MINUTE = float(os.getenv("BACKFILL_PAGES_PER_MINUTE", "20"))
+
+BACKFILL_PAGE_SIZE = 100
+
+
+def fetch_page(subreddit: str, after: str | None) -> list[Submission]:
+    """
+    One page of the subreddit's newest submissions, starting after the given fullname.
+    """
+    reddit = get_reddit_instance()
+
+    with reddit_priority(Priority.BACKGROUND):
+        return list(reddit.subreddit(subreddit).new(limit=BACKFILL_PAGE_SIZE, params={"after": after} if after else {}))
+
+
+class BackfillManager:
+    """
+    Evaluates the recent history of a project's subreddits.
+
+    Listings are paged from newest to oldest until the cutoff, at the lowest
+    Reddit priority and a page rate of their own. Evaluations share a separate
+    concurrency limit, so the live pipeline never waits on a backfill. Results
+    go through the submission batcher like live ones. After every page the
+    cursor is saved, and starting the backfill again continues from it,
+    skipping the subreddits that are done.
+
+    Reddit listings only reach back about 1000 submissions per subreddit.
+    """
+
+    def __init__(self, concurrency: int = BACKFILL_CONCURRENCY, pages_per_minute: float = BACKFILL_PAGES_PER_MINUTE):
+        self.page_interval = 60 / pages_per_minute
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._jobs: dict[str, tuple[RedditStreamWorker, asyncio.Task]] = {}
+
+    def is_running(self, project_id: str) -> bool:
+        return project_id in self._jobs
+
+    async def start(self, project: Project, team_name: str, days: int = BACKFILL_DAYS) -> bool:
+        """
+        Starts or resumes a project's backfill. Returns False if it's already running.
+        """
+        if project.id in self._jobs:
+            return False
+
+        worker = RedditStreamWorker(project=project, team_name=team_name)
+        await worker.start()
+
+        task = asyncio.create_task(self._run(worker, days), name=f"backfill-{project.id}")
+        self._jobs[project.id] = (worker, task)
+        task.add_done_callback(lambda _: self._jobs.pop(project.id, None))
+
+        logging.info(f"Started backfill of {days} days for project: {project.id}")
+        return True
+
+    async def cancel(self, project_id: str) -> None:
+        job = self._jobs.pop(project_id, None)
+
+        if job is None:
+            return
+
+        _, task = job
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        logging.info(f"Cancelled backfill for project: {project_id}")
+
+    async def cancel_profile(self, profile_id: str) -> None:
+        """
+        Cancels every backfill of a profile, e.g. once it runs out of credits.
+        """
+        for project_id, (worker, _) in list(self._jobs.items()):
+            if worker.profile_id == profile_id:
+                await self.cancel(project_id)
+
+    async def stop(self) -> None:
+        for project_id in list(self._jobs):
+            await self.cancel(project_id)
+
+    async def progress(self, project_id: str) -> list[BackfillProgress]:
+        supabase = await db.async_client()
+        response = await supabase.table("backfill_progress").select("*").eq("project_id", project_id).execute()
+        return [BackfillProgress(**row) for row in response.data or []]
+
+    async def _save(self, progress: BackfillProgress) -> None:
+        supabase = await db.async_client()
+        await supabase.table("backfill_progress").upsert(progress.model_dump(), on_conflict="project_id,subreddit").execute()
+
+    async def _run(self, worker: RedditStreamWorker, days: int) -> None:
+        project_id = worker.project.id
+        cutoff_utc = time.time() - days * 86400
+
+        try:
+            # An interrupted backfill continues where it stopped and skips the subreddits it
+            # finished. Once every subreddit is done, the next backfill starts over.
+            subreddits = list(dict.fromkeys(normalize_subreddit(name) for name in worker.project.subreddits))
+            saved = {progress.subreddit: progress for progress in await self.progress(project_id) if progress.subreddit in subreddits}
+            if all(progress.done for progress in saved.values()):
+                saved = {}
+
+            for subreddit in subreddits:
+                progress = saved.get(subreddit) or BackfillProgress(
+                    project_id=project_id,
+                    subreddit=subreddit,
+                    cutoff_utc=cutoff_utc,
+                )
+                await self._backfill_subreddit(worker, progress)
+
+            logging.info(f"Finished backfill for project: {project_id}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Backfill failed for project: {project_id}: {e}", exc_info=True)
+        finally:
+            await worker.stop(persist=False)
+
+    async def _backfill_subreddit(self, worker: RedditStreamWorker, progress: BackfillProgress) -> None:
+        while not progress.done:
+            started = time.monotonic()
+            page = await asyncio.to_thread(fetch_page, progress.subreddit, progress.after)
+            in_range = [submission for submission in page if submission.created_utc >= progress.cutoff_utc]
+
+            results = await asyncio.gather(*(self._evaluate(worker, submission) for submission in in_range))
+
+            progress.fetched += len(page)
+            progress.evaluated += sum(results)
+            progress.after = page[-1].fullname if page else progress.after
+            progress.done = len(in_range) < len(page) or len(page) < BACKFILL_PAGE_SIZE
+            await self._save(progress)
+
+            logging.info(f"Backfilled {progress.fetched} submissions from r/{progress.subreddit} for project: {progress.project_id}")
+            await asyncio.sleep(max(self.page_interval - (time.monotonic() - started), 0))
+
+    async def _evaluate(self, worker: RedditStreamWorker, submission: Submission) -> bool:
+        """
+        Returns whether the submission was evaluated. Already seen and pre-filtered ones aren't.
+        """
+        async with self._semaphore:
+            if not await worker.should_evaluate(submission):
+                return False
+
+            await worker.process_submission(submission)
+            return True
+
+
+backfills = BackfillManager()
@@ -1,20 +1,25 @@
 from typing import TypeVar, Callable, Any
 from langchain_core.runnables import RunnableSerializable
 
+from src.lib import resilience
+
 T = TypeVar('T')
 
 def retry_chain_invoke(
     chain: RunnableSerializable,
     inputs: dict[str, Any] = {},
-    max_retries: int = 3
+    max_retries: int = resilience.LLM_RETRY_ATTEMPTS
 ) -> Any:
     """
     Invokes a LangChain chain with retry logic.
+
+    Prefer `resilience.invoke` where the model is known, which also fails over
+    to another provider. This only backs off and retries the same chain.
     
     Args:
         chain: The LangChain chain to invoke
         inputs: The inputs to pass to the chain
-        max_retries: Maximum number of retry attempts (default: 3)
+        max_retries: Maximum number of retry attempts
         
     Returns:
         The chain's response
@@ -22,11 +27,4 @@ def retry_chain_invoke(
     Raises:
         Exception: Re-raises the last exception if all retries fail
     """
-    for attempt in range(max_retries):
-        try:
-            response = chain.invoke(inputs)
-            return response
-        except Exception as e:
-            if attempt == max_retries - 1:  # Last attempt
-                raise e  # Re-raise the exception if all retries failed
-            continue 
\ No newline at end of file
+    return resilience.retry(lambda: chain.invoke(inputs), attempts=max_retries)
@@ -0,0 +1,162 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+
+from praw.models import Submission
+
+from src.interfaces import db
+from src.models import StreamCheckpoint
+from src.models.stream_checkpoint import stream_position
+
+# Seconds between two writes of the checkpoints that moved
+CHECKPOINT_FLUSH_INTERVAL = float(os.getenv("CHECKPOINT_FLUSH_INTERVAL", "10"))
+
+
+class CheckpointStore:
+    """
+    Persists each project's high-water mark per subreddit.
+
+    On start a project restores its checkpoints, and everything at or before
+    them is skipped, so a restart doesn't replay (and re-evaluate) the posts
+    Reddit returns again in its first listing. Checkpoints are advanced in
+    memory and written to the database in batches.
+
+    Posts are handled concurrently and finish out of order, so a checkpoint
+    only moves up to the newest post before which every post that was begun
+    is complete. Posts still queued or being evaluated are never skipped by a
+    restart.
+    """
+
+    def __init__(self, flush_interval: float = CHECKPOINT_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._checkpoints: dict[tuple[str, str], StreamCheckpoint] = {}
+        self._dirty: set[tuple[str, str]] = set()
+        # Positions of the posts begun but not complete yet
+        self._in_flight: dict[tuple[str, str], set[tuple[float, int]]] = {}
+        # Posts complete but still behind an in-flight one, as a heap by position
+        self._completed: dict[tuple[str, str], list[tuple[tuple[float, int], str, float]]] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="checkpoint-store")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        await self.flush()
+
+    async def load(self, project_id: str) -> None:
+        supabase = await db.async_client()
+        response = await supabase.table("stream_checkpoints").select("*").eq("project_id", project_id).execute()
+
+        for row in response.data or []:
+            checkpoint = StreamCheckpoint(**row)
+            self._checkpoints[(project_id, checkpoint.subreddit)] = checkpoint
+
+        logging.info(f"Restored {len(response.data or [])} stream checkpoints for project: {project_id}")
+
+    def is_new(self, project_id: str, subreddit: str, submission: Submission) -> bool:
+        """
+        Whether the submission comes after the project's checkpoint for the subreddit.
+        """
+        checkpoint = self._checkpoints.get((project_id, subreddit))
+
+        if checkpoint is None:
+            return True
+
+        return stream_position(submission.created_utc, submission.fullname) > checkpoint.position()
+
+    def begin(self, project_id: str, subreddit: str, submission: Submission) -> None:
+        """
+        Holds the checkpoint back until `submission` is complete.
+        """
+        position = stream_position(submission.created_utc, submission.fullname)
+        self._in_flight.setdefault((project_id, subreddit), set()).add(position)
+
+    def complete(self, project_id: str, subreddit: str, submission: Submission) -> None:
+        """
+        Marks a begun submission as handled and moves the checkpoint up to the
+        newest post with nothing in flight before it. Submissions that weren't
+        begun (e.g. a backfill's) are ignored.
+        """
+        key = (project_id, subreddit)
+        position = stream_position(submission.created_utc, submission.fullname)
+        in_flight = self._in_flight.get(key, set())
+
+        if position not in in_flight:
+            return
+
+        in_flight.discard(position)
+        completed = self._completed.setdefault(key, [])
+        heapq.heappush(completed, (position, submission.fullname, submission.created_utc))
+
+        low_watermark = min(in_flight, default=(math.inf, 0))
+        newest: tuple[str, float] | None = None
+
+        while completed and completed[0][0] < low_watermark:
+            _, fullname, created_utc = heapq.heappop(completed)
+            newest = (fullname, created_utc)
+
+        if not in_flight:
+            del self._in_flight[key]
+        if not completed:
+            del self._completed[key]
+
+        if newest is not None:
+            self._advance(project_id, subreddit, *newest)
+
+    def _advance(self, project_id: str, subreddit: str, fullname: str, created_utc: float) -> None:
+        checkpoint = self._checkpoints.get((project_id, subreddit))
+
+        if checkpoint is not None and stream_position(created_utc, fullname) <= checkpoint.position():
+            return
+
+        self._checkpoints[(project_id, subreddit)] = StreamCheckpoint(
+            project_id=project_id,
+            subreddit=subreddit,
+            last_fullname=fullname,
+            last_created_utc=created_utc,
+        )
+        self._dirty.add((project_id, subreddit))
+
+    def forget(self, project_id: str) -> None:
+        """
+        Drops a project's checkpoints and in-flight posts from memory. Persisted checkpoints are kept.
+        """
+        for key in [key for key in self._checkpoints if key[0] == project_id]:
+            if key not in self._dirty:
+                del self._checkpoints[key]
+
+        for key in [key for key in self._in_flight if key[0] == project_id]:
+            del self._in_flight[key]
+
+        for key in [key for key in self._completed if key[0] == project_id]:
+            del self._completed[key]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._dirty:
+            return
+
+        dirty, self._dirty = self._dirty, set()
+        rows = [self._checkpoints[key].model_dump() for key in dirty if key in self._checkpoints]
+
+        try:
+            supabase = await db.async_client()
+            await supabase.table("stream_checkpoints").upsert(rows, on_conflict="project_id,subreddit").execute()
+        except Exception as e:
+            logging.error(f"Error saving {len(rows)} stream checkpoints, will retry: {e}")
+            self._dirty |= dirty
+
+
+checkpoints = CheckpointStore()
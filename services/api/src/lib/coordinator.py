@@ -0,0 +1,348 @@
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from src.interfaces import db
+from src.lib.engine import WorkerEngine, engine
+from src.lib.supervisor import load_team_name
+from src.models.project import Project
+
+# Spread running projects across every process that has sharding enabled
+SHARDING_ENABLED = os.getenv("SHARDING_ENABLED", "false").lower() == "true"
+
+# Seconds between heartbeats; members and leases expire after LEASE_TTL_SECONDS without one
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "10"))
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "30"))
+
+
+def default_member_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def rendezvous_owner(project_id: str, members: list[str]) -> str | None:
+    """
+    Picks the member a project belongs to (highest random weight hashing).
+    When a member joins or leaves, only the projects it gains or loses move.
+    """
+    if not members:
+        return None
+
+    return max(members, key=lambda member: hashlib.sha256(f"{member}:{project_id}".encode()).digest())
+
+
+class LeaseStore(ABC):
+    """
+    Where members announce themselves and hold leases on projects.
+    """
+
+    @abstractmethod
+    async def heartbeat(self, member_id: str) -> None: ...
+
+    @abstractmethod
+    async def leave(self, member_id: str) -> None: ...
+
+    @abstractmethod
+    async def live_members(self, ttl: float) -> list[str]: ...
+
+    @abstractmethod
+    async def claim(self, project_id: str, member_id: str, ttl: float) -> bool:
+        """Takes the lease if it's free, expired or already ours. Returns whether we hold it."""
+        ...
+
+    @abstractmethod
+    async def renew(self, project_ids: list[str], member_id: str, ttl: float) -> set[str]:
+        """Extends our leases. Returns the projects we still hold."""
+        ...
+
+    @abstractmethod
+    async def release(self, project_ids: list[str], member_id: str) -> None: ...
+
+    @abstractmethod
+    async def running_project_ids(self) -> set[str]: ...
+
+    @abstractmethod
+    async def set_running(self, project_id: str, running: bool) -> None: ...
+
+    @abstractmethod
+    async def load_project(self, project_id: str) -> tuple[Project, str] | None:
+        """Returns the project and its team name, or None if it no longer exists."""
+        ...
+
+
+class InMemoryLeaseStore(LeaseStore):
+    """
+    Local stand-in for the database, shared by coordinators in the same process.
+    """
+
+    def __init__(self, projects: dict[str, tuple[Project, str]] | None = None, clock: Callable[[], float] = time.monotonic):
+        self.projects = projects or {}
+        self.clock = clock
+        self.members: dict[str, float] = {}
+        self.leases: dict[str, tuple[str, float]] = {}
+
+    async def heartbeat(self, member_id: str) -> None:
+        self.members[member_id] = self.clock()
+
+    async def leave(self, member_id: str) -> None:
+        self.members.pop(member_id, None)
+
+    async def live_members(self, ttl: float) -> list[str]:
+        now = self.clock()
+        return sorted(member for member, seen in self.members.items() if now - seen < ttl)
+
+    async def claim(self, project_id: str, member_id: str, ttl: float) -> bool:
+        now = self.clock()
+        owner, expires_at = self.leases.get(project_id, (member_id, now))
+
+        if owner != member_id and expires_at > now:
+            return False
+
+        self.leases[project_id] = (member_id, now + ttl)
+        return True
+
+    async def renew(self, project_ids: list[str], member_id: str, ttl: float) -> set[str]:
+        now = self.clock()
+        renewed = set()
+
+        for project_id in project_ids:
+            owner, expires_at = self.leases.get(project_id, (None, now))
+            if owner == member_id and expires_at > now:
+                self.leases[project_id] = (member_id, now + ttl)
+                renewed.add(project_id)
+
+        return renewed
+
+    async def release(self, project_ids: list[str], member_id: str) -> None:
+        for project_id in project_ids:
+            if self.leases.get(project_id, (None, 0))[0] == member_id:
+                del self.leases[project_id]
+
+    async def running_project_ids(self) -> set[str]:
+        return {project_id for project_id, (project, _) in self.projects.items() if project.running}
+
+    async def set_running(self, project_id: str, running: bool) -> None:
+        if project_id in self.projects:
+            self.projects[project_id][0].running = running
+
+    async def load_project(self, project_id: str) -> tuple[Project, str] | None:
+        return self.projects.get(project_id)
+
+
+class SupabaseLeaseStore(LeaseStore):
+    """
+    Leases kept in the `worker_members` and `project_leases` tables. Claims and
+    renewals are done by RPCs so they are atomic.
+    """
+
+    async def heartbeat(self, member_id: str) -> None:
+        supabase = await db.async_client()
+        await supabase.rpc("heartbeat_worker_member", {"member_id": member_id}).execute()
+
+    async def leave(self, member_id: str) -> None:
+        supabase = await db.async_client()
+        await supabase.table("worker_members").delete().eq("id", member_id).execute()
+
+    async def live_members(self, ttl: float) -> list[str]:
+        supabase = await db.async_client()
+        response = await supabase.rpc("live_worker_members", {"ttl_seconds": ttl}).execute()
+        return sorted(row["member_id"] for row in response.data or [])
+
+    async def claim(self, project_id: str, member_id: str, ttl: float) -> bool:
+        supabase = await db.async_client()
+        response = await supabase.rpc(
+            "claim_project_lease",
+            {"lease_project_id": project_id, "member_id": member_id, "ttl_seconds": ttl},
+        ).execute()
+        return bool(response.data)
+
+    async def renew(self, project_ids: list[str], member_id: str, ttl: float) -> set[str]:
+        if not project_ids:
+            return set()
+
+        supabase = await db.async_client()
+        response = await supabase.rpc(
+            "renew_project_leases",
+            {"project_ids": project_ids, "member_id": member_id, "ttl_seconds": ttl},
+        ).execute()
+        return {row["project_id"] for row in response.data or []}
+
+    async def release(self, project_ids: list[str], member_id: str) -> None:
+        if not project_ids:
+            return
+
+        supabase = await db.async_client()
+        await supabase.table("project_leases").delete().in_("project_id", project_ids).eq("owner", member_id).execute()
+
+    async def running_project_ids(self) -> set[str]:
+        supabase = await db.async_client()
+        response = await supabase.table("projects").select("id").eq("running", True).execute()
+        return {row["id"] for row in response.data or []}
+
+    async def set_running(self, project_id: str, running: bool) -> None:
+        supabase = await db.async_client()
+        await supabase.table("projects").update({"running": running}).eq("id", project_id).execute()
+
+    async def load_project(self, project_id: str) -> tuple[Project, str] | None:
+        supabase = await db.async_client()
+        project_res = await supabase.table("projects").select("*").eq("id", project_id).execute()
+
+        if not project_res.data:
+            return None
+
+        team_name = await load_team_name(project_res.data[0])
+        if team_name is None:
+            return None
+
+        return Project(**project_res.data[0]), team_name
+
+
+class Coordinator:
+    """
+    Spreads running projects across every member (process or node) sharing a lease store.
+
+    Each member heartbeats, works out which running projects are its own by
+    rendezvous hashing over the live members, claims leases on those and runs
+    them. Projects that now belong to someone else, were stopped, or whose lease
+    was lost are stopped locally, so membership changes rebalance the fleet.
+    """
+
+    def __init__(
+        self,
+        store: LeaseStore,
+        engine: WorkerEngine = engine,
+        member_id: str | None = None,
+        heartbeat_interval: float = HEARTBEAT_INTERVAL,
+        lease_ttl: float = LEASE_TTL_SECONDS,
+    ):
+        self.store = store
+        self.engine = engine
+        self.member_id = member_id or default_member_id()
+        self.heartbeat_interval = heartbeat_interval
+        self.lease_ttl = lease_ttl
+        self.members: list[str] = []
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="coordinator")
+            logging.info(f"Started coordinator as member: {self.member_id}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        # Hand our projects over right away instead of waiting for the leases to expire
+        owned = list(self.engine.workers)
+        for project_id in owned:
+            await self.engine.stop_project(project_id, persist=False)
+
+        try:
+            await self.store.release(owned, self.member_id)
+            await self.store.leave(self.member_id)
+        except Exception as e:
+            logging.error(f"Error leaving the coordinator: {e}")
+
+    def owns(self, project_id: str) -> bool:
+        return rendezvous_owner(project_id, self.members) == self.member_id
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.rebalance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error rebalancing projects: {e}", exc_info=True)
+
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def rebalance(self) -> None:
+        """
+        One heartbeat: renews our leases and starts or stops projects to match the assignment.
+        """
+        await self.store.heartbeat(self.member_id)
+        self.members = await self.store.live_members(self.lease_ttl)
+        running = await self.store.running_project_ids()
+
+        owned = list(self.engine.workers)
+        held = await self.store.renew(owned, self.member_id, self.lease_ttl)
+
+        # Lost the lease, stopped by the user, or now assigned to another member
+        to_stop = [project_id for project_id in owned if project_id not in held or project_id not in running or not self.owns(project_id)]
+        for project_id in to_stop:
+            logging.info(f"Handing over project: {project_id}")
+            await self.engine.stop_project(project_id, persist=False)
+        await self.store.release([project_id for project_id in to_stop if project_id in held], self.member_id)
+
+        for project_id in running:
+            if project_id in self.engine.workers or not self.owns(project_id):
+                continue
+
+            # The previous owner may still hold the lease until it hands over or expires
+            if not await self.store.claim(project_id, self.member_id, self.lease_ttl):
+                continue
+
+            loaded = await self.store.load_project(project_id)
+            if loaded is None:
+                await self.store.release([project_id], self.member_id)
+                continue
+
+            project, team_name = loaded
+            await self.engine.start_project(project, team_name)
+
+    async def request_start(self, project: Project, team_name: str) -> bool:
+        """
+        Marks a project as running and starts it now if it belongs to this member.
+        Otherwise its owner picks it up on its next heartbeat. Returns whether it started here.
+        """
+        await self.store.set_running(project.id, True)
+
+        if not self.owns(project.id):
+            return False
+
+        if not await self.store.claim(project.id, self.member_id, self.lease_ttl):
+            return False
+
+        await self.engine.start_project(project, team_name)
+        return True
+
+    async def request_stop(self, project_id: str) -> None:
+        """
+        Marks a project as stopped. Its owner stops it on its next heartbeat, or now if that's us.
+        """
+        await self.store.set_running(project_id, False)
+
+        if await self.engine.stop_project(project_id, persist=False):
+            await self.store.release([project_id], self.member_id)
+
+    def stats(self) -> dict:
+        return {
+            "member_id": self.member_id,
+            "members": self.members,
+            "projects": sorted(self.engine.workers),
+        }
+
+
+coordinator = Coordinator(SupabaseLeaseStore())
+
+
+if __name__ == "__main__":
+    # Share of projects that move when a fourth member joins
+    project_ids = [str(uuid.uuid4()) for _ in range(10_000)]
+    members = ["a", "b", "c"]
+
+    before = {project_id: rendezvous_owner(project_id, members) for project_id in project_ids}
+    after = {project_id: rendezvous_owner(project_id, members + ["d"]) for project_id in project_ids}
+
+    moved = sum(before[project_id] != after[project_id] for project_id in project_ids)
+    print(f"Moved {moved / len(project_ids):.1%} of projects (ideal 25.0%)")
+    for member in members + ["d"]:
+        print(f"{member}: {sum(owner == member for owner in after.values())} projects")
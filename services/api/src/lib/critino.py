@@ -1,20 +1,47 @@
+import hashlib
 import json
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import diskcache as dc
 from langchain.prompts import FewShotPromptTemplate, PromptTemplate
 from langchain_core.messages import BaseMessage
-import requests
 from html2text import html2text
 from dotenv import load_dotenv
 from fastapi import HTTPException
 
+from src.interfaces import http
 from src.lib import xml_utils
+from src.lib.critique_replica import CRITIQUE_REPLICA, CritiqueReplica
 
 load_dotenv()
 
 # Access environment variables
 PUBLIC_CRITINO_API_URL = os.getenv("PUBLIC_CRITINO_API_URL")
 
+# Seconds a critique search may take before it fails (and a cached copy is used, if any)
+CRITINO_TIMEOUT = int(os.getenv("CRITINO_TIMEOUT", "30"))
+
+critique_cache_filepath = Path(__file__).resolve().parent / "cache" / "critiques"
+
+# Seconds fetched critiques are used as they are...
+CRITIQUE_CACHE_TTL = float(os.getenv("CRITIQUE_CACHE_TTL", "3600"))
+
+# ...and up to how old they're still used while a refresh runs in the background
+CRITIQUE_CACHE_MAX_STALE = float(os.getenv("CRITIQUE_CACHE_MAX_STALE", str(7 * 24 * 3600)))
+
+# Entries also kept in memory, on top of the disk cache
+CRITIQUE_CACHE_MEMORY_SIZE = int(os.getenv("CRITIQUE_CACHE_MEMORY_SIZE", "2048"))
+
+# Agents whose critiques are fetched for a project
+CRITINO_AGENTS = ["evaluator", "comment-generator", "dm-generator"]
+
 def normalize(text: str) -> str:
     return html2text(text).replace("\n", "").replace(" ", "").replace("\\", "").lower()
 
@@ -49,12 +76,199 @@ def critino_prompt(examples: str) -> str:
     </critino>
     """.strip()
     
+def critino_environment(team_name: str, project_name: str, agent_name: str) -> str:
+    return "reletino/" + team_name + "/" + project_name + "/" + agent_name
+
+
+class CritiqueCache:
+    """
+    Keeps fetched critiques in memory and on disk, by environment, normalised query and k.
+
+    Entries younger than `ttl` are returned as they are. Older ones, up to
+    `max_stale`, are still returned while a refresh runs in the background, so
+    a slow Critino doesn't hold up evaluations. Concurrent lookups of the same
+    key share one fetch.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str = critique_cache_filepath,
+        ttl: float = CRITIQUE_CACHE_TTL,
+        max_stale: float = CRITIQUE_CACHE_MAX_STALE,
+        memory_size: int = CRITIQUE_CACHE_MEMORY_SIZE,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.memory_size = memory_size
+        self.clock = clock
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._disk = dc.Cache(str(directory))
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._refreshes = ThreadPoolExecutor(max_workers=4, thread_name_prefix="critique-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(environment_name: str, query: str, k: int) -> str:
+        query_hash = hashlib.sha256(normalize(query).encode()).hexdigest()
+        return f"{environment_name}\0{query_hash}\0{k}"
+
+    def _lookup(self, key: str) -> tuple[str, float] | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        entry = self._disk.get(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: tuple[str, float]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        """
+        The shared result of the key's fetch, and whether this call has to run it.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+
+            future = Future()
+            self._in_flight[key] = future
+
+        return future, True
+
+    def _run(self, key: str, future: Future, fetch: Callable[[], str]) -> None:
+        try:
+            examples = fetch()
+            entry = (examples, self.clock())
+            self._disk.set(key, entry, expire=self.max_stale)
+            self._remember(key, entry)
+            future.set_result(examples)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def get(self, key: str, fetch: Callable[[], str]) -> str:
+        entry = self._lookup(key)
+
+        if entry is not None:
+            examples, fetched_at = entry
+            age = self.clock() - fetched_at
+
+            if age < self.ttl:
+                self.hits += 1
+                return examples
+
+            if age < self.max_stale:
+                self.stale_hits += 1
+                future, leader = self._claim(key)
+                if leader:
+                    self._refreshes.submit(self._run, key, future, fetch)
+                    future.add_done_callback(_log_refresh_error)
+                return examples
+
+        self.misses += 1
+        future, leader = self._claim(key)
+        if leader:
+            self._run(key, future, fetch)
+
+        return future.result()
+
+    def invalidate(self, environment_name: str | None = None) -> int:
+        """
+        Drops the entries of an environment, or every entry. Returns how many were dropped.
+        """
+        prefix = None if environment_name is None else f"{environment_name}\0"
+
+        with self._lock:
+            for key in [key for key in self._memory if prefix is None or key.startswith(prefix)]:
+                del self._memory[key]
+
+        if prefix is None:
+            return self._disk.clear()
+
+        dropped = 0
+        for key in list(self._disk.iterkeys()):
+            if isinstance(key, str) and key.startswith(prefix) and self._disk.delete(key):
+                dropped += 1
+        return dropped
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+
+        return {
+            "entries": len(self._disk),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "in_flight": len(self._in_flight),
+        }
+
+
+def _log_refresh_error(future: Future) -> None:
+    if future.exception() is not None:
+        logging.warning(f"critino: background refresh failed, serving cached critiques: {future.exception()}")
+
+
+critique_cache = CritiqueCache()
+
+
 def get_critiques(
     query: str,
     agent_name: str,
     project_name: str,
     team_name: str,
-    timeout: int = 300,
+    timeout: int = CRITINO_TIMEOUT,
+) -> str:
+    environment_name = critino_environment(team_name, project_name, agent_name)
+    k = 3
+
+    if CRITIQUE_REPLICA:
+        local = critique_replica.search(environment_name, query, k)
+
+        # Until the environment's first sync, the examples come from Critino
+        if local is not None:
+            return format_examples(local)
+
+    return critique_cache.get(
+        CritiqueCache.key(environment_name, query, k),
+        lambda: fetch_critiques(query, agent_name, environment_name, k, timeout),
+    )
+
+
+def invalidate_critiques(team_name: str, project_name: str, agent_name: str | None = None) -> int:
+    """
+    Drops the cached critiques of a project's agent, or of all its agents, e.g. after they were edited.
+    """
+    environments = [critino_environment(team_name, project_name, agent) for agent in ([agent_name] if agent_name else CRITINO_AGENTS)]
+
+    for environment_name in environments:
+        critique_replica.refresh(environment_name)
+
+    return sum(critique_cache.invalidate(environment_name) for environment_name in environments)
+
+
+def fetch_critiques(
+    query: str,
+    agent_name: str,
+    environment_name: str,
+    k: int = 3,
+    timeout: int = CRITINO_TIMEOUT,
 ) -> str:
     logging.info(f"critino: {agent_name}")
     examples = {}
@@ -63,9 +277,9 @@ def get_critiques(
 
         params = {
             "team_name": "startino",
-            "environment_name": "reletino/" + team_name + "/" + project_name + "/" + agent_name,
+            "environment_name": environment_name,
             "query": query,
-            "k": 3,
+            "k": k,
             "similarity_key": "query",
         }
 
@@ -73,32 +287,17 @@ def get_critiques(
 
         url = f"{PUBLIC_CRITINO_API_URL}/critiques"
 
-        x_critino_key = os.getenv("PUBLIC_CRITINO_API_KEY")
-        if not x_critino_key:
-            raise HTTPException(
-                status_code=500, detail="PUBLIC_CRITINO_API_KEY is empty"
-            )
-
-        x_openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
-        if not x_openrouter_api_key:
-            raise HTTPException(
-                status_code=500, detail="OPENROUTER_API_KEY is empty"
-            )
-
-        response = requests.get(
+        response = http.get_sync(
             url,
             params=params,
-            headers={
-                "X-Critino-Key": x_critino_key,
-                "X-OpenRouter-API-Key": x_openrouter_api_key,
-            },
+            headers=_critino_headers(),
             timeout=timeout,
         )
-        response_json = response.json()
-
-        examples = response_json.get("data", {})
+        # An error response isn't an empty set of critiques, and mustn't be cached as one
+        response.raise_for_status()
+        examples = response.json()["data"] or []
         logging.info(f"critino: {agent_name}: examples: {examples}")
-    except requests.exceptions.Timeout:
+    except TimeoutError:
         raise HTTPException(
             status_code=504, detail=f"Request timed out after {timeout} seconds"
         )
@@ -108,4 +307,44 @@ def get_critiques(
     if not examples:
         logging.info(f"critino: {agent_name}: No critiques were fetched")
 
+    return format_examples(examples)
+
+
+def format_examples(examples: list[dict]) -> str:
     return json.dumps(examples, indent=2).replace("{", "{{").replace("}", "}}")
+
+
+def _critino_headers() -> dict[str, str]:
+    x_critino_key = os.getenv("PUBLIC_CRITINO_API_KEY")
+    if not x_critino_key:
+        raise HTTPException(
+            status_code=500, detail="PUBLIC_CRITINO_API_KEY is empty"
+        )
+
+    x_openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
+    if not x_openrouter_api_key:
+        raise HTTPException(
+            status_code=500, detail="OPENROUTER_API_KEY is empty"
+        )
+
+    return {
+        "X-Critino-Key": x_critino_key,
+        "X-OpenRouter-API-Key": x_openrouter_api_key,
+    }
+
+
+def list_critiques(environment_name: str, timeout: int = 60) -> list[dict]:
+    """
+    Every critique of an environment, for the local replica.
+    """
+    response = http.get_sync(
+        f"{PUBLIC_CRITINO_API_URL}/critiques",
+        params={"team_name": "startino", "environment_name": environment_name},
+        headers=_critino_headers(),
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json().get("data", [])
+
+
+critique_replica = CritiqueReplica(list_critiques)
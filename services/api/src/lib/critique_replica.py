@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+import diskcache as dc
+import numpy as np
+
+from src.lib.prefilter import HASH_DIMENSIONS, hashed_terms
+
+# Serve few-shot examples from a local copy of the critiques instead of asking Critino per post.
+# The copy is searched by shared words rather than Critino's embeddings, see CritiqueReplica.
+CRITIQUE_REPLICA = os.getenv("CRITIQUE_REPLICA", "false").lower() == "true"
+
+# Seconds between two syncs of an environment's critiques
+CRITIQUE_SYNC_INTERVAL = float(os.getenv("CRITIQUE_SYNC_INTERVAL", "300"))
+
+# Age after which an environment's copy is reported as stale; it's still used until a sync succeeds
+CRITIQUE_REPLICA_MAX_STALENESS = float(os.getenv("CRITIQUE_REPLICA_MAX_STALENESS", "3600"))
+
+# Seconds an environment may go without lookups before its copy is dropped and no longer synced
+CRITIQUE_REPLICA_IDLE_SECONDS = float(os.getenv("CRITIQUE_REPLICA_IDLE_SECONDS", str(24 * 3600)))
+
+critique_replica_filepath = Path(__file__).resolve().parent / "cache" / "critique_replica"
+
+
+def _critique_hash(critique: dict) -> str:
+    return hashlib.sha256(json.dumps(critique, sort_keys=True).encode()).hexdigest()
+
+
+class ReplicatedEnvironment:
+    """
+    The critiques of one Critino environment, with their query vectors.
+
+    Vectors are kept sparse, as the hashed indices of a query's words and
+    their weights, so a critique costs memory in proportion to its query's
+    length rather than the full hashing width.
+
+    Built anew on every sync and swapped in whole, so searches never see a
+    half-updated copy. Vectors of critiques that didn't change are taken
+    from the `previous` copy.
+    """
+
+    def __init__(self, critiques: list[dict], synced_at: float, previous: "ReplicatedEnvironment | None" = None):
+        rows = {digest: row for row, digest in enumerate(previous.hashes)} if previous else {}
+        hashes = [_critique_hash(critique) for critique in critiques]
+
+        vectors = [
+            previous.vectors[rows[digest]] if previous and digest in rows else hashed_terms(critique.get("query", ""))
+            for critique, digest in zip(critiques, hashes)
+        ]
+
+        self.critiques = critiques
+        self.hashes = hashes
+        self.vectors = vectors
+        self.synced_at = synced_at
+        self.changed = sum(digest not in rows for digest in hashes)
+
+        # All vectors as one sparse matrix in coordinate form, for searching
+        empty = [(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))]
+        self._rows = np.repeat(np.arange(len(vectors), dtype=np.int32), [len(indices) for indices, _ in vectors])
+        self._indices = np.concatenate([indices for indices, _ in vectors or empty])
+        self._weights = np.concatenate([weights for _, weights in vectors or empty])
+
+    def search(self, query: str, k: int) -> list[dict]:
+        if not self.critiques:
+            return []
+
+        indices, weights = hashed_terms(query)
+        dense_query = np.zeros(HASH_DIMENSIONS, dtype=np.float32)
+        dense_query[indices] = weights
+
+        similarities = np.bincount(self._rows, weights=self._weights * dense_query[self._indices], minlength=len(self.critiques))
+        top = np.argsort(-similarities, kind="stable")[:k]
+        return [self.critiques[index] for index in top]
+
+
+class CritiqueReplica:
+    """
+    Keeps a local copy of the critiques of every environment that was asked for.
+
+    An environment is replicated from its first lookup on, and from then on
+    searched in-process: its critiques' queries are vectorised with the same
+    hashed bag of words as the pre-filter, and the nearest ones by cosine
+    similarity are the examples. A background loop re-syncs each environment
+    every `sync_interval`. Critino has no changed-since filter, so a sync
+    downloads the environment's list, but only new or edited critiques are
+    vectorised again. When a sync fails the previous copy keeps being used
+    and the staleness shows in the stats. Environments without a lookup for
+    `idle_after` are dropped and no longer synced.
+
+    Critino's list endpoint returns the critiques without their embeddings,
+    so this isn't the same search as Critino's: it matches the words of the
+    queries, not their meaning. Critiques that are phrased differently from a
+    post but about the same thing are missed, and ones sharing common words
+    rank higher than they would in Critino. That's the trade-off for not
+    depending on Critino per post, and why the replica is opt-in.
+    """
+
+    def __init__(
+        self,
+        list_critiques: Callable[[str], list[dict]],
+        directory: Path | str = critique_replica_filepath,
+        sync_interval: float = CRITIQUE_SYNC_INTERVAL,
+        max_staleness: float = CRITIQUE_REPLICA_MAX_STALENESS,
+        idle_after: float = CRITIQUE_REPLICA_IDLE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.list_critiques = list_critiques
+        self.sync_interval = sync_interval
+        self.max_staleness = max_staleness
+        self.idle_after = idle_after
+        self.clock = clock
+        self._disk = dc.Cache(str(directory))
+        self._environments: dict[str, ReplicatedEnvironment] = {}
+        # Replicated environments and when each is synced next
+        self._next_sync: dict[str, float] = {}
+        # When each environment was last looked up
+        self._last_used: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self.sync_failures = 0
+        self.evicted = 0
+
+    def search(self, environment_name: str, query: str, k: int) -> list[dict] | None:
+        """
+        The `k` critiques nearest to the query, or None if the environment isn't replicated yet.
+        """
+        self._last_used[environment_name] = self.clock()
+        environment = self._environments.get(environment_name)
+
+        if environment is None:
+            environment = self._load(environment_name)
+
+        if environment is None:
+            with self._lock:
+                self._next_sync.setdefault(environment_name, 0.0)
+            return None
+
+        return environment.search(query, k)
+
+    def refresh(self, environment_name: str) -> None:
+        """
+        Syncs a replicated environment on the next round instead of when it's due.
+        """
+        with self._lock:
+            if environment_name in self._next_sync:
+                self._next_sync[environment_name] = 0.0
+
+    def _load(self, environment_name: str) -> ReplicatedEnvironment | None:
+        saved = self._disk.get(environment_name)
+
+        if saved is None:
+            return None
+
+        environment = ReplicatedEnvironment(saved["critiques"], saved["synced_at"])
+
+        with self._lock:
+            self._environments[environment_name] = environment
+            self._next_sync.setdefault(environment_name, saved["synced_at"] + self.sync_interval)
+
+        return environment
+
+    def sync(self, environment_name: str) -> None:
+        critiques = self.list_critiques(environment_name)
+        environment = ReplicatedEnvironment(critiques, self.clock(), previous=self._environments.get(environment_name))
+
+        with self._lock:
+            self._environments[environment_name] = environment
+
+        # Only kept on disk as long as the environment would be kept in memory
+        self._disk.set(environment_name, {"critiques": critiques, "synced_at": environment.synced_at}, expire=self.idle_after)
+        logging.info(f"critino: synced {len(critiques)} critiques ({environment.changed} changed) of {environment_name}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="critique-replica")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def evict_idle(self) -> int:
+        """
+        Drops the environments not looked up within `idle_after`. Returns how many were dropped.
+        """
+        cutoff = self.clock() - self.idle_after
+
+        with self._lock:
+            idle = [name for name in self._next_sync if self._last_used.get(name, 0.0) < cutoff]
+
+            for environment_name in idle:
+                self._environments.pop(environment_name, None)
+                self._next_sync.pop(environment_name, None)
+                self._last_used.pop(environment_name, None)
+
+        if idle:
+            self.evicted += len(idle)
+            logging.info(f"critino: dropped {len(idle)} idle replicated environments")
+
+        return len(idle)
+
+    async def _run(self) -> None:
+        while True:
+            self.evict_idle()
+            now = self.clock()
+
+            with self._lock:
+                due = [name for name, next_sync in self._next_sync.items() if next_sync <= now]
+
+            for environment_name in due:
+                try:
+                    await asyncio.to_thread(self.sync, environment_name)
+                except Exception as e:
+                    self.sync_failures += 1
+                    logging.error(f"critino: error syncing critiques of {environment_name}: {e}")
+
+                # Failed syncs are retried on the next interval too, keeping the previous copy until then
+                with self._lock:
+                    self._next_sync[environment_name] = self.clock() + self.sync_interval
+
+            # Environments asked for since are picked up quickly, the rest when due
+            await asyncio.sleep(min(self.sync_interval, 10))
+
+    def stats(self) -> dict:
+        now = self.clock()
+        staleness = {name: now - environment.synced_at for name, environment in self._environments.items()}
+
+        return {
+            "enabled": CRITIQUE_REPLICA,
+            "environments": len(self._environments),
+            "critiques": sum(len(environment.critiques) for environment in self._environments.values()),
+            "pending": len(self._next_sync.keys() - self._environments.keys()),
+            "stale": sorted(name for name, age in staleness.items() if age > self.max_staleness),
+            "max_staleness_seconds": max(staleness.values(), default=0.0),
+            "sync_failures": self.sync_failures,
+            "evicted": self.evicted,
+        }
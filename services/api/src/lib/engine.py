@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+from typing import Callable
+
+from praw.models import Submission
+
+from src.interfaces import reddit
+from src.lib import hedging, prefilter, prompt_builder, resilience
+from src.lib.checkpoints import CheckpointStore, checkpoints
+from src.lib.critino import critique_cache, critique_replica
+from src.lib.evaluate_relevance import decisions, junior_batcher, tier_agreement, tier_timings
+from src.lib.evaluation_cache import evaluation_cache
+from src.lib.evaluation_pipeline import EvaluationPipeline, pipeline
+from src.lib.fingerprint import near_duplicates
+from src.lib.reddit_worker import RedditStreamWorker
+from src.lib.submission_writer import SubmissionBatcher, submission_batcher
+from src.lib.subreddit_stream import SubredditMultiplexer, multiplexer, normalize_subreddit
+from src.models.project import Project
+
+# Submissions buffered per project between the poller and the evaluation queue
+PROJECT_INBOX_SIZE = int(os.getenv("PROJECT_INBOX_SIZE", "100"))
+
+
+class WorkerEngine:
+    """
+    Runs every project stream as a task on a single event loop.
+
+    Each project gets a small inbox fed by the shared subreddit poller. Its task
+    drops anything behind the project's stream checkpoints, runs the cheap
+    local checks and hands the rest to the shared evaluation pipeline, which
+    bounds how many submissions are evaluated at once.
+    """
+
+    def __init__(
+        self,
+        multiplexer: SubredditMultiplexer = multiplexer,
+        pipeline: EvaluationPipeline = pipeline,
+        batcher: SubmissionBatcher = submission_batcher,
+        checkpoints: CheckpointStore = checkpoints,
+    ):
+        self.multiplexer = multiplexer
+        self.pipeline = pipeline
+        self.batcher = batcher
+        self.checkpoints = checkpoints
+        self.workers: dict[str, RedditStreamWorker] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        # Called with the project id whenever a project is stopped, even if it wasn't running
+        self.on_project_stopped: list[Callable[[str], None]] = []
+
+    async def start(self) -> None:
+        if self.stop_profile not in self.batcher.on_credits_exhausted:
+            self.batcher.on_credits_exhausted.append(self.stop_profile)
+        self.batcher.start()
+        self.checkpoints.start()
+        self.pipeline.start()
+        self.multiplexer.start()
+        logging.info("Started worker engine")
+
+    async def stop(self) -> None:
+        # Projects stay marked as running so they are resumed on the next start
+        for project_id in list(self.workers):
+            await self.stop_project(project_id, persist=False)
+
+        await self.multiplexer.stop()
+        await self.pipeline.stop()
+        await self.batcher.stop()
+        await self.checkpoints.stop()
+        logging.info("Stopped worker engine")
+
+    async def start_project(self, project: Project, team_name: str) -> None:
+        if project.id in self.workers:
+            logging.info(f"Restarting project stream for project: {project.id}")
+            await self.stop_project(project.id, persist=False)
+
+        worker = RedditStreamWorker(project=project, team_name=team_name)
+        await worker.start()
+        await self.checkpoints.load(project.id)
+
+        inbox: asyncio.Queue[Submission] = asyncio.Queue(maxsize=PROJECT_INBOX_SIZE)
+        self.workers[project.id] = worker
+        self._tasks[project.id] = asyncio.create_task(
+            self._run_project(worker, inbox), name=f"project-{project.id}"
+        )
+
+        # Submissions are polled once per subreddit and fanned out to every subscribed project
+        self.multiplexer.subscribe(project.id, project.subreddits, inbox.put)
+        logging.info(f"Started project stream: {project.id}")
+
+    async def stop_project(self, project_id: str, persist: bool = True) -> bool:
+        """
+        Stops a project stream. Returns False if it wasn't running.
+        With `persist`, the project is also marked as not running in the database.
+        """
+        worker = self.workers.pop(project_id, None)
+        task = self._tasks.pop(project_id, None)
+
+        for callback in self.on_project_stopped:
+            callback(project_id)
+
+        if worker is None:
+            return False
+
+        self.multiplexer.unsubscribe(project_id)
+
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        await worker.stop(persist=persist)
+        self.checkpoints.forget(project_id)
+        logging.info(f"Stopped project stream: {project_id}")
+        return True
+
+    async def stop_profile(self, profile_id: str) -> None:
+        """
+        Stops every project stream of a profile, e.g. once it runs out of credits.
+        """
+        for project_id, worker in list(self.workers.items()):
+            if worker.profile_id == profile_id:
+                await self.stop_project(project_id)
+
+    async def _run_project(self, worker: RedditStreamWorker, inbox: asyncio.Queue[Submission]) -> None:
+        stopped = asyncio.create_task(worker.stopped.wait())
+        next_submission: asyncio.Task[Submission] | None = None
+
+        try:
+            while worker.is_running():
+                # Also wakes up when the worker is stopped, so a project on a quiet subreddit doesn't linger
+                next_submission = asyncio.create_task(inbox.get())
+                await asyncio.wait({next_submission, stopped}, return_when=asyncio.FIRST_COMPLETED)
+
+                if not next_submission.done():
+                    break
+
+                submission = next_submission.result()
+                subreddit = normalize_subreddit(submission.subreddit.display_name)
+
+                # Already handled before the last restart
+                if not self.checkpoints.is_new(worker.project.id, subreddit, submission):
+                    continue
+
+                # Held until the post is handled, so a restart doesn't skip it while it's queued
+                self.checkpoints.begin(worker.project.id, subreddit, submission)
+
+                if await worker.should_evaluate(submission):
+                    await self.pipeline.submit(worker, submission)
+                else:
+                    self.checkpoints.complete(worker.project.id, subreddit, submission)
+        except Exception as e:
+            # Stop receiving submissions, or a full inbox would block the shared poller.
+            # The supervisor restarts the project.
+            logging.error(f"Project stream crashed for project: {worker.project.id}: {e}", exc_info=True)
+            self.multiplexer.unsubscribe(worker.project.id)
+            raise
+        finally:
+            stopped.cancel()
+            if next_submission is not None:
+                next_submission.cancel()
+
+        # The worker was stopped from outside the engine
+        if self.workers.get(worker.project.id) is worker:
+            self.multiplexer.unsubscribe(worker.project.id)
+            self.workers.pop(worker.project.id, None)
+            self._tasks.pop(worker.project.id, None)
+
+    def crashed_projects(self) -> list[RedditStreamWorker]:
+        """
+        Workers whose project task ended with an exception.
+        """
+        return [
+            self.workers[project_id]
+            for project_id, task in self._tasks.items()
+            if task.done() and not task.cancelled() and task.exception() is not None
+        ]
+
+    def ensure_services(self) -> None:
+        """
+        Restarts any of the shared background tasks that have died.
+        """
+        self.batcher.start()
+        self.checkpoints.start()
+        self.pipeline.ensure_workers()
+        self.multiplexer.start()
+
+    def stats(self) -> dict:
+        return {
+            "projects": len(self.workers),
+            "subreddits": self.multiplexer.subreddits(),
+            "dropped_submissions": dict(self.multiplexer.dropped),
+            "pipeline": self.pipeline.stats(),
+            "reddit_rate_limit": reddit.scheduler.stats(),
+            "prefilter_rejections": dict(prefilter.rejections),
+            "near_duplicates": near_duplicates.stats(),
+            "evaluation_cache": evaluation_cache.stats(),
+            "junior_batches": junior_batcher.stats(),
+            "decided_by": {
+                "decisions": dict(decisions),
+                "timings": {label: timer.stats() for label, timer in tier_timings.items()},
+                "tier_agreement": tier_agreement.stats(),
+            },
+            "llm_circuits": resilience.stats(),
+            "llm_hedging": hedging.hedger.stats(),
+            "prompt_prefixes": prompt_builder.stats(),
+            "critique_cache": critique_cache.stats(),
+            "critique_replica": critique_replica.stats(),
+        }
+
+
+engine = WorkerEngine()
@@ -1,17 +1,30 @@
-import textwrap
+import asyncio
+import contextvars
+import logging
 import os
+import random
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, TypeVar
 from dotenv import load_dotenv
 from langsmith import traceable
 
 from praw.models import Submission
 from langchain_openai import AzureChatOpenAI
-from langchain_core.messages import HumanMessage
 
-from src.interfaces.llm import gpt_4o, gpt_o1, gpt_o3_mini
+from src.interfaces import llm
+from src.interfaces.llm import gemini_flash_2, gpt_4o, gpt_4o_mini, gpt_o1, gpt_o3_mini
 from src.lib.reddit_profile_analysis import analyze_reddit_user
-from src.models import Evaluation
+from src.lib.scrape_reddit_profile import get_reddit_profile
+from src.models import BatchEvaluation, CascadeConfig, Evaluation, EvaluationResult, ScoredEvaluation
 
+from src.lib import hedging, resilience, usage
 from src.lib.critino import critino_prompt, get_critiques
+from src.lib.evaluation_cache import evaluation_cache
+from src.lib.evaluation_pipeline import StageTimer
+from src.lib.micro_batch import MicroBatcher
+from src.lib.prompt_builder import PromptBuilder
 from src.lib.xml_utils import submission_to_xml
 
 load_dotenv()
@@ -30,150 +43,565 @@ Perform individual reasoning:
 Use new lines and numbers to separate your thoughts.
 """
 
+# Junior and senior models; they and their failovers are part of the evaluation cache key
+JUNIOR_MODEL = gpt_4o
+SENIOR_MODEL = gpt_o3_mini
+
+# Models a project's cascade tiers can use
+CASCADE_MODELS = {
+    "gemini-flash-2": gemini_flash_2,
+    "gpt-4o-mini": gpt_4o_mini,
+    "gpt-4o": gpt_4o,
+    "o3-mini": gpt_o3_mini,
+}
+
+# Which step decided each post, and how long each step takes
+decisions: Counter[str] = Counter()
+tier_timings: defaultdict[str, StageTimer] = defaultdict(StageTimer)
+
+T = TypeVar("T")
+
+
+class TierAgreement:
+    """
+    How often each cascade tier's verdict matched the senior evaluation of the same post.
+
+    A tier's confidence is what the model says about itself, and nothing
+    calibrates it, so a project's thresholds are a guess until checked here.
+    Verdicts a tier wasn't confident about are compared whenever the post
+    escalates. A sample of the posts a tier decided is also given a senior
+    evaluation, only to compare, since otherwise confident verdicts are
+    never checked.
+    """
+
+    def __init__(self):
+        self._counts: defaultdict[str, Counter[str]] = defaultdict(Counter)
+
+    def record(self, submission_id: str, model: str, confident: bool, tier_relevant: bool, senior_relevant: bool) -> None:
+        agreed = tier_relevant == senior_relevant
+        kind = "confident" if confident else "uncertain"
+        self._counts[model][kind] += 1
+        self._counts[model][f"{kind}_agreed"] += agreed
+
+        logging.info(
+            f"Cascade tier {model} ({kind}) {'agreed' if agreed else 'disagreed'} with the senior evaluation "
+            f"of submission {submission_id}: relevant={tier_relevant}, senior relevant={senior_relevant}"
+        )
+
+    def stats(self) -> dict:
+        return {
+            model: {
+                kind: {
+                    "compared": counts[kind],
+                    "agreement": counts[f"{kind}_agreed"] / counts[kind] if counts[kind] else None,
+                }
+                for kind in ("confident", "uncertain")
+            }
+            for model, counts in self._counts.items()
+        }
+
+
+tier_agreement = TierAgreement()
+
+# Share of the posts decided by a cascade tier that also get a senior evaluation, only to measure agreement
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.05"))
+
+# Evaluate the junior step of posts arriving together in one LLM call
+JUNIOR_BATCHING = os.getenv("JUNIOR_BATCHING", "false").lower() == "true"
+
+# How long the first post of a batch waits for others, and the most posts per call
+JUNIOR_BATCH_WINDOW_MS = int(os.getenv("JUNIOR_BATCH_WINDOW_MS", "500"))
+JUNIOR_BATCH_SIZE = int(os.getenv("JUNIOR_BATCH_SIZE", "8"))
+
+
+PROJECT_BLOCK = """
+# Project
+Use the context of the project provided to determine if the post is relevant to the project.
+{project_prompt}
+"""
+
+junior_prompt = PromptBuilder(
+    "junior",
+    "Indulge me in some roleplay, my friend.",
+    REASONING_PROMPT,
+    """
+    # Context
+    You are a super intelligent junior assistant that helps the senior assistant in filtering Reddit posts for the Boss.
+    You and the senior assistant have the duty of going through Reddit posts and determining if they are relevant to look into for the Boss.
+    You are the first line of defense in filtering out irrelevant posts,
+    with the goal of saving time for the senior assistant,
+    since there are too many posts that are clearly and blatantly irrelevant.
+    It is important to note that because you are a junior assistant,
+    you are expected to make mistakes, and because of this and because we do not want to miss any relevant posts,
+    you will mark only the most obvious irrelevant posts as irrelevant.
+    This means that you should be biased towards marking posts as relevant.
+
+    # Personality and Style
+    You are a very intelligent junior assistant, almost like a mathematician. 
+    You have a very logical approach to concluding whether a post is relevant to the senior assistant.
+    You don't like repeating yourself and redundant text.
+    """,
+    project_block=PROJECT_BLOCK,
+)
+
+tier_prompt = PromptBuilder(
+    "cascade",
+    REASONING_PROMPT,
+    """
+    # Context
+    You filter Reddit posts, determining if they are relevant to look into for a project.
+    Give your conclusion along with how confident you are in it. Cheaper checks run before you,
+    and posts you aren't confident about are passed on to a more thorough review,
+    so only be confident when the post is clearly relevant or clearly irrelevant.
+    """,
+    project_block=PROJECT_BLOCK,
+)
+
+senior_prompt = PromptBuilder(
+    "senior",
+    """
+    Indulge me in some roleplay, my friend.
+
+    # Context
+    You are a very intelligent senior assistant that filters Reddit posts for your boss.
+    You have the duty of going through the Reddit posts and determining if they are relevant to look into for your boss.
+    """,
+    REASONING_PROMPT,
+    """
+    # Personality and Style
+    You are a very intelligent assistant, almost like a mathematician. 
+    You have a very logical approach to concluding whether a post is relevant to your boss.
+    You don't like repeating yourself and redundant text.
+    """,
+    project_block=PROJECT_BLOCK,
+)
+
+
+def _post_section(submission: Submission) -> str:
+    return f"# Post\nThis is the post we are evaluating.\n{submission_to_xml(submission)}"
+
+
+def _junior_evaluation(submission: Submission, project_prompt: str, examples: str) -> Evaluation | None:
+    messages = junior_prompt.build(
+        _post_section(submission),
+        critino_prompt(examples),
+        project_prompt=project_prompt,
+    )
+
+    with usage.tags(stage="junior"):
+        return resilience.invoke(
+            lambda llm: llm.with_structured_output(Evaluation),
+            messages,
+            JUNIOR_MODEL,
+        )
+
+
+# A post waiting in a junior batch, with the context it was submitted from
+JuniorItem = tuple[Submission, str, contextvars.Context]
+
+
+@traceable(run_type="chain", name="Junior Batch Evaluation")
+def _junior_batch_evaluation(key: tuple[str | None, str], items: list[JuniorItem]) -> list[Evaluation | None | BaseException]:
+    """
+    Evaluates several posts of a project in one call. Posts missing from the
+    answer, or all of them if the call fails, are evaluated one by one.
+
+    Batches hold the posts of a single project, so the batched call is booked
+    to that project and team. It runs in the first post's context, whose
+    deadline is the earliest; the posts evaluated one by one run in their own.
+    """
+    _, project_prompt = key
+
+    if len(items) == 1:
+        submission, examples, context = items[0]
+        return [context.run(_junior_evaluation, submission, project_prompt, examples)]
+
+    # Posts often share the same critique examples, which are then only sent once
+    example_sets = list(dict.fromkeys(examples for _, examples, _ in items))
+
+    posts = "\n".join(
+        f'<post id="{submission.id}" examples="{example_sets.index(examples) + 1}">{submission_to_xml(submission)}</post>'
+        for submission, examples, _ in items
+    )
+    messages = junior_prompt.build(
+        "# Posts\nThese are the posts we are evaluating. Evaluate each one on its own, "
+        "with its own reasoning, and return one evaluation per post with the post's id.\n" + posts,
+        "\n\n".join(f"## Examples {index + 1}\n{critino_prompt(examples)}" for index, examples in enumerate(example_sets)),
+        project_prompt=project_prompt,
+    )
+
+    def batch_evaluation() -> BatchEvaluation:
+        # A failed batch isn't retried, its posts are retried one by one instead
+        with usage.tags(stage="junior"):
+            return resilience.invoke(
+                lambda llm: llm.with_structured_output(BatchEvaluation),
+                messages,
+                JUNIOR_MODEL,
+                attempts=1,
+            )
+
+    evaluations: dict[str, Evaluation] = {}
+    try:
+        batch = items[0][2].run(batch_evaluation)
+
+        for keyed in batch.evaluations:  # type: ignore
+            evaluations[keyed.submission_id.removeprefix("t3_")] = Evaluation(
+                chain_of_thought=keyed.chain_of_thought,
+                is_relevant=keyed.is_relevant,
+            )
+    except Exception as e:
+        logging.warning(f"Batch junior evaluation of {len(items)} posts failed, evaluating them one by one: {e}")
+
+    results: list[Evaluation | None | BaseException] = []
+    for submission, examples, context in items:
+        if submission.id in evaluations:
+            results.append(evaluations[submission.id])
+            continue
+
+        try:
+            results.append(context.run(_junior_evaluation, submission, project_prompt, examples))
+        except Exception as e:
+            results.append(e)
+
+    return results
+
+
+junior_batcher: MicroBatcher[JuniorItem, Evaluation | None] = MicroBatcher(
+    _junior_batch_evaluation,
+    window_ms=JUNIOR_BATCH_WINDOW_MS,
+    batch_size=JUNIOR_BATCH_SIZE,
+)
+
+
+def _junior(submission: Submission, project_prompt: str, examples: str, project_id: str | None) -> Evaluation | None:
+    if JUNIOR_BATCHING:
+        # Posts of the same project arriving together share one junior call
+        return junior_batcher.submit((project_id, project_prompt), (submission, examples, contextvars.copy_context()))
+
+    return _junior_evaluation(submission, project_prompt, examples)
+
+
+def _evaluation_version(cascade: CascadeConfig | None) -> str:
+    """
+    The models that may serve an evaluation, failovers included, and the versions of its prompts.
+    """
+    if cascade is None or not cascade.tiers:
+        models = [JUNIOR_MODEL, SENIOR_MODEL]
+        prompts = [junior_prompt, senior_prompt]
+    else:
+        models = [CASCADE_MODELS[tier.model] for tier in cascade.tiers if tier.model in CASCADE_MODELS] + [SENIOR_MODEL]
+        prompts = [tier_prompt, senior_prompt]
+
+    served_by = dict.fromkeys(name for model in models for name in [model] + ([llm.FAILOVER[model]] if model in llm.FAILOVER else []))
+
+    return "|".join([
+        "/".join(llm.model_name(model) for model in served_by),
+        "/".join(prompt.version for prompt in prompts),
+        cascade.model_dump_json() if cascade else "",
+    ])
+
+
+def _cache_key(submission: Submission, project_prompt: str, examples: str, cascade: CascadeConfig | None) -> str:
+    # Same prompt, critiques, post and author as an earlier evaluation (e.g. a cloned project or a replay)
+    return evaluation_cache.key(
+        project_prompt=project_prompt,
+        examples=examples,
+        content=f"{submission.author.name if submission.author else 'deleted'}\n{submission_to_xml(submission)}",
+        model=_evaluation_version(cascade),
+    )
+
+
+def _tier_evaluation(model: str, submission: Submission, project_prompt: str, examples: str) -> ScoredEvaluation | None:
+    """
+    Evaluates a post with one cascade tier's model, along with how confident it is.
+    """
+    messages = tier_prompt.build(
+        _post_section(submission),
+        critino_prompt(examples),
+        project_prompt=project_prompt,
+    )
+
+    with usage.tags(stage=f"cascade-{model}"):
+        return resilience.invoke(
+            lambda llm: llm.with_structured_output(ScoredEvaluation),
+            messages,
+            CASCADE_MODELS[model],
+        )
+
+
+@traceable(name="Senior Evaluation")
+def _senior_evaluation(submission: Submission, project_prompt: str, examples: str, profile_insights: str) -> Evaluation | None:
+    # The insights are about the post's author, so they come after the project's prefix
+    messages = senior_prompt.build(
+        "# Profile Insights\n"
+        "These are the insights we have about the author of the post based on researching his Reddit profile.\n"
+        f"{profile_insights}",
+        _post_section(submission),
+        critino_prompt(examples),
+        project_prompt=project_prompt,
+    )
+
+    with usage.tags(stage="senior"):
+        return resilience.invoke(
+            lambda llm: llm.with_structured_output(Evaluation),
+            messages,
+            SENIOR_MODEL,
+        )
+
+
+# Seconds an evaluation may take in total, retries and failovers included
+EVALUATION_DEADLINE_SECONDS = float(os.getenv("EVALUATION_DEADLINE_SECONDS", "300"))
+
+# Profile work started before the junior verdict: "fetch" scrapes the author's
+# Reddit profile, "analyze" also runs the LLM profile analysis, "off" waits for the verdict
+SPECULATIVE_PROFILE = os.getenv("SPECULATIVE_PROFILE", "off")
+
+# Speculate only for projects where at least this share of recent posts reached the senior evaluation
+SPECULATIVE_MIN_ESCALATION = float(os.getenv("SPECULATIVE_MIN_ESCALATION", "0.3"))
+
+# Speculative profile scrapes running at once; posts arriving while all are busy aren't speculated on
+SPECULATIVE_MAX_IN_FLIGHT = int(os.getenv("SPECULATIVE_MAX_IN_FLIGHT", "2"))
+
+# Recent verdicts per project the escalation rate is taken from, and how many are needed before speculating
+ESCALATION_WINDOW = 50
+ESCALATION_MIN_SAMPLES = 10
+
+# Whether each recent post of a project went to the senior evaluation
+_escalations: defaultdict[str, deque[bool]] = defaultdict(lambda: deque(maxlen=ESCALATION_WINDOW))
+
+# Scrapes wait on the Reddit scheduler at BACKGROUND priority, so they get threads of their
+# own instead of holding the default executor's from live fetches and evaluations
+_speculation_pool = ThreadPoolExecutor(max_workers=SPECULATIVE_MAX_IN_FLIGHT, thread_name_prefix="speculative-profile")
+_speculating: set[asyncio.Task] = set()
+
+# Speculative work left to finish in the background, so its result is cached for later
+_background: set[asyncio.Task] = set()
+
+
+def _should_speculate(project_id: str | None) -> bool:
+    """
+    Whether to start the author's profile work before the verdict. Only done for
+    projects whose posts often escalate, while a speculation thread is free.
+    """
+    if SPECULATIVE_PROFILE == "off" or len(_speculating) >= SPECULATIVE_MAX_IN_FLIGHT:
+        return False
+
+    recent = _escalations[project_id or ""]
+    if len(recent) < ESCALATION_MIN_SAMPLES:
+        return False
+
+    return sum(recent) / len(recent) >= SPECULATIVE_MIN_ESCALATION
+
+
+def _speculate(username: str, project_prompt: str) -> asyncio.Task:
+    task = asyncio.create_task(_prefetch_profile(username, project_prompt))
+    _speculating.add(task)
+    task.add_done_callback(_speculating.discard)
+    return task
+
+
+async def _prefetch_profile(username: str, project_prompt: str) -> str | None:
+    loop = asyncio.get_running_loop()
+
+    # Both steps cache their results on disk, so nothing finished here is lost.
+    # The context carries the deadline, hedging scope and usage tags into the thread.
+    await loop.run_in_executor(_speculation_pool, contextvars.copy_context().run, get_reddit_profile, username)
+
+    if SPECULATIVE_PROFILE == "analyze":
+        return await loop.run_in_executor(
+            _speculation_pool, contextvars.copy_context().run, analyze_reddit_user, username, project_prompt
+        )
+
+    return None
+
+
+def _settle(speculative: asyncio.Task | None) -> None:
+    """
+    Handles speculative work that turned out not to be needed.
+    A fetched profile is kept for the author's next post. An analysis that
+    hasn't started yet is cancelled, but one already running in its thread
+    can't be stopped and finishes without being used.
+    """
+    if speculative is None or speculative.done():
+        return
+
+    if SPECULATIVE_PROFILE == "analyze":
+        speculative.cancel()
+    else:
+        _background.add(speculative)
+        speculative.add_done_callback(_background.discard)
+
+
+async def _timed(label: str, coroutine: Awaitable[T]) -> T:
+    started = time.monotonic()
+    try:
+        return await coroutine
+    finally:
+        tier_timings[label].observe(time.monotonic() - started)
+
 
 @traceable(run_type="chain", name="Evaluate Submission")
-def evaluate_submission(
+async def aevaluate_submission(
     submission: Submission,
     project_prompt: str,
     team_name: str,
     project_name: str,
-) -> tuple[Evaluation | None, str | None]:
+    cascade: CascadeConfig | None = None,
+    project_id: str | None = None,
+) -> EvaluationResult | None:
     """
     Evaluates the relevance of a submission using LLMs.
 
-    Parameters:
-    - submission: The submission object to be evaluated.
-    - project_prompt: The project's prompt to be used for the evaluation. It's the full context of the task.
+    Without a cascade, a junior evaluation filters out clearly irrelevant posts
+    and the rest get a senior evaluation with the author's profile insights.
+    With a cascade, its tiers run in order and the first one confident enough
+    decides; posts none of them is sure about get the senior evaluation.
 
-    Returns:
-    - evaluation: The evaluation object containing the relevance score and the reasoning.
-    - profile_insights: The profile insights object containing the profile of the author of the submission.
+    For projects whose posts often escalate, the author's profile can be fetched
+    speculatively while the critiques and the first evaluations run. With
+    `project_id`, slow LLM calls are hedged within the project's budget when
+    hedging is enabled. Returns None if the evaluation failed.
     """
+    # Shared by every LLM call below, including the speculative profile analysis
+    with (
+        resilience.deadline(EVALUATION_DEADLINE_SECONDS),
+        hedging.scope(project_id),
+        usage.tags(project_id=project_id, team_name=team_name),
+    ):
+        speculative = None
+        if submission.author is not None and _should_speculate(project_id):
+            speculative = _speculate(submission.author.name, project_prompt)
+
+        try:
+            examples = await asyncio.to_thread(
+                get_critiques,
+                query=submission_to_xml(submission),
+                agent_name="evaluator",
+                project_name=project_name,
+                team_name=team_name,
+            )
+
+            cache_key = _cache_key(submission, project_prompt, examples, cascade)
+            cached = evaluation_cache.get(cache_key)
+
+            if cached is not None:
+                _settle(speculative)
+                decisions["cache"] += 1
+                return cached.model_copy(update={"decided_by": "cache"})
+
+            # Tier verdicts that weren't confident enough, compared with the senior one
+            uncertain: list[tuple[str, ScoredEvaluation]] = []
+            result = await _first_tiers(submission, project_prompt, examples, cascade, project_id, uncertain)
+
+            if result is None:
+                # Uncertain, or relevant according to the junior evaluation: research the author before deciding
+                profile_insights = None
+                if speculative is not None:
+                    try:
+                        profile_insights = await speculative
+                    except Exception as e:
+                        logging.warning(f"Speculative profile fetch failed for u/{submission.author.name}: {e}")
+
+                senior_evaluation = await _timed("senior", _senior_with_profile(submission, project_prompt, examples, profile_insights))
+
+                if senior_evaluation is None:
+                    return None
+
+                for model, scored in uncertain:
+                    tier_agreement.record(submission.id, model, False, scored.is_relevant, senior_evaluation.is_relevant)
+
+                result = EvaluationResult(evaluation=senior_evaluation, profile_insights=profile_insights, decided_by="senior")
+            else:
+                _settle(speculative)
+
+                if result.decided_by in CASCADE_MODELS and random.random() < CASCADE_AUDIT_RATE:
+                    _audit(submission, project_prompt, examples, result)
+        except BaseException:
+            _settle(speculative)
+            raise
+
+        decisions[result.decided_by] += 1
+        _escalations[project_id or ""].append(result.decided_by == "senior")
+        evaluation_cache.set(cache_key, result)
+        return result
+
+
+async def _first_tiers(
+    submission: Submission,
+    project_prompt: str,
+    examples: str,
+    cascade: CascadeConfig | None,
+    project_id: str | None,
+    uncertain: list[tuple[str, ScoredEvaluation]],
+) -> EvaluationResult | None:
+    """
+    Runs the steps before the senior evaluation. Returns their final verdict, or None
+    if the post needs the senior evaluation. Cascade verdicts below their tier's
+    threshold are added to `uncertain`.
+    """
+    if cascade is None or not cascade.tiers:
+        junior_evaluation = await _timed("junior", asyncio.to_thread(_junior, submission, project_prompt, examples, project_id))
 
-    examples = get_critiques(
-        query=submission_to_xml(submission),
-        agent_name="evaluator",
-        project_name=project_name,
-        team_name=team_name,
-    )
+        if junior_evaluation is None:
+            # Nothing retries an answer that parsed to nothing; the senior evaluation decides instead
+            logging.warning(f"Junior evaluation returned nothing for submission {submission.id}, escalating it")
+            return None
+
+        if junior_evaluation.is_relevant is False:
+            # Don't research profiles of irrelevant posts
+            return EvaluationResult(evaluation=junior_evaluation, decided_by="junior")
+
+        return None
+
+    for tier in cascade.tiers:
+        if tier.model not in CASCADE_MODELS:
+            logging.error(f"Skipping unknown cascade model: {tier.model}")
+            continue
+
+        scored = await _timed(tier.model, asyncio.to_thread(_tier_evaluation, tier.model, submission, project_prompt, examples))
+
+        if scored is None:
+            continue
+
+        if scored.confidence >= tier.threshold:
+            return EvaluationResult(
+                evaluation=Evaluation(chain_of_thought=scored.chain_of_thought, is_relevant=scored.is_relevant),
+                decided_by=tier.model,
+            )
+
+        uncertain.append((tier.model, scored))
+
+    return None
+
+
+def _audit(submission: Submission, project_prompt: str, examples: str, result: EvaluationResult) -> None:
+    """
+    Gives a post a cascade tier decided a senior evaluation in the background, to compare their verdicts.
+    """
+    async def audit() -> None:
+        try:
+            senior_evaluation = await _senior_with_profile(submission, project_prompt, examples, None)
+        except Exception as e:
+            logging.warning(f"Cascade audit of submission {submission.id} failed: {e}")
+            return
+
+        if senior_evaluation is not None:
+            tier_agreement.record(submission.id, result.decided_by, True, result.evaluation.is_relevant, senior_evaluation.is_relevant)
+
+    task = asyncio.create_task(audit())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def _senior_with_profile(
+    submission: Submission,
+    project_prompt: str,
+    examples: str,
+    profile_insights: str | None,
+) -> Evaluation | None:
+    if profile_insights is None:
+        # Reads the profile fetched speculatively from disk
+        profile_insights = await asyncio.to_thread(analyze_reddit_user, submission.author.name, project_prompt)
+
+    return await asyncio.to_thread(_senior_evaluation, submission, project_prompt, examples, profile_insights)
 
-    def _junior_evaluation() -> Evaluation | None:
-        llm = gpt_4o()
-
-        structured_llm = llm.with_structured_output(Evaluation)
-
-        # Try up to 3 times before giving up
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                prompt_content = textwrap.dedent(
-                    f"""
-
-                Indulge me in some roleplay, my friend.
-
-                {REASONING_PROMPT}
-                
-                # Context
-                You are a super intelligent junior assistant that helps the senior assistant in filtering Reddit posts for the Boss.
-                You and the senior assistant have the duty of going through Reddit posts and determining if they are relevant to look into for the Boss.
-                You are the first line of defense in filtering out irrelevant posts,
-                with the goal of saving time for the senior assistant,
-                since there are too many posts that are clearly and blatantly irrelevant.
-                It is important to note that because you are a junior assistant,
-                you are expected to make mistakes, and because of this and because we do not want to miss any relevant posts,
-                you will mark only the most obvious irrelevant posts as irrelevant.
-                This means that you should be biased towards marking posts as relevant.
-
-                # Personality and Style
-                You are a very intelligent junior assistant, almost like a mathematician. 
-                You have a very logical approach to concluding whether a post is relevant to the senior assistant.
-                You don't like repeating yourself and redundant text.
-
-                # Project
-                Use the context of the project provided to determine if the post is relevant to the project.
-                {project_prompt}
-
-                # Post
-                This is the post we are evaluating.
-                {submission_to_xml(submission)}
-
-                {critino_prompt(examples)}
-                """
-                )
-                
-                evaluation = structured_llm.invoke(
-                    [HumanMessage(content=prompt_content)]
-                )
-
-                return evaluation  # type: ignore
-            except Exception as e:
-                if attempt == max_retries - 1:  # Last attempt
-                    raise e  # Re-raise the exception if all retries failed
-                continue
-
-    junior_evaluation = _junior_evaluation()
-
-    if junior_evaluation is None:
-        return None, None  # Don't research profiles of irrelevant posts
-
-    if junior_evaluation.is_relevant is False:
-        return junior_evaluation, None  # Don't research profiles of irrelevant posts
-
-    # Do further research before making a final decision
-    profile_insights = analyze_reddit_user(submission.author.name, project_prompt)
-
-    @traceable(name="Senior Evaluation")
-    def _senior_evaluation() -> Evaluation | None:
-        llm = gpt_o3_mini()
-
-        structured_llm = llm.with_structured_output(Evaluation)
-
-        # Try up to 3 times before giving up
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                prompt_content = textwrap.dedent(
-                    f"""
-
-            Indulge me in some roleplay, my friend.
-
-            # Context
-            You are a very intelligent senior assistant that filters Reddit posts for your boss.
-            You have the duty of going through the Reddit posts and determining if they are relevant to look into for your boss.
-
-            {REASONING_PROMPT}
-            
-            # Personality and Style
-            You are a very intelligent assistant, almost like a mathematician. 
-            You have a very logical approach to concluding whether a post is relevant to your boss.
-            You don't like repeating yourself and redundant text.
-
-            # Profile Insights
-            These are the insights we have about the author of the post based on researching his Reddit profile.
-            {profile_insights}
-
-            # Project
-            Use the context of the project provided to determine if the post is relevant to the project.
-            {project_prompt}
-
-            # Post
-            This is the post we are evaluating.
-            {submission_to_xml(submission)}
-
-                        {critino_prompt(examples)}
-                        """
-                )
-                
-                senior_evaluation = structured_llm.invoke(
-                    [HumanMessage(content=prompt_content)]
-                )
-
-                return senior_evaluation  # type: ignore
-            except Exception as e:
-                if attempt == max_retries - 1:  # Last attempt
-                    raise e  # Re-raise the exception if all retries failed
-                continue
-
-    senior_evaluation = _senior_evaluation()
-
-    return senior_evaluation, profile_insights
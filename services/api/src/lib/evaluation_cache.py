@@ -0,0 +1,88 @@
+import hashlib
+import os
+from pathlib import Path
+
+import diskcache as dc
+from pydantic import ValidationError
+
+from src.models import EvaluationResult
+
+current_directory = Path(__file__).resolve().parent
+
+evaluation_cache_filepath = current_directory / "cache" / "evaluations"
+
+# Disk space used by cached evaluations before the least recently used are evicted
+EVALUATION_CACHE_SIZE_MB = int(os.getenv("EVALUATION_CACHE_SIZE_MB", "512"))
+
+# Seconds a cached evaluation stays valid
+EVALUATION_CACHE_MAX_AGE = int(os.getenv("EVALUATION_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EvaluationCache:
+    """
+    Stores finished evaluations by what they were computed from.
+
+    The key hashes the project prompt, the critique examples, the submission
+    (with its author, since the senior evaluation reads their profile) and the
+    models used, so cloned projects and replayed posts reuse the same verdict
+    while any change to the inputs misses.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str = evaluation_cache_filepath,
+        size_limit_mb: int = EVALUATION_CACHE_SIZE_MB,
+        max_age: int = EVALUATION_CACHE_MAX_AGE,
+    ):
+        self.max_age = max_age
+        self._cache = dc.Cache(
+            str(directory),
+            size_limit=size_limit_mb * 1024 * 1024,
+            eviction_policy="least-recently-used",
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(project_prompt: str, examples: str, content: str, model: str) -> str:
+        # The examples are hashed first so they act as a version of the critiques
+        return _sha256("\0".join([_sha256(project_prompt), _sha256(examples), _sha256(content), model]))
+
+    def get(self, key: str) -> EvaluationResult | None:
+        cached = self._cache.get(key)
+
+        if cached is None:
+            self.misses += 1
+            return None
+
+        try:
+            result = EvaluationResult(**cached)
+        except (TypeError, ValidationError):
+            # Stored in an older format, e.g. an (evaluation, profile_insights) tuple
+            self._cache.delete(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return result
+
+    def set(self, key: str, result: EvaluationResult) -> None:
+        self._cache.set(key, result.model_dump(), expire=self.max_age)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "entries": len(self._cache),
+            "size_bytes": self._cache.volume(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+evaluation_cache = EvaluationCache()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Protocol
+
+from praw.models import Submission
+
+# Maximum number of submissions waiting for evaluation before ingestion blocks
+EVALUATION_QUEUE_SIZE = int(os.getenv("EVALUATION_QUEUE_SIZE", "200"))
+
+# Number of submissions evaluated concurrently per process
+EVALUATION_WORKERS = int(os.getenv("EVALUATION_WORKERS", "8"))
+
+
+class SubmissionProcessor(Protocol):
+    def is_running(self) -> bool: ...
+
+    async def process_submission(self, submission: Submission) -> None: ...
+
+
+class StageTimer:
+    """
+    Keeps running timings for a pipeline stage.
+    """
+
+    def __init__(self, window: int = 500):
+        self._recent: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self._recent.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_seconds": self.total / self.count if self.count else 0.0,
+            "recent_avg_seconds": sum(self._recent) / len(self._recent) if self._recent else 0.0,
+            "max_seconds": self.max,
+        }
+
+
+class EvaluationPipeline:
+    """
+    Decouples ingestion from evaluation.
+
+    Ingestion puts submissions on a bounded queue and a fixed number of worker
+    tasks evaluates them. When the queue is full, `submit` waits, which slows
+    the subreddit poller down instead of letting the backlog grow without bound.
+    """
+
+    def __init__(self, queue_size: int = EVALUATION_QUEUE_SIZE, workers: int = EVALUATION_WORKERS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: asyncio.Queue[tuple[SubmissionProcessor, Submission, float]] | None = None
+        self._tasks: list[asyncio.Task] = []
+
+        # Time spent waiting in `submit` because the queue was full
+        self.ingest_wait = StageTimer()
+        # Time submissions spent on the queue before a worker picked them up
+        self.queue_wait = StageTimer()
+        # Time spent evaluating and saving a submission
+        self.evaluation = StageTimer()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+
+        # Created here so the queue belongs to the running event loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"evaluation-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+        logging.info(f"Started evaluation pipeline with {self.workers} workers")
+
+    def ensure_workers(self) -> None:
+        """
+        Replaces worker tasks that have died.
+        """
+        for i, task in enumerate(self._tasks):
+            if task.done():
+                logging.error(f"Evaluation worker {i} died, restarting it")
+                self._tasks[i] = asyncio.create_task(self._run(), name=f"evaluation-worker-{i}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        logging.info("Stopped evaluation pipeline")
+
+    async def submit(self, processor: SubmissionProcessor, submission: Submission) -> None:
+        """
+        Queues a submission for evaluation, waiting while the queue is full.
+        """
+        assert self._queue is not None, "Evaluation pipeline is not started"
+
+        started = time.monotonic()
+        await self._queue.put((processor, submission, time.monotonic()))
+        self.ingest_wait.observe(time.monotonic() - started)
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+
+        while True:
+            processor, submission, queued_at = await self._queue.get()
+            self.queue_wait.observe(time.monotonic() - queued_at)
+
+            try:
+                # The project may have been stopped while the submission was queued
+                if not processor.is_running():
+                    continue
+
+                started = time.monotonic()
+                await processor.process_submission(submission)
+                self.evaluation.observe(time.monotonic() - started)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error processing submission {submission.id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+            "ingest_wait": self.ingest_wait.stats(),
+            "queue_wait": self.queue_wait.stats(),
+            "evaluation": self.evaluation.stats(),
+        }
+
+
+pipeline = EvaluationPipeline()
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import math
+import os
+import time
+from collections import deque
+
+from pydantic import BaseModel
+
+from src.lib.prefilter import tokenize
+from src.models import Evaluation
+
+# Posts at least this similar (share of equal SimHash bits) are near-duplicates
+NEAR_DUPLICATE_SIMILARITY = float(os.getenv("NEAR_DUPLICATE_SIMILARITY", "0.9"))
+
+# Seconds an evaluated post can be matched against
+NEAR_DUPLICATE_WINDOW = int(os.getenv("NEAR_DUPLICATE_WINDOW", "3600"))
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over word shingles. Similar texts get fingerprints that
+    differ in few bits.
+    """
+    tokens = tokenize(text)
+    shingles = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))]
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class FingerprintEntry(BaseModel):
+    project_id: str
+    reddit_id: str
+    author: str
+    fingerprint: int
+    timestamp: float
+    evaluation: Evaluation
+    profile_insights: str | None
+
+
+class NearDuplicateIndex:
+    """
+    Remembers the verdicts of recently evaluated posts by SimHash fingerprint.
+
+    Fingerprints are split into bands: two fingerprints within the allowed
+    Hamming distance must agree on at least one band, so only posts sharing a
+    band are compared. Entries older than the window are dropped.
+    """
+
+    def __init__(self, similarity: float = NEAR_DUPLICATE_SIMILARITY, window: int = NEAR_DUPLICATE_WINDOW):
+        self.window = window
+        self.max_distance = math.floor((1 - similarity) * FINGERPRINT_BITS)
+        self.bands = self.max_distance + 1
+        self._band_bits = math.ceil(FINGERPRINT_BITS / self.bands)
+        self._buckets: dict[tuple[str, int, int], list[FingerprintEntry]] = {}
+        self._entries: deque[FingerprintEntry] = deque()
+        self.hits = 0
+        self.misses = 0
+
+    def _band_keys(self, project_id: str, fingerprint: int) -> list[tuple[str, int, int]]:
+        mask = (1 << self._band_bits) - 1
+        return [
+            (project_id, band, fingerprint >> (band * self._band_bits) & mask)
+            for band in range(self.bands)
+        ]
+
+    def _expire(self, now: float) -> None:
+        while self._entries and now - self._entries[0].timestamp > self.window:
+            entry = self._entries.popleft()
+            for key in self._band_keys(entry.project_id, entry.fingerprint):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                bucket[:] = [other for other in bucket if other is not entry]
+                if not bucket:
+                    del self._buckets[key]
+
+    def find(self, project_id: str, text: str) -> FingerprintEntry | None:
+        """
+        Returns the closest recently evaluated near-duplicate of `text` in the project.
+        """
+        self._expire(time.time())
+        fingerprint = simhash(text)
+
+        best: FingerprintEntry | None = None
+        best_distance = self.max_distance + 1
+
+        for key in self._band_keys(project_id, fingerprint):
+            for entry in self._buckets.get(key, []):
+                distance = hamming_distance(fingerprint, entry.fingerprint)
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+
+        if best is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            logging.info(f"Near-duplicate of {best.reddit_id} found ({best_distance} bits apart)")
+
+        return best
+
+    def add(self, project_id: str, reddit_id: str, author: str, text: str, evaluation: Evaluation, profile_insights: str | None) -> None:
+        now = time.time()
+        self._expire(now)
+
+        entry = FingerprintEntry(
+            project_id=project_id,
+            reddit_id=reddit_id,
+            author=author,
+            fingerprint=simhash(text),
+            timestamp=now,
+            evaluation=evaluation,
+            profile_insights=profile_insights,
+        )
+
+        self._entries.append(entry)
+        for key in self._band_keys(project_id, entry.fingerprint):
+            self._buckets.setdefault(key, []).append(entry)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+near_duplicates = NearDuplicateIndex()
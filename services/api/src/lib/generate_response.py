@@ -1,6 +1,7 @@
-import textwrap
 from dotenv import load_dotenv
+from src.lib import hedging, resilience, usage
 from src.lib.critino import critino_prompt, get_critiques
+from src.lib.prompt_builder import PromptBuilder
 from src.interfaces.db import client
 from src.interfaces.llm import gpt_o1, gpt_4o, gpt_o3_mini, gemini_flash_2
 from src.lib.reddit_profile_analysis import analyze_reddit_user
@@ -10,6 +11,33 @@ from src.models.cot_response import CotResponse
 import json
 
 load_dotenv()
+
+
+def _response_prompt(name: str, task: str) -> PromptBuilder:
+    return PromptBuilder(
+        name,
+        f"""
+        Your job is to:
+        {task}
+        for a Reddit post.
+
+        First, think through your approach step by step, analyzing the post, profile insights, and how to best craft your response.
+        Then provide your final response in JSON format with the following structure:
+        {{
+            "chain_of_thought": "Your step by step reasoning",
+            "response": "Your final response"
+        }}
+        """,
+        project_block="""
+        ### Style ###
+        {style_prompt}
+        """,
+    )
+
+
+dm_prompt = _response_prompt("dm-generator", "write a DM")
+comment_prompt = _response_prompt("comment-generator", "write a comment")
+
     
 def generate_response(submission: SimpleSubmission, team_name: str, project_id: str, is_dm: bool, feedback: str) -> str:
     supabase = client()
@@ -25,8 +53,6 @@ def generate_response(submission: SimpleSubmission, team_name: str, project_id:
     style_prompt = project.data["dm_style_prompt"] if is_dm else project.data["comment_style_prompt"]
     project_prompt = project.data["prompt"]
 
-    llm = gemini_flash_2()
-
     examples = get_critiques(
         team_name=team_name,
         project_name=project_name,
@@ -34,53 +60,27 @@ def generate_response(submission: SimpleSubmission, team_name: str, project_id:
         query=submission_to_xml(submission),
         )
     
-    profile_insights = analyze_reddit_user(submission.author_name, project_prompt)
-
-    feedback_section = f"""
-    ### Feedback ###
-    Please incorporate this feedback into your response:
-    {feedback}
-    
-    ####################
-    """
+    # Booked to the project like the response itself; the analysis tags its calls with stages of its own
+    with hedging.scope(project_id), usage.tags(project_id=project_id, team_name=team_name):
+        profile_insights = analyze_reddit_user(submission.author_name, project_prompt)
 
-    structured_llm = llm.with_structured_output(CotResponse)
-    response = structured_llm.invoke(
-        textwrap.dedent(
-            f"""
-            Your job is to:
-            {"write a DM" if is_dm else "write a comment"}
-            for a Reddit post.
-            
-            ####################
-            
-            ### Style ###
-            {style_prompt}
-            
-            ####################
-            
-            ### Post ###
-            {submission_to_xml(submission)}
+    prompt = dm_prompt if is_dm else comment_prompt
+    messages = prompt.build(
+        f"### Post ###\n{submission_to_xml(submission)}",
+        "### Profile Insights ###\n"
+        "These are the insights we have about the author of the post based on researching his Reddit profile.\n"
+        f"{profile_insights}",
+        f"### Feedback ###\nPlease incorporate this feedback into your response:\n{feedback}" if feedback else "",
+        f"### Examples ###\n{critino_prompt(examples)}",
+        style_prompt=style_prompt or "",
+    )
 
-            ####################
-            
-            ### Profile Insights ###
-            These are the insights we have about the author of the post based on researching his Reddit profile.
-            {profile_insights}
-            
-            ####################
-            {feedback_section}
-            ### Examples ###
-            {critino_prompt(examples)}
-
-            First, think through your approach step by step, analyzing the post, profile insights, and how to best craft your response.
-            Then provide your final response in JSON format with the following structure:
-            {{
-                "chain_of_thought": "Your step by step reasoning",
-                "response": "Your final response"
-            }}
-            """
-        ))
+    with hedging.scope(project_id), usage.tags(project_id=project_id, team_name=team_name, stage="dm-generation" if is_dm else "comment-generation"):
+        response = resilience.invoke(
+            lambda llm: llm.with_structured_output(CotResponse),
+            messages,
+            gemini_flash_2,
+        )
     
     # If the response is a string, try to parse it as JSON
     if isinstance(response, str):
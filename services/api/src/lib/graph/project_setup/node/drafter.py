@@ -2,12 +2,14 @@ from pydantic import BaseModel, Field
 from langchain.prompts import ChatPromptTemplate
 from src.interfaces.llm import gpt_4o, gpt_4o_mini, gpt_o1, gpt_o3_mini
 from src.interfaces.reddit import get_reddit_instance
+from src.lib import resilience, usage
 from src.lib.graph.project_setup.tools.subreddit import Subreddit
 from src.lib.graph.project_setup.tools.web_scraper import web_scraper
 from src.lib.graph.project_setup.tools.subreddit import search_relevant_subreddits
 from src.lib.graph.project_setup.state import Context, ProfileState
 from langchain_core.output_parsers import JsonOutputToolsParser
 from langchain_core.messages import AIMessage
+import asyncio
 import json
 
 class RecommendationOutput(BaseModel):
@@ -17,14 +19,14 @@ class RecommendationOutput(BaseModel):
     
 def get_model_for_mode(mode: str):
     # Always use o3_mini regardless of mode
-    return gpt_o3_mini()
+    return gpt_o3_mini
 
 class Drafter:
     """A class that drafts project recommendations based on the provided context and objective."""
     
     def __init__(self, state: ProfileState):
         """Initialize the drafter with the given state."""
-        self.llm = get_model_for_mode(state.mode)
+        self.model = get_model_for_mode(state.mode)
         self.context = state.context
         self.objective = state.objective
 
@@ -119,8 +121,13 @@ Context: Hyros is an AI-powered ad attribution and optimization platform that he
             ("user", self.context.value)
         ])
         
-        chain = prompt | self.llm.bind_tools([RecommendationOutput], tool_choice="any") | JsonOutputToolsParser(return_id=True)    
-        recommendation = (await chain.ainvoke({}))[0]
+        with usage.tags(stage="drafter"):
+            recommendation = (await asyncio.to_thread(
+                resilience.invoke,
+                lambda llm: prompt | llm.bind_tools([RecommendationOutput], tool_choice="any") | JsonOutputToolsParser(return_id=True),
+                {},
+                self.model,
+            ))[0]
         recommendation["name"] = recommendation["type"]
 
         return AIMessage(
@@ -2,12 +2,14 @@ from pydantic import BaseModel, Field
 from langchain.prompts import ChatPromptTemplate
 from src.interfaces.llm import gpt_o1, gpt_4o, gpt_o3_mini
 from src.interfaces.reddit import get_reddit_instance
+from src.lib import resilience, usage
 from src.lib.graph.project_setup.tools.subreddit import Subreddit
 from src.lib.graph.project_setup.tools.web_scraper import web_scraper
 from src.lib.graph.project_setup.tools.subreddit import search_relevant_subreddits
 from src.lib.graph.project_setup.state import ProfileState, Context
 from langchain_core.output_parsers import JsonOutputToolsParser
 from langchain_core.messages import AIMessage
+import asyncio
 import json, uuid
 import logging
 
@@ -42,13 +44,13 @@ def parse_response(response: dict[str, str], name: str) -> list[AIMessage]:
 
 def get_model_for_mode(mode: str):
     if mode == "advanced":
-        return gpt_o1()
-    return gpt_o3_mini()
+        return gpt_o1
+    return gpt_o3_mini
 
 
 class SubredditRecommender:
     def __init__(self, state: ProfileState):
-        self.llm = get_model_for_mode(state.mode)
+        self.model = get_model_for_mode(state.mode)
         self.context = state.context
         self.objective = state.objective
 
@@ -84,15 +86,19 @@ class SubredditRecommender:
             ]
         )
 
-        chain = (
-            prompt
-            | self.llm.bind_tools(
-                [search_relevant_subreddits, SubredditRecommendationOutput],
-                tool_choice="any",
+        def chain(llm):
+            return (
+                prompt
+                | llm.bind_tools(
+                    [search_relevant_subreddits, SubredditRecommendationOutput],
+                    tool_choice="any",
+                )
+                | JsonOutputToolsParser(return_id=True)
             )
-            | JsonOutputToolsParser(return_id=True)
-        )
-        recommendation = await chain.ainvoke({})
+
+        # Retried and failed over like every other LLM call
+        with usage.tags(stage="recommender"):
+            recommendation = await asyncio.to_thread(resilience.invoke, chain, {}, self.model)
 
         result = parse_response(
             response=recommendation[0], name="subreddit_recommender"
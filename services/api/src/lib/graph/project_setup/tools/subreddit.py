@@ -20,13 +20,15 @@ class Subreddit(BaseModel):
 @tool
 def search_relevant_subreddits(queries: list[str]) -> list[Subreddit]:
     """Get relevant subreddits for a product/service"""
-    reddit = reddit.get_reddit_instance()
+    client = reddit.get_reddit_instance()
     
     subredditss = []
     
-    for query in queries:
-        subreddits = list(reddit.subreddits.search(query))[:10]
-        subredditss.extend([Subreddit(name=subreddit.display_name, description=subreddit.public_description) for subreddit in subreddits])
+    # Someone is waiting on the project setup, so these go before background scraping
+    with reddit.reddit_priority(reddit.Priority.INTERACTIVE):
+        for query in queries:
+            subreddits = list(client.subreddits.search(query, limit=10))
+            subredditss.extend([Subreddit(name=subreddit.display_name, description=subreddit.public_description) for subreddit in subreddits])
     
     return subredditss
 
@@ -1,14 +1,28 @@
-import requests
+import asyncio
+
 from bs4 import BeautifulSoup
 
-def web_scraper(url: str) -> str:
+from src.interfaces import http
+
+# Seconds a website may take to answer
+WEB_SCRAPER_TIMEOUT = 20
+
+# Most of a page that is read; enough for the text of any landing page
+WEB_SCRAPER_MAX_BYTES = 2 * 1024 * 1024
+
+
+def _page_text(html: str) -> str:
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.get_text().replace("\n\n\n", " ")
+
+
+async def aweb_scraper(url: str) -> str:
     """Scrape website content using BeautifulSoup"""
-    try:
-        response = requests.get(url)
-        html = response.text
-        soup = BeautifulSoup(html, 'html.parser')
-        return soup.get_text().replace("\n\n\n", " ")
-    except Exception as e:
-        raise e
-
-        
+    response = await http.get(url, timeout=WEB_SCRAPER_TIMEOUT, max_bytes=WEB_SCRAPER_MAX_BYTES, truncate=True)
+    return await asyncio.to_thread(_page_text, response.text)
+
+
+def web_scraper(url: str) -> str:
+    """Scrape website content using BeautifulSoup, from a thread"""
+    response = http.get_sync(url, timeout=WEB_SCRAPER_TIMEOUT, max_bytes=WEB_SCRAPER_MAX_BYTES, truncate=True)
+    return _page_text(response.text)
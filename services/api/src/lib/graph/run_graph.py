@@ -1,6 +1,6 @@
 from src.lib.graph.project_setup import ProfileGraph
 from src.lib.graph.project_setup.state import ProfileState, Context
-from src.lib.graph.project_setup.tools.web_scraper import web_scraper
+from src.lib.graph.project_setup.tools.web_scraper import aweb_scraper
 from src.lib.graph.project_setup.node.drafter import RecommendationOutput
 import json
 
@@ -11,7 +11,7 @@ async def run():
     )
 
     if context.type == "link":
-        context.value = f"# URL: \n{context.value}" + f"## URL DATA: \n{web_scraper(context.value)}"
+        context.value = f"# URL: \n{context.value}" + f"## URL DATA: \n{await aweb_scraper(context.value)}"
     
     initial_state = ProfileState(
         context=context,
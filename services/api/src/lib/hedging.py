@@ -0,0 +1,196 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Send a duplicate of slow LLM calls to another provider, for the projects' evaluations and responses
+HEDGING = os.getenv("HEDGING", "false").lower() == "true"
+
+# Percentile of a model's recent latencies after which a call is hedged
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+
+# Seconds waited before hedging a model without enough latency samples yet
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "20"))
+HEDGE_MIN_SAMPLES = 20
+
+# Most hedges per call of a project, which bounds the extra spend
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+
+# LLM calls running at once in the hedging threads
+HEDGE_THREADS = int(os.getenv("HEDGE_THREADS", "32"))
+
+# Project the current LLM calls are made for
+_project: contextvars.ContextVar[str | None] = contextvars.ContextVar("hedging_project", default=None)
+
+
+@contextlib.contextmanager
+def scope(project_id: str | None) -> Iterator[None]:
+    """
+    Hedges the LLM calls made inside for the project, if hedging is enabled.
+    """
+    token = _project.set(project_id)
+
+    try:
+        yield
+    finally:
+        _project.reset(token)
+
+
+def active() -> bool:
+    return HEDGING and _project.get() is not None
+
+
+class LatencyTracker:
+    """
+    Recent latencies of each model.
+    """
+
+    def __init__(self, window: int = 500):
+        self._recent: defaultdict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._recent[model].append(seconds)
+
+    def percentile(self, model: str, percentile: float) -> float | None:
+        with self._lock:
+            recent = sorted(self._recent[model])
+
+        if len(recent) < HEDGE_MIN_SAMPLES:
+            return None
+
+        return recent[min(int(len(recent) * percentile / 100), len(recent) - 1)]
+
+
+class Hedger:
+    """
+    Races a slow LLM call against a duplicate on another provider.
+
+    The call runs alone until it takes longer than the model's latency
+    percentile, then the duplicate is sent and whichever answers first wins.
+    Each project may hedge at most `max_ratio` of its calls.
+
+    The clients are synchronous, so a losing request that is already in flight
+    can't be aborted; its answer is dropped. Duplicates that haven't started
+    yet are cancelled.
+    """
+
+    def __init__(
+        self,
+        percentile: float = HEDGE_PERCENTILE,
+        default_delay: float = HEDGE_DEFAULT_DELAY,
+        max_ratio: float = HEDGE_MAX_RATIO,
+        threads: int = HEDGE_THREADS,
+    ):
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.max_ratio = max_ratio
+        self.latencies = LatencyTracker()
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._calls: defaultdict[str, int] = defaultdict(int)
+        self._hedges: defaultdict[str, int] = defaultdict(int)
+        self.fired = 0
+        self.won = 0
+        self.capped = 0
+
+    def delay(self, model: str) -> float:
+        delay = self.latencies.percentile(model, self.percentile)
+        return self.default_delay if delay is None else delay
+
+    def _within_budget(self, project_id: str) -> bool:
+        with self._lock:
+            if self._hedges[project_id] + 1 > self._calls[project_id] * self.max_ratio:
+                self.capped += 1
+                return False
+
+            self._hedges[project_id] += 1
+            self.fired += 1
+            return True
+
+    def _refund(self, project_id: str) -> None:
+        with self._lock:
+            self._hedges[project_id] -= 1
+            self.fired -= 1
+
+    def _submit(self, model: str, call: Callable[[], T]) -> Future:
+        def timed() -> T:
+            started = time.monotonic()
+            result = call()
+            self.latencies.observe(model, time.monotonic() - started)
+            return result
+
+        # Keeps the caller's deadline and tracing context
+        return self._pool.submit(contextvars.copy_context().run, timed)
+
+    def call(
+        self,
+        model: str,
+        primary: Callable[[], T],
+        alternate: str,
+        hedge: Callable[[], T],
+        may_hedge: Callable[[], bool] = lambda: True,
+        on_cancelled: Callable[[bool], None] = lambda hedge: None,
+    ) -> tuple[T, bool]:
+        """
+        Returns the first answer, and whether it came from the hedge.
+
+        `may_hedge` is only asked once the project's budget allows a hedge.
+        `on_cancelled` is called for a call that was cancelled before it
+        started, with whether it was the hedge.
+        """
+        project_id = _project.get() or ""
+        with self._lock:
+            self._calls[project_id] += 1
+
+        first = self._submit(model, primary)
+        done, _ = wait([first], timeout=self.delay(model))
+
+        if done or not self._within_budget(project_id):
+            return first.result(), False
+
+        if not may_hedge():
+            self._refund(project_id)
+            return first.result(), False
+
+        second = self._submit(alternate, hedge)
+        pending = {first, second}
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in (first, second):
+                if future in done and future.exception() is None:
+                    for loser in pending:
+                        if loser.cancel():
+                            on_cancelled(loser is second)
+
+                    won = future is second
+                    if won:
+                        with self._lock:
+                            self.won += 1
+
+                    return future.result(), won
+
+        # Both failed; the primary's error is the one to report
+        return first.result(), False
+
+    def stats(self) -> dict:
+        return {
+            "enabled": HEDGING,
+            "fired": self.fired,
+            "won": self.won,
+            "win_rate": self.won / self.fired if self.fired else 0.0,
+            "capped": self.capped,
+            "calls": sum(self._calls.values()),
+        }
+
+
+hedger = Hedger()
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _Batch(Generic[T, R]):
+    def __init__(self):
+        self.items: list[tuple[T, Future[R]]] = []
+        self.full = threading.Event()
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Groups calls made from different threads into batches.
+
+    Items submitted under the same key within the window (or until the batch
+    is full) are handed to `run_batch` together. The first caller of a batch
+    waits for it to fill and runs it; the others wait for their result.
+    `run_batch` returns one result per item, in order, where an exception
+    is raised to that item's caller only.
+    """
+
+    def __init__(self, run_batch: Callable[[Hashable, list[T]], list[R | BaseException]], window_ms: int, batch_size: int):
+        self.run_batch = run_batch
+        self.window = window_ms / 1000
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: dict[Hashable, _Batch[T, R]] = {}
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, key: Hashable, item: T) -> R:
+        future: Future[R] = Future()
+
+        with self._lock:
+            batch = self._pending.get(key)
+            leader = batch is None
+
+            if batch is None:
+                batch = self._pending[key] = _Batch()
+
+            batch.items.append((item, future))
+
+            # Later callers start a new batch
+            if len(batch.items) >= self.batch_size:
+                del self._pending[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+
+            self._run(key, batch)
+
+        return future.result()
+
+    def _run(self, key: Hashable, batch: _Batch[T, R]) -> None:
+        items = [item for item, _ in batch.items]
+        self.batches += 1
+        self.items += len(items)
+
+        try:
+            results = self.run_batch(key, items)
+            if len(results) != len(items):
+                raise ValueError(f"Batch returned {len(results)} results for {len(items)} items")
+        except BaseException as e:
+            results = [e] * len(items)
+
+        for (_, future), result in zip(batch.items, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
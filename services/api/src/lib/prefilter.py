@@ -0,0 +1,201 @@
+import re
+import zlib
+from collections import Counter
+from typing import Protocol
+
+import numpy as np
+from praw.models import Submission
+
+from src.models.prefilter import PrefilterConfig
+from src.models.simple_submission import SimpleSubmission
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Size of the hashed bag-of-words vectors
+HASH_DIMENSIONS = 2**14
+
+# Rejections per reason since the process started
+rejections: Counter[str] = Counter()
+
+
+def submission_text(submission: Submission | SimpleSubmission) -> str:
+    return f"{submission.title}\n{submission.selftext}"
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def hashed_terms(text: str, dimensions: int = HASH_DIMENSIONS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The text's L2-normalised hashed term counts as a sparse vector: its non-zero indices and their weights.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+    hashed = np.fromiter((zlib.crc32(token.encode()) % dimensions for token in tokens), dtype=np.int32)
+    indices, counts = np.unique(hashed, return_counts=True)
+    weights = counts.astype(np.float32)
+    return indices, weights / np.linalg.norm(weights)
+
+
+def hashed_bag_of_words(texts: list[str], dimensions: int = HASH_DIMENSIONS) -> np.ndarray:
+    """
+    Vectorises texts into L2-normalised hashed term counts, one row per text.
+    """
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+
+    for row, text in enumerate(texts):
+        tokens = tokenize(text)
+        if not tokens:
+            continue
+        indices = np.fromiter((zlib.crc32(token.encode()) % dimensions for token in tokens), dtype=np.int64)
+        vectors[row] = np.bincount(indices, minlength=dimensions)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class PrefilterStage(Protocol):
+    name: str
+
+    def check(self, submission: Submission) -> str | None:
+        """Returns the reason to reject the submission, or None to let it through."""
+        ...
+
+
+class DeletedStage:
+    name = "deleted"
+
+    def check(self, submission: Submission) -> str | None:
+        if submission.author is None:
+            return "author is deleted"
+
+        if submission.selftext in ("[deleted]", "[removed]"):
+            return f"post is {submission.selftext.strip('[]')}"
+
+        if getattr(submission, "removed_by_category", None):
+            return f"post was removed ({submission.removed_by_category})"
+
+        return None
+
+
+class LengthStage:
+    name = "length"
+
+    def __init__(self, min_length: int, max_length: int | None):
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def check(self, submission: Submission) -> str | None:
+        length = len(submission.title) + len(submission.selftext)
+
+        if length < self.min_length:
+            return f"too short ({length} < {self.min_length} characters)"
+
+        if self.max_length is not None and length > self.max_length:
+            return f"too long ({length} > {self.max_length} characters)"
+
+        return None
+
+
+class PatternStage:
+    """
+    Keyword and regex include/exclude rules. Keywords match whole words, case-insensitively.
+    """
+
+    name = "pattern"
+
+    def __init__(self, include_keywords: list[str], exclude_keywords: list[str], include_patterns: list[str], exclude_patterns: list[str]):
+        self.include = self._compile(include_keywords, include_patterns)
+        self.exclude = self._compile(exclude_keywords, exclude_patterns)
+
+    @staticmethod
+    def _compile(keywords: list[str], patterns: list[str]) -> re.Pattern | None:
+        alternatives = [rf"\b{re.escape(keyword)}\b" for keyword in keywords] + [f"(?:{pattern})" for pattern in patterns]
+
+        if not alternatives:
+            return None
+
+        return re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def check(self, submission: Submission) -> str | None:
+        text = submission_text(submission)
+
+        if self.exclude is not None and (match := self.exclude.search(text)):
+            return f"matches excluded term '{match.group(0)}'"
+
+        if self.include is not None and not self.include.search(text):
+            return "matches none of the included terms"
+
+        return None
+
+
+class BagOfWordsStage:
+    """
+    Rejects posts whose vocabulary barely overlaps with the project prompt.
+    """
+
+    name = "bag_of_words"
+
+    def __init__(self, reference: str, min_score: float):
+        self.min_score = min_score
+        self.reference = hashed_bag_of_words([reference])[0]
+
+    def scores(self, texts: list[str]) -> np.ndarray:
+        return hashed_bag_of_words(texts) @ self.reference
+
+    def check(self, submission: Submission) -> str | None:
+        score = float(self.scores([submission_text(submission)])[0])
+
+        if score < self.min_score:
+            return f"bag-of-words score {score:.3f} below {self.min_score}"
+
+        return None
+
+
+class Prefilter:
+    """
+    Runs a chain of cheap local stages before a submission is sent to the LLM.
+
+    Stages are tried in order and the first rejection wins. Extra stages can be
+    appended to `stages` to plug in new rules.
+    """
+
+    def __init__(self, stages: list[PrefilterStage]):
+        self.stages = stages
+
+    @classmethod
+    def for_project(cls, config: PrefilterConfig | None, project_prompt: str) -> "Prefilter":
+        config = config or PrefilterConfig()
+        stages: list[PrefilterStage] = []
+
+        if config.reject_deleted:
+            stages.append(DeletedStage())
+
+        if config.min_length > 0 or config.max_length is not None:
+            stages.append(LengthStage(config.min_length, config.max_length))
+
+        if config.include_keywords or config.exclude_keywords or config.include_patterns or config.exclude_patterns:
+            stages.append(
+                PatternStage(config.include_keywords, config.exclude_keywords, config.include_patterns, config.exclude_patterns)
+            )
+
+        if config.min_score > 0:
+            stages.append(BagOfWordsStage(project_prompt, config.min_score))
+
+        return cls(stages)
+
+    def check(self, submission: Submission) -> str | None:
+        """
+        Returns the reason the submission was rejected, or None if it should be evaluated.
+        """
+        for stage in self.stages:
+            reason = stage.check(submission)
+
+            if reason is not None:
+                rejections[stage.name] += 1
+                return f"{stage.name}: {reason}"
+
+        return None
@@ -0,0 +1,94 @@
+import functools
+import hashlib
+import textwrap
+import threading
+
+import tiktoken
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+# Providers only cache prompt prefixes of at least this many tokens
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+# Projects (or authors) whose assembled prefix is kept per agent
+PREFIX_CACHE_SIZE = 256
+
+@functools.cache
+def _encoding() -> tiktoken.Encoding:
+    # Loaded on first use, since tiktoken may have to download it
+    return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text, disallowed_special=()))
+
+
+class PromptBuilder:
+    """
+    Assembles an agent's prompt as its static instructions, then the
+    project-scoped block, then the per-item part.
+
+    Providers cache the longest prefix a prompt shares with recent ones, so
+    everything that changes per post (the post itself, critique examples,
+    profile insights) goes last, in the user message. The system message of
+    a project is assembled once and reused byte for byte.
+    """
+
+    def __init__(self, name: str, *instructions: str, project_block: str = ""):
+        self.name = name
+        # Sections are dedented one by one, since interpolated text breaks a common indent
+        self.instructions = "\n\n".join(textwrap.dedent(section).strip() for section in instructions)
+        self.project_block = textwrap.dedent(project_block).strip()
+        # Changes whenever the static part of the prompt does
+        self.version = hashlib.sha256(f"{self.instructions}\0{self.project_block}".encode()).hexdigest()[:12]
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.cacheable_builds = 0
+        self.prefix_tokens = 0
+        self._prefix = functools.lru_cache(maxsize=PREFIX_CACHE_SIZE)(self._assemble)
+        builders[name] = self
+
+    def _assemble(self, project: tuple[tuple[str, str], ...]) -> tuple[str, int]:
+        block = self.project_block.format(**dict(project)) if self.project_block else ""
+        prefix = f"{self.instructions}\n\n{block}".strip()
+        return prefix, count_tokens(prefix)
+
+    def prefix(self, **project: str) -> str:
+        return self._prefix(tuple(sorted(project.items())))[0]
+
+    def build(self, *item: str, **project: str) -> list[BaseMessage]:
+        """
+        The messages for one item, made of the given sections. `project` fills the project block's fields.
+        """
+        prefix, tokens = self._prefix(tuple(sorted(project.items())))
+
+        with self._lock:
+            self.builds += 1
+            self.prefix_tokens += tokens
+            if tokens >= PROMPT_CACHE_MIN_TOKENS:
+                self.cacheable_builds += 1
+
+        messages: list[BaseMessage] = [SystemMessage(content=prefix)]
+
+        sections = [section.strip() for section in item if section.strip()]
+
+        if sections:
+            messages.append(HumanMessage(content="\n\n".join(sections)))
+
+        return messages
+
+    def stats(self) -> dict:
+        cache = self._prefix.cache_info()
+
+        return {
+            "builds": self.builds,
+            "avg_prefix_tokens": self.prefix_tokens / self.builds if self.builds else 0.0,
+            "cacheable_builds": self.cacheable_builds,
+            "memoised_prefixes": cache.currsize,
+        }
+
+
+builders: dict[str, PromptBuilder] = {}
+
+
+def stats() -> dict:
+    return {name: builder.stats() for name, builder in builders.items()}
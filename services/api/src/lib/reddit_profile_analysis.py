@@ -10,7 +10,8 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from src.interfaces.llm import gpt_4o, gpt_4o_mini, gpt_o3_mini, openrouter_r1
 from src.lib.scrape_reddit_profile import format_profile_for_llm, get_reddit_profile
 from src.models.profile import RedditUserProfile
-from src.lib.chain_utils import retry_chain_invoke
+from src.lib import resilience, usage
+from src.lib.prompt_builder import PromptBuilder
 from langchain_core.runnables import RunnableConfig
 
 class State(BaseModel):
@@ -67,17 +68,38 @@ You are a specialized OSINT (Open-Source Intelligence) agent tasked with analyzi
 - Identify any other patterns that could inform user profiling for sales or marketing.
 """
 
+# The profile data is the same for every step of an author's analysis, so it's part of the prefix
+analysis_prompt = PromptBuilder(
+    "profile-analysis",
+    osint_agent_prompt,
+    project_block="""
+    # Profile Data
+    {profile}
+    """,
+)
+
+summary_prompt = PromptBuilder(
+    "profile-summary",
+    "Based on the analysis, create a final summary of insights about the user.",
+    """
+    You should format your response as HTML, not markdown.
+    Your response might look like this:
+    <h1>Profile Insights</h1>
+    <h2>Basic Information</h2>
+    <ul>
+       <li><strong>Username:</strong> DesignTechAI</li>
+       <li><strong>Karma:</strong> 42 (Comment Karma: 12, Post Karma: 30)</li>
+       <li><strong>Account Creation:</strong> March 2023</li>
+    </ul>
+    """,
+)
+
 @traceable(name="Generate Insights")
 def generate_insights(state: State):
-    llm = gpt_4o()
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", osint_agent_prompt),
-        ("system", f"# Profile Data\n{format_profile_for_llm(state.profile)}"),
-    ])
-    
-    chain = prompt | llm
+    messages = analysis_prompt.build(profile=format_profile_for_llm(state.profile))
     
-    response = chain.invoke({})
+    with usage.tags(stage="profile-generate"):
+        response = resilience.invoke(lambda llm: llm, messages, gpt_4o)
     
     return {
         "messages": [response],
@@ -85,17 +107,14 @@ def generate_insights(state: State):
 
 @traceable(name="Reflect Insights")
 def reflect(state: State):
-    llm = gpt_4o()
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", osint_agent_prompt),
-        ("system", "Review the previous analysis and provide critique and additional insights."),
-        ("system", f"Last analysis: {state.messages[-1].content}"),
-        ("system", f"# Profile Data\n{format_profile_for_llm(state.profile)}"),
-    ])
-    
-    chain = prompt | llm
+    messages = analysis_prompt.build(
+        "Review the previous analysis and provide critique and additional insights.",
+        f"Last analysis: {state.messages[-1].content}",
+        profile=format_profile_for_llm(state.profile),
+    )
     
-    response = chain.invoke({})
+    with usage.tags(stage="profile-reflect"):
+        response = resilience.invoke(lambda llm: llm, messages, gpt_4o)
     
     return {
         "messages": [response],
@@ -103,35 +122,10 @@ def reflect(state: State):
 
 @traceable(name="Summarize Insights")
 def summarize(state: State):
-    llm = gpt_4o()
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "Based on the analysis, create a final summary of insights about the user."),
-        ("system", f"Last analysis: {str(state.messages[-1].content).replace('{', '{{').replace('}', '}}')}"),
-        ("system", """
-         You should format your response as HTML, not markdown.
-         Your response might look like this:
-         <h1>Profile Insights</h1>
-         <h2>Basic Information</h2>
-         <ul>
-            <li><strong>Username:</strong> DesignTechAI</li>
-            <li><strong>Karma:</strong> 42 (Comment Karma: 12, Post Karma: 30)</li>
-            <li><strong>Account Creation:</strong> March 2023</li>
-         </ul>
-         """)
-    ])
-    
-    chain = prompt | llm
+    messages = summary_prompt.build(f"Last analysis: {state.messages[-1].content}")
     
-    # Try up to 3 times before giving up
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            response = chain.invoke({})
-            break
-        except Exception as e:
-            if attempt == max_retries - 1:  # Last attempt
-                raise e  # Re-raise the exception if all retries failed
-            continue
+    with usage.tags(stage="summarize"):
+        response = resilience.invoke(lambda llm: llm, messages, gpt_4o)
     
     return {
         "profile_insights": response.content
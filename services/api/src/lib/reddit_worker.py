@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 import json
 from pprint import pprint
@@ -13,13 +14,19 @@ import time
 from pathlib import Path
 
 from src.interfaces import db
-from supabase import Client, create_client
+from supabase import AsyncClient
 
 from src.models.project import Project
 from src.models import SavedSubmission
-from src.lib.evaluate_relevance import evaluate_submission
+from src.lib.evaluate_relevance import aevaluate_submission
+from src.lib.author_index import author_index
+from src.lib.prefilter import Prefilter
+from src.lib.fingerprint import near_duplicates
+from src.lib.xml_utils import submission_to_xml
+from src.lib.submission_writer import submission_batcher
+from src.lib.checkpoints import checkpoints
+from src.lib.subreddit_stream import normalize_subreddit
 from src.models import Evaluation
-from src.interfaces.reddit import get_subreddits
 
 load_dotenv()
 
@@ -37,141 +44,180 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 class RedditStreamWorker:
     def __init__(self, project: Project, team_name: str):
         self._running = False
+        # Set once stopped, so tasks waiting on the worker's input wake up
+        self.stopped = asyncio.Event()
         self.profile_id = project.profile_id
         self.project = project
-        self.subreddits = get_subreddits(project.subreddits)
-        self.supabase: Client = db.client()
+        self.supabase: AsyncClient | None = None
         self.team_name = team_name
+        self.prefilter = Prefilter.for_project(project.prefilter, project.prompt)
         logging.info(f"Initialized RedditStreamWorker for project: {self.project.id}")
 
-    def start(self):
+    async def start(self):
+        self.supabase = await db.async_client()
         self._running = True
+        self.stopped.clear()
         logging.info(f"Starting RedditStreamWorker for project: {self.project.id}")
+
+    def is_running(self) -> bool:
+        return self._running
+
+    async def should_evaluate(self, submission: Submission) -> bool:
+        """
+        Cheap local checks run before a submission is queued for evaluation.
+        """
+        # Skip if not a submission (for typing)
+        if not isinstance(submission, Submission):
+            logging.info(f"Skipping non-submission object: {submission}")
+            return False
+
+        # Avoid repeating posts using caching
+        if cache.get(self.project.id+submission.id):
+            logging.info(f"Skipping cached submission: {submission.id}")
+            return False
+
+        # Check for recent submissions from same author
+        author_name = submission.author.name if submission.author else "deleted"
+
+        if author_index.seen_recently(self.project.id, author_name, submission.created_utc):
+            logging.info(f"Skipping submission from author {author_name} - posted within 5 minutes of previous submission")
+            return False
+
+        rejection = self.prefilter.check(submission)
+
+        if rejection is not None:
+            logging.info(f"Pre-filter rejected submission {submission.id}: {rejection}")
+            await self.record_rejection(submission, rejection)
+            return False
+
+        return True
+
+    async def record_rejection(self, submission: Submission, reason: str):
+        """
+        Saves a submission rejected before evaluation as irrelevant, without charging a credit.
+        """
+        saved_submission = SavedSubmission(
+            author=submission.author.name if submission.author else "deleted",
+            submission_created_utc= datetime.fromtimestamp(submission.created_utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            reddit_id=submission.id,
+            subreddit=submission.subreddit.display_name,
+            title=submission.title,
+            selftext=submission.selftext,
+            url=submission.url,
+            is_relevant=False,
+            reasoning=f"Rejected by pre-filter ({reason})",
+            profile_insights=None,
+            decided_by="prefilter",
+        )
+
+        await submission_batcher.add(
+            {
+                "profile_id": self.profile_id,
+                "project_id": self.project.id,
+                **saved_submission.dict(),
+                "profile_insights": "",
+            },
+            charge=False,
+            on_saved=lambda: self.mark_seen(submission, saved_submission.author),
+        )
+
+    def mark_seen(self, submission: Submission, author_name: str) -> None:
+        """
+        Caches a submission as handled. Only done once its row is saved, so a lost batch is evaluated again.
+        """
+        cache.set(self.project.id+submission.id, {
+            'id': submission.id,
+            'author': author_name,
+            'timestamp': submission.created_utc
+        })
+
+    async def process_submission(self, submission: Submission):
+        try:
+            await self._process_submission(submission)
+        finally:
+            # Handled either way, so a restart won't evaluate it again
+            checkpoints.complete(self.project.id, normalize_subreddit(submission.subreddit.display_name), submission)
+
+    async def _process_submission(self, submission: Submission):
+        logging.info(f"Processing submission: {submission.id}")
+
+        current_time = submission.created_utc
+        author_name = submission.author.name if submission.author else "deleted"
+
+        # Cross-posts and quick reposts of an already evaluated post
+        text = submission_to_xml(submission)
+        duplicate = near_duplicates.find(self.project.id, text)
+
+        # LLM calls already retry and fail over, so a post that still fails isn't evaluated again
+        try:
+            if duplicate is not None:
+                # Reuse the verdict of the earlier copy instead of calling the LLM again
+                evaluation = Evaluation(
+                    chain_of_thought=f"Near-duplicate of {duplicate.reddit_id}.\n{duplicate.evaluation.chain_of_thought}",
+                    is_relevant=duplicate.evaluation.is_relevant,
+                )
+                profile_insights = duplicate.profile_insights if duplicate.author == author_name else None
+                decided_by = "near_duplicate"
+            else:
+                result = await aevaluate_submission(
+                    submission=submission,
+                    project_prompt=self.project.prompt,
+                    team_name=self.team_name,
+                    project_name=self.project.title,
+                    cascade=self.project.cascade,
+                    project_id=self.project.id,
+                )
+
+                if result is None:
+                    raise ValueError("Evaluation returned nothing")
+
+                evaluation, profile_insights, decided_by = result.evaluation, result.profile_insights, result.decided_by
+                near_duplicates.add(self.project.id, submission.id, author_name, text, evaluation, profile_insights)
+
+            saved_submission = SavedSubmission(
+                author=submission.author.name,
+                submission_created_utc= datetime.fromtimestamp(submission.created_utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                reddit_id=submission.id,
+                subreddit=submission.subreddit.display_name,
+                title=submission.title,
+                selftext=submission.selftext,
+                url=submission.url,
+                is_relevant=evaluation.is_relevant,
+                reasoning=evaluation.chain_of_thought,
+                profile_insights=profile_insights,
+                decided_by=decided_by,
+            )
+
+            # Written in bulk; duplicates are ignored by the (project_id, url) conflict target
+            await submission_batcher.add(
+                {
+                    "profile_id": self.profile_id,
+                    "project_id": self.project.id,
+                    **saved_submission.dict(),
+                    "is_relevant": evaluation.is_relevant,
+                    "profile_insights": profile_insights or "",
+                },
+                # Verdicts reused from an earlier post cost no LLM call, so they aren't charged either
+                charge=decided_by not in ("near_duplicate", "cache"),
+                on_saved=lambda: self.mark_seen(submission, author_name),
+            )
+
+            author_index.record(self.project.id, author_name, current_time)
+        except Exception as e:
+            logging.error(f"Failed to process submission {submission.id}: {str(e)}")
         
-        while self._running:
-            for submission in self.subreddits.stream.submissions():
-                logging.info(f"Processing submission: {submission.id}")
-
-                # Skip if not a submission (for typing)
-                if not isinstance(submission, Submission):
-                    logging.info(f"Skipping non-submission object: {submission}")
-                    continue
-
-                # Avoid repeating posts using caching
-                is_cached = cache.get(self.project.id+submission.id)
-                
-                # Check for recent submissions from same author
-                current_time = submission.created_utc
-                author_name = submission.author.name if submission.author else "deleted"
-                
-                # Check all cached submissions for recent ones from same author
-                for key in cache.iterkeys():
-                    if str(key).startswith(self.project.id):
-                        cached_data = cache.get(key)
-                        if isinstance(cached_data, dict):
-                            if (cached_data['author'] == author_name and 
-                                current_time - cached_data['timestamp'] < 300):  # 600 seconds = 10 minutes
-                                logging.info(f"Skipping submission from author {author_name} - posted within 5 minutes of previous submission")
-                                continue
-
-                if is_cached:
-                    logging.info(f"Skipping cached submission: {submission.id}")
-                    continue
-                
-                max_retries = 3
-                retry_count = 0
-                
-                while retry_count < max_retries:
-                    try:
-                        if retry_count > 0:
-                            logging.info(f"Retry attempt {retry_count} for submission {submission.id}")
-                            time.sleep(1)  # Wait 1 second between retries
-                            
-                        evaluation, profile_insights = evaluate_submission(
-                            submission=submission,
-                            project_prompt=self.project.prompt,
-                            team_name=self.team_name,
-                            project_name=self.project.title,
-                        )
-
-                        if evaluation is None:
-                            logging.error(f"Error evaluating submission: {submission.id}")
-                            retry_count += 1
-                            continue
-                        
-                        saved_submission = SavedSubmission(
-                            author=submission.author.name,
-                            submission_created_utc= datetime.fromtimestamp(submission.created_utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                            reddit_id=submission.id,
-                            subreddit=submission.subreddit.display_name,
-                            title=submission.title,
-                            selftext=submission.selftext,
-                            url=submission.url,
-                            is_relevant=evaluation.is_relevant,
-                            reasoning=evaluation.chain_of_thought,
-                            profile_insights=profile_insights,
-                        )
-                        
-                        # Check if submission already exists
-                        existing_submission = self.supabase.table("submissions").select("*").eq("url", saved_submission.url).eq("project_id", self.project.id).execute()
-                        
-                        if len(existing_submission.data) > 0:
-                            logging.info(f"Submission already exists: {saved_submission.url}")
-                            break  # No need to retry if submission exists
-
-                        self.supabase.table("submissions").insert(
-                            {
-                                "profile_id": self.profile_id,
-                                "project_id": self.project.id,
-                                **saved_submission.dict(),
-                                "is_relevant": evaluation.is_relevant,
-                                "profile_insights": profile_insights or "",
-                            }
-                        ).execute()
-                        
-                        logging.info(f"Inserted new submission: {submission.id}")
-                        
-                        # Store submission data in cache
-                        cache.set(self.project.id+submission.id, {
-                            'id': submission.id,
-                            'author': author_name,
-                            'timestamp': current_time
-                        })
-                        
-                        # Update credits atomically using a direct decrement operation
-                        try:
-                            credits_update = self.supabase.rpc(
-                                'decrement_credits',
-                                {'user_id': self.profile_id}
-                            ).execute()
-                            
-                            if not credits_update.data:
-                                logging.error("No response data from credits update")
-                                break  # Don't retry credit updates
-                                
-                            if len(credits_update.data) > 0 and credits_update.data[0].get('remaining_credits', 0) <= 0:
-                                logging.info(f"No credits remaining for user: {self.profile_id}.")
-                                self.stop()
-                                return  # Exit the entire process if no credits
-                                
-                        except Exception as e:
-                            logging.error(f"Error updating credits: {str(e)}")
-                            break  # Don't retry credit updates
-                        
-                        break  # If we get here, everything succeeded, so break the retry loop
-                    
-                    except Exception as e:
-                        retry_count += 1
-                        if retry_count == max_retries:
-                            logging.error(f"Failed to process submission {submission.id} after {max_retries} attempts. Final error: {str(e)}")
-                        else:
-                            logging.warning(f"Error processing submission {submission.id} (attempt {retry_count}/{max_retries}): {str(e)}")
-                            continue
-        
-    def stop(self):
+    async def stop(self, persist: bool = True):
+        """
+        Stops the worker. With `persist`, the project is also marked as not running,
+        otherwise it will be resumed on the next start.
+        """
         self._running = False
-        stopped_project = self.supabase.table("projects").update({"running": False}).eq("id", self.project.id).execute()
-        if stopped_project.data is None:
-            logging.error(f"Error stopping project: {stopped_project.error}")
+        self.stopped.set()
+
+        if persist:
+            supabase = self.supabase or await db.async_client()
+            stopped_project = await supabase.table("projects").update({"running": False}).eq("id", self.project.id).execute()
+            if stopped_project.data is None:
+                logging.error(f"Error stopping project: {stopped_project.error}")
     
         logging.info(f"Stopping RedditStreamWorker for project: {self.project.id}")
\ No newline at end of file
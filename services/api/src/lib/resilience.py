@@ -0,0 +1,335 @@
+import contextlib
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, TypeVar
+
+import httpx
+import openai
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from langchain_openai.chat_models.base import BaseChatOpenAI
+from pydantic import ValidationError
+
+from src.interfaces import llm
+from src.lib import hedging
+
+T = TypeVar("T")
+
+# Attempts of one LLM call, across the model and its failover
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+
+# Exponential backoff between attempts, in seconds, with full jitter
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+# Consecutive provider failures before its circuit opens, and seconds before it's tried again
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after repeated failures.
+
+    Closed, calls go through. After `failure_threshold` failures in a row it
+    opens and calls are refused, so they fail over right away instead of
+    waiting on timeouts. After `reset_timeout` one trial call is let through
+    (half-open), which closes the circuit again if it succeeds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self.times_opened = 0
+        self.refused = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self.clock() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+
+            if state == "closed":
+                return True
+
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+
+            self.refused += 1
+            return False
+
+    def release(self) -> None:
+        """
+        Gives back the trial call `allow` granted, when the call wasn't made after all.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logging.info(f"Circuit closed for provider: {self.name}")
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+
+            if self._trial or (self._opened_at is None and self._failures >= self.failure_threshold):
+                if self._opened_at is None:
+                    self.times_opened += 1
+                    logging.warning(f"Circuit opened for provider: {self.name} after {self._failures} failures")
+                self._opened_at = self.clock()
+                self._trial = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "refused": self.refused,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(provider: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def stats() -> dict:
+    return {provider: circuit.stats() for provider, circuit in _breakers.items()}
+
+
+# Monotonic time by which the current unit of work has to finish
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """
+    Bounds the total time of the LLM calls made inside, retries included.
+    Nested deadlines keep the earliest one. Threads started with
+    `asyncio.to_thread` and tasks created inside inherit it.
+    """
+    current = _deadline.get()
+    until = time.monotonic() + seconds
+    token = _deadline.set(until if current is None else min(current, until))
+
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """
+    Seconds left before the current deadline, or None without one.
+    """
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def backoff_delay(attempt: int, base: float = LLM_BACKOFF_BASE, cap: float = LLM_BACKOFF_MAX) -> float:
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def _sleep_before(attempt: int) -> None:
+    delay = backoff_delay(attempt)
+    left = remaining()
+
+    if left is not None and left <= delay:
+        raise DeadlineExceeded("Deadline exceeded before the next attempt")
+
+    time.sleep(delay)
+
+
+def _check_deadline() -> None:
+    left = remaining()
+
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Deadline exceeded")
+
+
+def _is_provider_failure(error: BaseException) -> bool:
+    """
+    Whether an error says something about the provider's health, rather than about the request.
+    """
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError, TimeoutError, ConnectionError)):
+        return True
+
+    status = getattr(error, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def retry(call: Callable[[], T], attempts: int = LLM_RETRY_ATTEMPTS) -> T:
+    """
+    Calls `call` until it succeeds, with backoff, within the current deadline.
+    """
+    for attempt in range(attempts):
+        _check_deadline()
+
+        try:
+            return call()
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+
+            logging.warning(f"Attempt {attempt + 1}/{attempts} failed: {e}")
+            _sleep_before(attempt)
+
+    raise AssertionError("unreachable")
+
+
+def _client(model: Callable[..., BaseChatModel], model_kwargs: dict) -> BaseChatModel:
+    """
+    The model's client, with its request timeout cut to the time left before the current deadline.
+    """
+    client = model(**model_kwargs)
+    left = remaining()
+
+    if left is None or left >= llm.LLM_REQUEST_TIMEOUT or not isinstance(client, BaseChatOpenAI):
+        return client
+
+    # A copy sharing the pooled connections, so the registered client keeps its own timeout
+    update: dict[str, Any] = {"request_timeout": left, "client": client.root_client.with_options(timeout=left).chat.completions}
+    if client.root_async_client is not None:
+        update["async_client"] = client.root_async_client.with_options(timeout=left).chat.completions
+
+    return client.model_copy(update=update)
+
+
+def _recorded(circuit: CircuitBreaker, call: Callable[[], T]) -> Callable[[], T]:
+    """
+    Wraps `call` to record its outcome on the provider's circuit once it finishes.
+    Invalid answers and bad requests don't count against the provider.
+    """
+    def run() -> T:
+        try:
+            result = call()
+        except (OutputParserException, ValidationError):
+            circuit.record_success()
+            raise
+        except Exception as e:
+            if _is_provider_failure(e):
+                circuit.record_failure()
+            else:
+                circuit.record_success()
+            raise
+
+        circuit.record_success()
+        return result
+
+    return run
+
+
+def _attempt(
+    build: Callable[[BaseChatModel], Runnable],
+    inputs: Any,
+    model: Callable[..., BaseChatModel],
+    model_kwargs: dict,
+) -> Any:
+    """
+    Calls the model once, hedged with its failover when hedging is active.
+    The model's circuit has to have allowed the call.
+
+    Every call made records its outcome on its own provider's circuit, even
+    a hedged call that lost. A call cancelled before it started gives back
+    the trial its circuit granted.
+    """
+    alternate = llm.FAILOVER.get(model)
+    circuit = breaker(llm.PROVIDERS[model])
+    primary = _recorded(circuit, lambda: build(_client(model, model_kwargs)).invoke(inputs))
+
+    if not hedging.active() or alternate is None:
+        return primary()
+
+    alternate_circuit = breaker(llm.PROVIDERS[alternate])
+
+    result, _ = hedging.hedger.call(
+        model.__name__,
+        primary,
+        alternate.__name__,
+        _recorded(alternate_circuit, lambda: build(_client(alternate, model_kwargs)).invoke(inputs)),
+        may_hedge=alternate_circuit.allow,
+        on_cancelled=lambda hedge: (alternate_circuit if hedge else circuit).release(),
+    )
+    return result
+
+
+def invoke(
+    build: Callable[[BaseChatModel], Runnable],
+    inputs: Any,
+    model: Callable[..., BaseChatModel],
+    attempts: int = LLM_RETRY_ATTEMPTS,
+    **model_kwargs,
+) -> Any:
+    """
+    Invokes the chain `build` makes out of `model`, retrying with backoff.
+
+    Each attempt uses the model or, while its provider's circuit is open, its
+    failover in `llm.FAILOVER`. Invalid answers are retried but don't count
+    against the provider. Everything stays within the current deadline.
+    """
+    candidates = [model] + ([llm.FAILOVER[model]] if model in llm.FAILOVER else [])
+    last_error: BaseException | None = None
+
+    for attempt in range(attempts):
+        _check_deadline()
+
+        candidate = next((c for c in candidates if breaker(llm.PROVIDERS[c]).allow()), None)
+
+        if candidate is None:
+            last_error = CircuitOpenError(f"No provider available for {model.__name__}")
+        else:
+            try:
+                return _attempt(build, inputs, candidate, model_kwargs)
+            except Exception as e:
+                last_error = e
+
+            logging.warning(f"LLM call to {candidate.__name__} failed (attempt {attempt + 1}/{attempts}): {last_error}")
+
+        if attempt < attempts - 1:
+            _sleep_before(attempt)
+
+    assert last_error is not None
+    raise last_error
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from src.lib.backfill import BACKFILL_DAYS, backfills
+from src.lib.coordinator import SHARDING_ENABLED, coordinator
+from src.lib.critino import invalidate_critiques
+from src.lib.engine import engine
+from src.lib.supervisor import supervisor
+from src.models import ControlCommand
+from src.models.project import Project
+
+load_dotenv()
+
+# "embedded" streams inside the API process, "external" leaves it to `python -m src.worker`
+WORKER_MODE = os.getenv("WORKER_MODE", "embedded")
+
+
+async def start_streaming() -> None:
+    await engine.start()
+    if backfills.cancel_profile not in engine.batcher.on_credits_exhausted:
+        engine.batcher.on_credits_exhausted.append(backfills.cancel_profile)
+    # Resumes every project marked as running and restarts crashed streams.
+    # With sharding, the coordinator decides which projects run in this process.
+    await supervisor.start(resume=not SHARDING_ENABLED)
+    if SHARDING_ENABLED:
+        await coordinator.start()
+
+
+async def stop_streaming() -> None:
+    if SHARDING_ENABLED:
+        await coordinator.stop()
+    await supervisor.stop()
+    await backfills.stop()
+    await engine.stop()
+
+
+async def start_project(project: Project, team_name: str) -> None:
+    if SHARDING_ENABLED:
+        await coordinator.request_start(project, team_name)
+    else:
+        await engine.start_project(project, team_name)
+
+
+async def stop_project(project_id: str) -> bool:
+    """
+    Returns False if the project wasn't running here. With sharding it may be
+    running in another process, which stops it on its next heartbeat.
+    """
+    if SHARDING_ENABLED:
+        await coordinator.request_stop(project_id)
+        return True
+
+    return await engine.stop_project(project_id)
+
+
+async def handle(command: ControlCommand) -> None:
+    logging.info(f"Received {command.action} command for project: {command.project_id}")
+
+    try:
+        if command.action == "start" and command.project is not None and command.team_name is not None:
+            await start_project(command.project, command.team_name)
+        elif command.action == "stop":
+            await stop_project(command.project_id)
+        elif command.action == "backfill" and command.project is not None and command.team_name is not None:
+            # Every worker receives the command; only the project's owner runs the backfill
+            if SHARDING_ENABLED and not coordinator.owns(command.project_id):
+                return
+            await backfills.start(command.project, command.team_name, command.days or BACKFILL_DAYS)
+        elif command.action == "invalidate_critiques" and command.team_name is not None and command.project_name is not None:
+            await asyncio.to_thread(invalidate_critiques, command.team_name, command.project_name, command.agent_name)
+        else:
+            logging.error(f"Incomplete {command.action} command for project: {command.project_id}")
+    except Exception as e:
+        logging.error(f"Error handling {command.action} command for project: {command.project_id}: {e}", exc_info=True)
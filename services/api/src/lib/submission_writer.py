@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import Awaitable, Callable
+
+from src.interfaces import db
+
+# Flush once this many rows are buffered...
+SUBMISSION_BATCH_SIZE = int(os.getenv("SUBMISSION_BATCH_SIZE", "50"))
+
+# ...or once the oldest buffered row is this old
+SUBMISSION_FLUSH_INTERVAL_MS = int(os.getenv("SUBMISSION_FLUSH_INTERVAL_MS", "2000"))
+
+# Rows kept for retry when the database is unreachable, beyond which the oldest are dropped
+MAX_BUFFERED_SUBMISSIONS = int(os.getenv("MAX_BUFFERED_SUBMISSIONS", "5000"))
+
+CreditsExhaustedCallback = Callable[[str], Awaitable[None]]
+SavedCallback = Callable[[], None]
+
+
+class SubmissionBatcher:
+    """
+    Write-behind buffer for evaluated submissions.
+
+    Rows are flushed as a single bulk upsert on (project_id, url), so replays
+    and duplicates are ignored by the database instead of being checked one
+    by one. Credits are then charged once per profile for the rows that were
+    actually inserted.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = SUBMISSION_BATCH_SIZE,
+        flush_interval_ms: int = SUBMISSION_FLUSH_INTERVAL_MS,
+        max_buffered: int = MAX_BUFFERED_SUBMISSIONS,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_buffered = max_buffered
+        # Called with the profile id once a profile runs out of credits
+        self.on_credits_exhausted: list[CreditsExhaustedCallback] = []
+        self._rows: list[dict] = []
+        self._free: set[tuple[str, str]] = set()
+        # Called once the row with that (project_id, url) is in the database
+        self._on_saved: dict[tuple[str, str], list[SavedCallback]] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="submission-batcher")
+
+    async def stop(self) -> None:
+        """
+        Stops the periodic flush and writes out everything still buffered.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        await self.flush()
+
+        if self._rows:
+            logging.error(f"Dropped {len(self._rows)} unsaved submissions on shutdown")
+
+    async def add(self, row: dict, charge: bool = True, on_saved: SavedCallback | None = None) -> None:
+        """
+        Buffers a submission row. It must contain at least `project_id`, `url` and `profile_id`.
+        Rows added with `charge=False` are saved without costing the profile a credit.
+        `on_saved` is called once the row was written (or already existed), never if it's dropped.
+        """
+        self._rows.append(row)
+        key = (row["project_id"], row["url"])
+
+        if not charge:
+            self._free.add(key)
+
+        if on_saved is not None:
+            self._on_saved.setdefault(key, []).append(on_saved)
+
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._rows:
+                return
+
+            rows, self._rows = self._rows, []
+
+            try:
+                supabase = await db.async_client()
+                response = await supabase.table("submissions").upsert(
+                    rows,
+                    on_conflict="project_id,url",
+                    ignore_duplicates=True,
+                ).execute()
+            except Exception as e:
+                logging.error(f"Error saving {len(rows)} submissions, will retry: {e}")
+                # Keep the rows for the next flush, without growing forever
+                buffered = rows + self._rows
+                self._forget(buffered[:-self.max_buffered])
+                self._rows = buffered[-self.max_buffered:]
+                return
+
+            inserted = response.data or []
+            logging.info(f"Saved {len(inserted)} new submissions ({len(rows) - len(inserted)} duplicates)")
+
+            charged = [row for row in inserted if (row["project_id"], row["url"]) not in self._free]
+            self._free -= {(row["project_id"], row["url"]) for row in rows}
+
+            for row in rows:
+                for callback in self._on_saved.pop((row["project_id"], row["url"]), []):
+                    try:
+                        callback()
+                    except Exception as e:
+                        logging.error(f"Error after saving submission {row['url']}: {e}")
+
+            await self._charge_credits(Counter(row["profile_id"] for row in charged))
+
+    def _forget(self, dropped: list[dict]) -> None:
+        if dropped:
+            logging.error(f"Dropped {len(dropped)} unsaved submissions, the buffer is full")
+
+        for row in dropped:
+            key = (row["project_id"], row["url"])
+            self._free.discard(key)
+            self._on_saved.pop(key, None)
+
+    async def _charge_credits(self, counts: Counter[str]) -> None:
+        supabase = await db.async_client()
+
+        for profile_id, amount in counts.items():
+            try:
+                credits_update = await supabase.rpc(
+                    "decrement_credits_by",
+                    {"user_id": profile_id, "amount": amount},
+                ).execute()
+            except Exception as e:
+                logging.error(f"Error updating credits: {str(e)}")
+                continue
+
+            if not credits_update.data:
+                logging.error("No response data from credits update")
+                continue
+
+            if credits_update.data[0].get("remaining_credits", 0) <= 0:
+                logging.info(f"No credits remaining for user: {profile_id}.")
+
+                for callback in self.on_credits_exhausted:
+                    await callback(profile_id)
+
+
+submission_batcher = SubmissionBatcher()
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from typing import Awaitable, Callable
+
+from praw.models import Submission
+from praw.models.util import BoundedSet
+
+from src.interfaces.reddit import Priority, get_reddit_instance, reddit_priority
+
+# Seconds between two polls of the same subreddit
+POLL_INTERVAL = float(os.getenv("SUBREDDIT_POLL_INTERVAL", "10"))
+
+# Seconds the poller waits on a subscriber that can't keep up before dropping the rest of a poll's submissions for it
+DISPATCH_TIMEOUT = float(os.getenv("SUBREDDIT_DISPATCH_TIMEOUT", "5"))
+
+# Reddit returns at most 100 items per listing request
+LISTING_LIMIT = 100
+
+SubmissionCallback = Callable[[Submission], Awaitable[None]]
+
+
+def normalize_subreddit(name: str) -> str:
+    return name.strip().removeprefix("r/").lower()
+
+
+class SubredditMultiplexer:
+    """
+    Polls every subscribed subreddit once and fans each new submission out to
+    all subscribers of that subreddit.
+
+    Subscriptions are reference counted per subreddit: a subreddit is polled
+    while at least one subscriber wants it, and dropped once the last one leaves.
+    Each poll's new submissions are handed to all subscribers at once, in
+    order. A subscriber that can't keep up holds the poller back for at most
+    `dispatch_timeout`, after which the rest of that poll's submissions are
+    dropped for it and counted in `dropped`. Other subscribers aren't held up.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL, dispatch_timeout: float = DISPATCH_TIMEOUT):
+        self.poll_interval = poll_interval
+        self.dispatch_timeout = dispatch_timeout
+        # Submissions dropped per subscriber because it didn't take them in time
+        self.dropped: Counter[str] = Counter()
+        self._subscribers: dict[str, tuple[frozenset[str], SubmissionCallback]] = {}
+        self._refcounts: Counter[str] = Counter()
+        self._seen: dict[str, BoundedSet] = {}
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, subscriber_id: str, subreddits: list[str], callback: SubmissionCallback) -> None:
+        """
+        Subscribes `callback` to new submissions of `subreddits`, replacing any
+        previous subscription with the same id.
+        """
+        names = frozenset(normalize_subreddit(subreddit) for subreddit in subreddits)
+
+        self._remove(subscriber_id)
+        self._subscribers[subscriber_id] = (names, callback)
+        self._refcounts.update(names)
+
+        logging.info(f"Subscribed {subscriber_id} to {sorted(names)}")
+
+    def unsubscribe(self, subscriber_id: str) -> None:
+        self._remove(subscriber_id)
+        logging.info(f"Unsubscribed {subscriber_id}")
+
+    def subreddits(self) -> dict[str, int]:
+        """
+        The polled subreddits and how many subscribers each one has.
+        """
+        return dict(self._refcounts)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name="subreddit-multiplexer")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _remove(self, subscriber_id: str) -> None:
+        names, _ = self._subscribers.pop(subscriber_id, (frozenset(), None))
+        self._refcounts.subtract(names)
+
+        for name in names:
+            if self._refcounts[name] <= 0:
+                del self._refcounts[name]
+                self._seen.pop(name, None)
+
+    async def run(self) -> None:
+        logging.info("Starting subreddit multiplexer")
+
+        while True:
+            subreddits = list(self._refcounts)
+
+            if not subreddits:
+                await asyncio.sleep(1)
+                continue
+
+            started = time.monotonic()
+
+            for subreddit in subreddits:
+                try:
+                    await self._dispatch(subreddit, await self.poll(subreddit))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.error(f"Error polling r/{subreddit}: {e}")
+
+            # Spread the polls so each subreddit is fetched about once per interval
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(self.poll_interval - elapsed, 0))
+
+    def _fetch(self, subreddit: str) -> list[Submission]:
+        # praw is blocking, so this runs in a worker thread
+        reddit = get_reddit_instance()
+
+        # Live polling goes ahead of profile scrapes and searches
+        with reddit_priority(Priority.STREAM):
+            return list(reddit.subreddit(subreddit).new(limit=LISTING_LIMIT))
+
+    async def poll(self, subreddit: str) -> list[Submission]:
+        """
+        Fetches the newest submissions of `subreddit` that haven't been seen yet,
+        oldest first.
+        """
+        listing = await asyncio.to_thread(self._fetch, subreddit)
+
+        # Everyone may have unsubscribed while the listing was being fetched
+        if subreddit not in self._refcounts:
+            return []
+
+        seen = self._seen.setdefault(subreddit, BoundedSet(301))
+
+        new_submissions = []
+        for submission in reversed(listing):
+            if submission.fullname in seen:
+                continue
+            seen.add(submission.fullname)
+            new_submissions.append(submission)
+
+        return new_submissions
+
+    async def _dispatch(self, subreddit: str, submissions: list[Submission]) -> None:
+        if not submissions:
+            return
+
+        subscribers = [
+            (subscriber_id, callback)
+            for subscriber_id, (names, callback) in self._subscribers.items()
+            if subreddit in names
+        ]
+
+        await asyncio.gather(*(self._deliver(subscriber_id, callback, submissions) for subscriber_id, callback in subscribers))
+
+    async def _deliver(self, subscriber_id: str, callback: SubmissionCallback, submissions: list[Submission]) -> None:
+        delivered = 0
+
+        async def deliver_all() -> None:
+            nonlocal delivered
+
+            for submission in submissions:
+                try:
+                    await callback(submission)
+                except Exception as e:
+                    logging.error(f"Error dispatching submission {submission.id}: {e}")
+                delivered += 1
+
+        try:
+            await asyncio.wait_for(deliver_all(), self.dispatch_timeout)
+        except TimeoutError:
+            dropped = len(submissions) - delivered
+            self.dropped[subscriber_id] += dropped
+            logging.warning(f"Dropped {dropped} submissions for {subscriber_id}, which isn't keeping up")
+
+multiplexer = SubredditMultiplexer()
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import time
+
+from src.interfaces import db
+from src.lib.engine import WorkerEngine, engine
+from src.models.project import Project
+
+# Delay between two project starts when resuming, so they don't all hit Reddit at once
+RESUME_STAGGER_SECONDS = float(os.getenv("RESUME_STAGGER_SECONDS", "0.5"))
+
+# Projects being started at the same time while resuming
+RESUME_CONCURRENCY = int(os.getenv("RESUME_CONCURRENCY", "10"))
+
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+
+# Restart backoff for crashed project streams, doubled after every crash
+RESTART_BACKOFF_SECONDS = float(os.getenv("RESTART_BACKOFF_SECONDS", "5"))
+RESTART_BACKOFF_MAX_SECONDS = float(os.getenv("RESTART_BACKOFF_MAX_SECONDS", "600"))
+
+# A project that ran this long since its last restart starts over with the shortest backoff
+RESTART_BACKOFF_RESET_SECONDS = float(os.getenv("RESTART_BACKOFF_RESET_SECONDS", "1800"))
+
+
+async def load_team_name(project_data: dict) -> str | None:
+    """
+    Returns the name of the team owning a project row.
+    """
+    supabase = await db.async_client()
+    profile_res = await supabase.table("profiles").select("*, environments (*)").eq("id", project_data["profile_id"]).execute()
+
+    if not profile_res.data or not profile_res.data[0].get("environments"):
+        logging.error(f"No environment found for project: {project_data['id']}")
+        return None
+
+    return profile_res.data[0]["environments"][0]["name"]
+
+
+async def load_running_projects() -> list[tuple[Project, str]]:
+    """
+    Returns every project marked as running, with the name of its team.
+    """
+    supabase = await db.async_client()
+    project_res = await supabase.table("projects").select("*").eq("running", True).execute()
+
+    projects = []
+    for project_data in project_res.data or []:
+        team_name = await load_team_name(project_data)
+        if team_name is not None:
+            projects.append((Project(**project_data), team_name))
+
+    return projects
+
+
+class Supervisor:
+    """
+    Resumes running projects on startup and keeps the engine healthy.
+
+    Projects are started concurrently with a staggered ramp-up. Afterwards the
+    supervisor restarts crashed project streams with exponential backoff and
+    replaces dead background tasks.
+    """
+
+    def __init__(self, engine: WorkerEngine = engine):
+        self.engine = engine
+        self._tasks: list[asyncio.Task] = []
+        # project_id -> (consecutive crashes, monotonic time of the last restart)
+        self._restarts: dict[str, tuple[int, float]] = {}
+        # project_id -> task restarting its crashed stream
+        self._pending: dict[str, asyncio.Task] = {}
+
+    async def start(self, resume: bool = True) -> None:
+        """
+        Starts watching the engine. Pass `resume=False` when a coordinator decides
+        which projects run in this process.
+        """
+        if self.cancel_restart not in self.engine.on_project_stopped:
+            self.engine.on_project_stopped.append(self.cancel_restart)
+
+        self._tasks = [asyncio.create_task(self._watch(), name="supervisor-watch")]
+
+        if resume:
+            self._tasks.append(asyncio.create_task(self.resume(), name="supervisor-resume"))
+
+    async def stop(self) -> None:
+        tasks = self._tasks + list(self._pending.values())
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._pending.clear()
+
+    async def resume(self) -> None:
+        try:
+            projects = await load_running_projects()
+        except Exception as e:
+            logging.error(f"Error loading running projects: {e}", exc_info=True)
+            return
+
+        logging.info(f"Resuming {len(projects)} running projects")
+        semaphore = asyncio.Semaphore(RESUME_CONCURRENCY)
+
+        async def _start(index: int, project: Project, team_name: str) -> None:
+            await asyncio.sleep(index * RESUME_STAGGER_SECONDS)
+
+            # Already started through /start while we were waiting
+            if project.id in self.engine.workers:
+                return
+
+            async with semaphore:
+                try:
+                    await self.engine.start_project(project, team_name)
+                except Exception as e:
+                    logging.error(f"Error resuming project stream for project: {project.id}: {e}")
+
+        await asyncio.gather(
+            *(_start(index, project, team_name) for index, (project, team_name) in enumerate(projects))
+        )
+        logging.info("Finished resuming running projects")
+
+    def _backoff(self, project_id: str) -> float:
+        crashes, last_restart = self._restarts.get(project_id, (0, 0.0))
+
+        if time.monotonic() - last_restart > RESTART_BACKOFF_RESET_SECONDS:
+            crashes = 0
+
+        return min(RESTART_BACKOFF_SECONDS * 2 ** crashes, RESTART_BACKOFF_MAX_SECONDS)
+
+    def _record_restart(self, project_id: str) -> None:
+        crashes, last_restart = self._restarts.get(project_id, (0, 0.0))
+
+        if time.monotonic() - last_restart > RESTART_BACKOFF_RESET_SECONDS:
+            crashes = 0
+
+        self._restarts[project_id] = (crashes + 1, time.monotonic())
+
+    def cancel_restart(self, project_id: str) -> None:
+        """
+        Gives up restarting a project that was stopped (through /stop, a handover or running out of credits).
+        """
+        task = self._pending.get(project_id)
+
+        # The restart itself stops the crashed stream before starting it again
+        if task is None or task is asyncio.current_task():
+            return
+
+        del self._pending[project_id]
+        task.cancel()
+
+    async def _restart(self, project: Project, team_name: str) -> None:
+        while True:
+            delay = self._backoff(project.id)
+            logging.info(f"Restarting crashed project stream for project: {project.id} in {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+            # Stopped while we were waiting, or after a failed attempt
+            if self._pending.get(project.id) is not asyncio.current_task():
+                return
+
+            self._record_restart(project.id)
+
+            try:
+                await self.engine.start_project(project, team_name)
+                return
+            except Exception as e:
+                logging.error(f"Error restarting project stream for project: {project.id}: {e}")
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+            self.engine.ensure_services()
+
+            for project_id in [project_id for project_id, task in self._pending.items() if task.done()]:
+                del self._pending[project_id]
+
+            for worker in self.engine.crashed_projects():
+                if worker.project.id in self._pending:
+                    continue
+
+                self._pending[worker.project.id] = asyncio.create_task(
+                    self._restart(worker.project, worker.team_name)
+                )
+
+
+supervisor = Supervisor()
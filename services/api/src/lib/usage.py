@@ -0,0 +1,176 @@
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Iterator
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from src.interfaces import db
+from src.models import LlmUsage
+
+# Seconds between two writes of the buffered usage records
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "10"))
+
+# Records kept for retry when the database is unreachable, beyond which the oldest are dropped
+MAX_BUFFERED_USAGE = int(os.getenv("MAX_BUFFERED_USAGE", "10000"))
+
+# USD per million input, cached input and output tokens, matched by model name prefix
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "o3-mini": (1.10, 0.55, 4.40),
+    "o1": (15.00, 7.50, 60.00),
+    "google/gemini-2.0-flash": (0.10, 0.025, 0.40),
+    "deepseek/deepseek-r1": (0.55, 0.14, 2.19),
+    "sonar": (1.00, 1.00, 1.00),
+}
+
+# Project, team and stage the current LLM calls are made for
+_tags: ContextVar[dict[str, str | None]] = ContextVar("usage_tags", default={})
+
+
+@contextlib.contextmanager
+def tags(**values: str | None) -> Iterator[None]:
+    """
+    Tags the LLM calls made inside, on top of the current tags.
+    """
+    token = _tags.set({**_tags.get(), **values})
+
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    name = model.removeprefix("openai/")
+    prefix = max((prefix for prefix in PRICES if name.startswith(prefix)), key=len, default=None)
+
+    if prefix is None:
+        return 0.0
+
+    input_price, cached_price, output_price = PRICES[prefix]
+    return ((input_tokens - cached_tokens) * input_price + cached_tokens * cached_price + output_tokens * output_price) / 1_000_000
+
+
+def _usage(response: LLMResult) -> tuple[str, int, int, int]:
+    """
+    Model name and input, output and cached tokens of an LLM response.
+    """
+    model = (response.llm_output or {}).get("model_name", "")
+    input_tokens = output_tokens = cached_tokens = 0
+
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "usage_metadata", None)
+
+            if metadata:
+                input_tokens += metadata.get("input_tokens", 0)
+                output_tokens += metadata.get("output_tokens", 0)
+                cached_tokens += (metadata.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+            if not model and message is not None:
+                model = message.response_metadata.get("model_name", "")
+
+    return model or "unknown", input_tokens, output_tokens, cached_tokens
+
+
+class UsageRecorder(BaseCallbackHandler):
+    """
+    Records the tokens, latency and estimated cost of every LLM call.
+
+    Attached to every client in `src.interfaces.llm`. Calls are tagged with
+    the project, team and stage set with `tags` where they were made. The
+    records are buffered and written to `llm_usage` in batches.
+    """
+
+    def __init__(self, flush_interval: float = USAGE_FLUSH_INTERVAL, max_buffered: int = MAX_BUFFERED_USAGE):
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._started: dict[UUID, tuple[float, dict[str, str | None]]] = {}
+        self._records: list[LlmUsage] = []
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    def on_chat_model_start(self, serialized: dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        # Tags are read here, where the call is made
+        self._started[run_id] = (time.monotonic(), _tags.get())
+
+    def on_llm_start(self, serialized: dict[str, Any], prompts: list[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = (time.monotonic(), _tags.get())
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started, call_tags = self._started.pop(run_id, (time.monotonic(), _tags.get()))
+        model, input_tokens, output_tokens, cached_tokens = _usage(response)
+
+        record = LlmUsage(
+            project_id=call_tags.get("project_id"),
+            team_name=call_tags.get("team_name"),
+            stage=call_tags.get("stage") or "unknown",
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_tokens=cached_tokens,
+            latency_ms=int((time.monotonic() - started) * 1000),
+            cost_usd=estimate_cost(model, input_tokens, output_tokens, cached_tokens),
+        )
+
+        with self._lock:
+            self._records.append(record)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="usage-recorder")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        with self._lock:
+            records, self._records = self._records, []
+
+        if not records:
+            return
+
+        try:
+            supabase = await db.async_client()
+            await supabase.table("llm_usage").insert([record.model_dump() for record in records]).execute()
+        except Exception as e:
+            logging.error(f"Error saving {len(records)} LLM usage records, will retry: {e}")
+
+            with self._lock:
+                self._records = (records + self._records)[-self.max_buffered:]
+
+    async def summary(self, since: str, project_id: str | None = None) -> list[dict]:
+        """
+        Totals per project, stage and model since an ISO timestamp, most expensive first.
+        """
+        supabase = await db.async_client()
+        response = await supabase.rpc(
+            "llm_usage_summary",
+            {"since": since, "filter_project_id": project_id},
+        ).execute()
+        return response.data or []
+
+
+usage_recorder = UsageRecorder()
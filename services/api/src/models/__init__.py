@@ -1,17 +1,35 @@
 from .evaluation import Evaluation
+from .batch_evaluation import BatchEvaluation, KeyedEvaluation
+from .cascade import CascadeConfig, CascadeTier, EvaluationResult, ScoredEvaluation
 from .dummy_submission import DummySubmission
 from .filter_output import FilterOutput
 from .filter_question import FilterQuestion
 
 from .reddit_comment import RedditComment, GenerateCommentRequest
 from .saved_submission import SavedSubmission
+from .prefilter import PrefilterConfig
+from .stream_checkpoint import StreamCheckpoint
+from .control_command import ControlCommand
+from .backfill_progress import BackfillProgress
+from .llm_usage import LlmUsage
 
 __all__ = [
     "Evaluation",
+    "BatchEvaluation",
+    "KeyedEvaluation",
+    "CascadeConfig",
+    "CascadeTier",
+    "EvaluationResult",
+    "ScoredEvaluation",
     "DummySubmission",
     "FilterOutput",
     "FilterQuestion",
     "RedditComment",
     "SavedSubmission",
+    "PrefilterConfig",
+    "StreamCheckpoint",
+    "ControlCommand",
+    "BackfillProgress",
+    "LlmUsage",
     "GenerateCommentRequest",
 ]
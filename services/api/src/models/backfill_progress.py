@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class BackfillProgress(BaseModel):
+    project_id: str
+    subreddit: str
+    # Submissions created before this are out of the backfill's range
+    cutoff_utc: float
+    # Fullname of the last listing item handled, where pagination resumes
+    after: str | None = None
+    fetched: int = 0
+    evaluated: int = 0
+    done: bool = False
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+
+class KeyedEvaluation(BaseModel):
+    submission_id: str = Field(description="The id of the post this evaluation is for.")
+    chain_of_thought: str = Field(
+        description="Use this field for logical reasoning to decide if this submission is relevant irrelevant."
+    )
+    is_relevant: bool = Field(
+        description="Final conclusion whether the post is relevant or irrelevant."
+    )
+
+
+class BatchEvaluation(BaseModel):
+    evaluations: list[KeyedEvaluation] = Field(
+        description="One evaluation per post, in any order."
+    )
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+
+from src.models.evaluation import Evaluation
+
+
+class CascadeTier(BaseModel):
+    """One step of a project's evaluation cascade."""
+
+    model: str = Field(description="Model evaluating at this tier, e.g. gpt-4o-mini or gpt-4o")
+    threshold: float = Field(default=0.9, description="Confidence needed for this tier's verdict to be final")
+
+
+class CascadeConfig(BaseModel):
+    """Per-project cascade run instead of the junior evaluation. Posts no tier is confident about go to the senior evaluation."""
+
+    tiers: list[CascadeTier] = Field(default=[], description="Tiers in the order they run, cheapest first")
+
+
+class ScoredEvaluation(BaseModel):
+    chain_of_thought: str = Field(
+        description="Use this field for logical reasoning to decide if this submission is relevant irrelevant."
+    )
+    is_relevant: bool = Field(
+        description="Final conclusion whether the post is relevant or irrelevant."
+    )
+    confidence: float = Field(
+        description="Probability between 0 and 1 that the conclusion is right. Be calibrated: of all posts you give 0.8, about 8 in 10 should be right."
+    )
+
+
+class EvaluationResult(BaseModel):
+    evaluation: Evaluation
+    profile_insights: str | None = None
+    # Which step made the final call, e.g. "junior", "senior", a cascade tier's model, or "cache"
+    decided_by: str
@@ -0,0 +1,18 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+from src.models.project import Project
+
+
+class ControlCommand(BaseModel):
+    action: Literal["start", "stop", "backfill", "invalidate_critiques"]
+    project_id: str
+    # Only set for "start" and "backfill"
+    project: Project | None = None
+    team_name: str | None = None
+    # Only set for "backfill"
+    days: int | None = None
+    # Only set for "invalidate_critiques", along with `team_name`; without an agent, all of them
+    project_name: str | None = None
+    agent_name: str | None = None
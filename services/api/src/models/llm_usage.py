@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+
+class LlmUsage(BaseModel):
+    project_id: str | None = None
+    team_name: str | None = None
+    # Step the call was made for, e.g. "junior", "senior" or "profile-generate"
+    stage: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Input tokens served from the provider's prompt cache, part of `input_tokens`
+    cached_tokens: int = 0
+    latency_ms: int = 0
+    cost_usd: float = 0.0
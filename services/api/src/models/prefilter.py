@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class PrefilterConfig(BaseModel):
+    """Per-project rules for the local pre-filter that runs before the LLM evaluation."""
+
+    include_keywords: list[str] = Field(default=[], description="Keep only posts mentioning at least one of these")
+    exclude_keywords: list[str] = Field(default=[], description="Reject posts mentioning any of these")
+    include_patterns: list[str] = Field(default=[], description="Keep only posts matching at least one of these regexes")
+    exclude_patterns: list[str] = Field(default=[], description="Reject posts matching any of these regexes")
+    min_length: int = Field(default=0, description="Minimum length of title and body combined")
+    max_length: int | None = Field(default=None, description="Maximum length of title and body combined")
+    reject_deleted: bool = Field(default=True, description="Reject deleted or removed posts")
+    min_score: float = Field(default=0.0, description="Minimum bag-of-words similarity to the project prompt, 0 disables it")
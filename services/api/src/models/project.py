@@ -1,5 +1,8 @@
 from pydantic import BaseModel
 
+from src.models.cascade import CascadeConfig
+from src.models.prefilter import PrefilterConfig
+
 
 class Project(BaseModel):
     id: str
@@ -8,3 +11,5 @@ class Project(BaseModel):
     prompt: str
     subreddits: list[str]
     running: bool | None = None
+    prefilter: PrefilterConfig | None = None
+    cascade: CascadeConfig | None = None
@@ -15,4 +15,5 @@ class SavedSubmission(BaseModel):
     url: str
     is_relevant: bool
     reasoning: str
-    profile_insights: str | None
\ No newline at end of file
+    profile_insights: str | None
+    decided_by: str | None = None
\ No newline at end of file
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class StreamCheckpoint(BaseModel):
+    project_id: str
+    subreddit: str
+    last_fullname: str
+    last_created_utc: float
+
+    def position(self) -> tuple[float, int]:
+        return stream_position(self.last_created_utc, self.last_fullname)
+
+
+def stream_position(created_utc: float, fullname: str) -> tuple[float, int]:
+    """
+    Orders submissions in a stream. Reddit ids are base36 and increase over time,
+    so they break ties between submissions created in the same second.
+    """
+    return created_utc, int(fullname.removeprefix("t3_"), 36)
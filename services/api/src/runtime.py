@@ -0,0 +1,43 @@
+import asyncio
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from src.interfaces import http, llm
+from src.lib.critino import critique_replica
+from src.lib.critique_replica import CRITIQUE_REPLICA
+from src.lib.usage import usage_recorder
+
+
+def configure() -> None:
+    """
+    Loads the environment and sets up logging. Called by every entry point
+    (the API in `src.app` and `python -m src.worker`) before anything runs.
+    """
+    load_dotenv()
+
+    if os.getenv("REDDIT_PASSWORD") is None:
+        raise ValueError("REDDIT_PASSWORD is not set")
+
+    if os.getenv("REDDIT_USERNAME") is None:
+        raise ValueError("REDDIT_USERNAME is not set")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+async def start_services() -> None:
+    """
+    Starts the background services both the API and the stream workers use.
+    """
+    # Open the LLM connections before the first request needs them
+    await asyncio.to_thread(llm.warm_up)
+    usage_recorder.start()
+    if CRITIQUE_REPLICA:
+        critique_replica.start()
+
+
+async def stop_services() -> None:
+    await usage_recorder.stop()
+    await critique_replica.stop()
+    await http.close()
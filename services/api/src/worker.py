@@ -0,0 +1,95 @@
+# Runs the subreddit streams on their own, apart from the API server:
+#
+#     python -m src.worker
+#
+# With WORKER_MODE=external the API doesn't stream anything itself and sends
+# start/stop commands to these processes over the Redis control channel. Run
+# several of them with SHARDING_ENABLED=true to spread the projects out.
+
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import Awaitable, Callable
+
+from src.interfaces import control
+from src.lib.coordinator import coordinator
+from src.lib.engine import engine
+from src.lib.streaming import handle, start_streaming, stop_streaming
+from src.runtime import configure, start_services, stop_services
+
+# Seconds between two stats reports to the API
+STATS_INTERVAL = float(os.getenv("WORKER_STATS_INTERVAL", "10"))
+
+# Seconds before restarting a background task of the worker that died
+TASK_RESTART_DELAY = 5
+
+
+async def _listen() -> None:
+    async for command in control.listen():
+        try:
+            await handle(command)
+        except Exception as e:
+            logging.error(f"Error handling control command: {e}", exc_info=True)
+
+
+async def _report_stats() -> None:
+    while True:
+        try:
+            await control.report_stats(coordinator.member_id, {"updated_at": time.time(), **engine.stats()})
+        except Exception as e:
+            logging.error(f"Error reporting worker stats: {e}")
+
+        await asyncio.sleep(STATS_INTERVAL)
+
+
+async def _supervise(name: str, run: Callable[[], Awaitable[None]]) -> None:
+    """
+    Runs a background task of the worker, restarting it whenever it ends.
+    """
+    while True:
+        try:
+            await run()
+            logging.error(f"Worker task {name} ended, restarting it in {TASK_RESTART_DELAY}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Worker task {name} crashed, restarting it in {TASK_RESTART_DELAY}s: {e}", exc_info=True)
+
+        await asyncio.sleep(TASK_RESTART_DELAY)
+
+
+async def main() -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await start_services()
+    await start_streaming()
+    tasks = [
+        asyncio.create_task(_supervise("control-listener", _listen), name="control-listener"),
+        asyncio.create_task(_supervise("worker-stats", _report_stats), name="worker-stats"),
+    ]
+    logging.info(f"Stream worker {coordinator.member_id} started")
+
+    await stopping.wait()
+    logging.info("Stopping stream worker")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    await stop_streaming()
+    await stop_services()
+
+    try:
+        await control.remove_stats(coordinator.member_id)
+    except Exception as e:
+        logging.error(f"Error removing worker stats: {e}")
+
+
+if __name__ == "__main__":
+    configure()
+    asyncio.run(main())
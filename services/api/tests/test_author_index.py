@@ -0,0 +1,72 @@
+import time
+
+from src.lib.author_index import AuthorRecencyIndex
+
+
+def test_lookup_of_unknown_author(tmp_path):
+    index = AuthorRecencyIndex(tmp_path, window=300)
+
+    assert index.last_seen("project", "author") is None
+    assert not index.seen_recently("project", "author", time.time())
+
+
+def test_record_and_lookup(tmp_path):
+    index = AuthorRecencyIndex(tmp_path, window=300)
+    now = time.time()
+
+    index.record("project", "author", now)
+
+    assert index.last_seen("project", "author") == now
+    assert index.seen_recently("project", "author", now + 60)
+    assert len(index) == 1
+
+
+def test_lookups_are_per_project_and_author(tmp_path):
+    index = AuthorRecencyIndex(tmp_path, window=300)
+    now = time.time()
+
+    index.record("project", "author", now)
+
+    assert not index.seen_recently("other-project", "author", now)
+    assert not index.seen_recently("project", "other-author", now)
+
+
+def test_posts_after_the_window_are_not_recent(tmp_path):
+    index = AuthorRecencyIndex(tmp_path, window=300)
+    now = time.time()
+
+    index.record("project", "author", now)
+
+    assert index.seen_recently("project", "author", now + 299)
+    assert not index.seen_recently("project", "author", now + 300)
+
+
+def test_later_post_moves_the_window(tmp_path):
+    index = AuthorRecencyIndex(tmp_path, window=300)
+    now = time.time()
+
+    index.record("project", "author", now - 200)
+    index.record("project", "author", now)
+
+    assert index.seen_recently("project", "author", now + 200)
+
+
+def test_submissions_older_than_the_window_are_not_recorded(tmp_path):
+    index = AuthorRecencyIndex(tmp_path, window=300)
+
+    index.record("project", "author", time.time() - 301)
+
+    assert index.last_seen("project", "author") is None
+    assert len(index) == 0
+
+
+def test_entries_expire_with_the_window(tmp_path):
+    index = AuthorRecencyIndex(tmp_path, window=1)
+
+    # Recorded with 0.1s of its window left
+    index.record("project", "author", time.time() - 0.9)
+    time.sleep(0.2)
+
+    assert index.last_seen("project", "author") is None
+    assert index.expire() == 1
+    assert len(index) == 0
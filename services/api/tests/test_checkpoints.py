@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from src.lib.checkpoints import CheckpointStore
+
+
+def post(created_utc: float, id: str) -> SimpleNamespace:
+    return SimpleNamespace(created_utc=created_utc, fullname=f"t3_{id}")
+
+
+def skipped(store: CheckpointStore, *submissions: SimpleNamespace) -> list[bool]:
+    """
+    Whether a restart would skip each submission.
+    """
+    return [not store.is_new("project", "python", submission) for submission in submissions]
+
+
+def test_checkpoint_waits_for_earlier_posts():
+    store = CheckpointStore()
+    first, second, third = post(100, "a"), post(101, "b"), post(102, "c")
+
+    for submission in (first, second, third):
+        store.begin("project", "python", submission)
+
+    store.complete("project", "python", third)
+    store.complete("project", "python", second)
+    assert skipped(store, first, second, third) == [False, False, False]
+
+    store.complete("project", "python", first)
+    assert skipped(store, first, second, third, post(103, "d")) == [True, True, True, False]
+
+
+def test_checkpoint_stops_below_the_oldest_post_in_flight():
+    store = CheckpointStore()
+    first, second, third = post(100, "a"), post(101, "b"), post(102, "c")
+
+    for submission in (first, second, third):
+        store.begin("project", "python", submission)
+
+    store.complete("project", "python", first)
+    store.complete("project", "python", third)
+
+    assert skipped(store, first, second, third) == [True, False, False]
+
+
+def test_posts_that_were_not_begun_are_ignored():
+    store = CheckpointStore()
+    first = post(100, "a")
+
+    store.complete("project", "python", first)
+
+    assert skipped(store, first) == [False]
+
+
+def test_forget_drops_posts_in_flight():
+    store = CheckpointStore()
+    first, second = post(100, "a"), post(101, "b")
+    store.begin("project", "python", first)
+    store.begin("project", "python", second)
+
+    store.forget("project")
+    store.complete("project", "python", first)
+
+    assert skipped(store, first, second) == [False, False]
@@ -0,0 +1,205 @@
+import asyncio
+
+from src.lib.coordinator import Coordinator, InMemoryLeaseStore, rendezvous_owner
+from src.models.project import Project
+
+LEASE_TTL = 30
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeEngine:
+    def __init__(self):
+        self.workers: dict[str, Project] = {}
+
+    async def start_project(self, project: Project, team_name: str) -> None:
+        self.workers[project.id] = project
+
+    async def stop_project(self, project_id: str, persist: bool = True) -> bool:
+        return self.workers.pop(project_id, None) is not None
+
+
+def make_project(project_id: str, running: bool = True) -> Project:
+    return Project(id=project_id, title=project_id, profile_id="profile", prompt="", subreddits=["python"], running=running)
+
+
+def make_store(count: int = 20) -> tuple[InMemoryLeaseStore, Clock]:
+    clock = Clock()
+    projects = {f"project-{i}": (make_project(f"project-{i}"), "team") for i in range(count)}
+    return InMemoryLeaseStore(projects, clock=clock), clock
+
+
+def make_coordinator(store: InMemoryLeaseStore, member_id: str) -> Coordinator:
+    return Coordinator(store, engine=FakeEngine(), member_id=member_id, lease_ttl=LEASE_TTL)  # type: ignore[arg-type]
+
+
+async def holds(store: InMemoryLeaseStore, project_id: str, member_id: str) -> bool:
+    """
+    Whether the member holds the project's lease, which only it can renew.
+    """
+    return project_id in await store.renew([project_id], member_id, LEASE_TTL)
+
+
+def test_claim_is_exclusive_until_the_lease_expires():
+    async def run():
+        store, clock = make_store()
+
+        assert await store.claim("project-0", "a", LEASE_TTL)
+        assert await store.claim("project-0", "a", LEASE_TTL)
+        assert not await store.claim("project-0", "b", LEASE_TTL)
+
+        clock.now += LEASE_TTL + 1
+        assert await store.claim("project-0", "b", LEASE_TTL)
+        assert not await store.claim("project-0", "a", LEASE_TTL)
+
+    asyncio.run(run())
+
+
+def test_renew_extends_only_our_live_leases():
+    async def run():
+        store, clock = make_store()
+        await store.claim("project-0", "a", LEASE_TTL)
+        await store.claim("project-1", "b", LEASE_TTL)
+
+        clock.now += LEASE_TTL - 1
+        assert await store.renew(["project-0", "project-1"], "a", LEASE_TTL) == {"project-0"}
+
+        # Renewed, so still ours after the original expiry
+        clock.now += 2
+        assert not await store.claim("project-0", "b", LEASE_TTL)
+
+        clock.now += LEASE_TTL
+        assert await store.renew(["project-0"], "a", LEASE_TTL) == set()
+
+    asyncio.run(run())
+
+
+def test_single_member_runs_every_running_project():
+    async def run():
+        store, _ = make_store()
+        store.projects["project-0"][0].running = False
+        a = make_coordinator(store, "a")
+
+        await a.rebalance()
+
+        assert set(a.engine.workers) == {f"project-{i}" for i in range(1, 20)}
+        assert all([await holds(store, project_id, "a") for project_id in a.engine.workers])
+
+    asyncio.run(run())
+
+
+def test_member_joining_takes_over_its_share():
+    async def run():
+        store, _ = make_store()
+        a, b = make_coordinator(store, "a"), make_coordinator(store, "b")
+        await a.rebalance()
+
+        # b can't start its projects while a still holds their leases
+        await b.rebalance()
+        assert not b.engine.workers
+
+        await a.rebalance()
+        await b.rebalance()
+
+        assert b.engine.workers
+        assert set(a.engine.workers).isdisjoint(b.engine.workers)
+        assert set(a.engine.workers) | set(b.engine.workers) == set(store.projects)
+        for coordinator in (a, b):
+            for project_id in coordinator.engine.workers:
+                assert rendezvous_owner(project_id, ["a", "b"]) == coordinator.member_id
+                assert await holds(store, project_id, coordinator.member_id)
+
+    asyncio.run(run())
+
+
+def test_member_leaving_hands_its_projects_over():
+    async def run():
+        store, _ = make_store()
+        a, b = make_coordinator(store, "a"), make_coordinator(store, "b")
+        for coordinator in (a, b, a, b):
+            await coordinator.rebalance()
+
+        await b.stop()
+        assert not b.engine.workers
+        assert "b" not in store.members
+
+        await a.rebalance()
+        assert set(a.engine.workers) == set(store.projects)
+
+    asyncio.run(run())
+
+
+def test_crashed_member_is_taken_over_once_its_leases_expire():
+    async def run():
+        store, clock = make_store()
+        a, b = make_coordinator(store, "a"), make_coordinator(store, "b")
+        for coordinator in (a, b, a, b):
+            await coordinator.rebalance()
+
+        # b stops heartbeating without leaving
+        clock.now += LEASE_TTL + 1
+        await a.rebalance()
+
+        assert set(a.engine.workers) == set(store.projects)
+
+    asyncio.run(run())
+
+
+def test_request_start_and_stop_on_the_owner():
+    async def run():
+        store, _ = make_store(0)
+        a = make_coordinator(store, "a")
+        await a.rebalance()
+
+        project = make_project("new", running=False)
+        store.projects["new"] = (project, "team")
+
+        assert await a.request_start(project, "team")
+        assert project.running
+        assert "new" in a.engine.workers
+        assert not await store.claim("new", "b", LEASE_TTL)
+
+        await a.request_stop("new")
+        assert not project.running
+        assert "new" not in a.engine.workers
+        assert await store.claim("new", "b", LEASE_TTL)
+
+    asyncio.run(run())
+
+
+def test_request_start_and_stop_on_another_member():
+    async def run():
+        store, _ = make_store(0)
+        a, b = make_coordinator(store, "a"), make_coordinator(store, "b")
+        await a.rebalance()
+        await b.rebalance()
+        await a.rebalance()
+
+        project_id = next(f"new-{i}" for i in range(100) if rendezvous_owner(f"new-{i}", ["a", "b"]) == "b")
+        project = make_project(project_id, running=False)
+        store.projects[project_id] = (project, "team")
+
+        # Marked as running here, started by its owner on the next heartbeat
+        assert not await a.request_start(project, "team")
+        assert project.running
+        assert project_id not in a.engine.workers
+
+        await b.rebalance()
+        assert project_id in b.engine.workers
+
+        # Marked as stopped here, stopped by its owner on the next heartbeat
+        await a.request_stop(project_id)
+        assert not project.running
+        assert project_id in b.engine.workers
+
+        await b.rebalance()
+        assert project_id not in b.engine.workers
+        assert await store.claim(project_id, "c", LEASE_TTL)
+
+    asyncio.run(run())
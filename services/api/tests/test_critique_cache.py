@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from src.lib.critino import CritiqueCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def failing_fetch() -> str:
+    raise RuntimeError("Critino is down")
+
+
+def test_failed_fetch_isnt_cached(tmp_path):
+    cache = CritiqueCache(directory=tmp_path, ttl=60, max_stale=120)
+    key = CritiqueCache.key("environment", "query", 3)
+
+    with pytest.raises(RuntimeError):
+        cache.get(key, failing_fetch)
+
+    assert cache.get(key, lambda: "[]") == "[]"
+    assert cache.stats()["misses"] == 2
+
+
+def test_failed_refresh_keeps_serving_the_stale_entry(tmp_path):
+    clock = Clock()
+    cache = CritiqueCache(directory=tmp_path, ttl=60, max_stale=120, clock=clock)
+    key = CritiqueCache.key("environment", "query", 3)
+    cache.get(key, lambda: "examples")
+    clock.now = 90
+
+    assert cache.get(key, failing_fetch) == "examples"
+    while cache.stats()["in_flight"]:
+        time.sleep(0.01)
+
+    assert cache.get(key, failing_fetch) == "examples"
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_entries_expire_after_max_stale(tmp_path):
+    clock = Clock()
+    cache = CritiqueCache(directory=tmp_path, ttl=60, max_stale=120, clock=clock)
+    key = CritiqueCache.key("environment", "query", 3)
+    cache.get(key, lambda: "old")
+
+    clock.now = 30
+    assert cache.get(key, failing_fetch) == "old"
+
+    clock.now = 150
+    assert cache.get(key, lambda: "new") == "new"
+    assert cache.stats()["hits"] == 1
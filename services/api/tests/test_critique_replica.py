@@ -0,0 +1,59 @@
+from src.lib.critique_replica import CritiqueReplica, ReplicatedEnvironment
+
+CRITIQUES = [
+    {"query": "looking for a crm for my small agency", "optimal": "relevant"},
+    {"query": "what is the best pizza in naples", "optimal": "irrelevant"},
+    {"query": "", "optimal": "empty"},
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_search_ranks_by_shared_words():
+    environment = ReplicatedEnvironment(CRITIQUES, synced_at=0)
+
+    assert environment.search("which crm should my agency use", k=1) == [CRITIQUES[0]]
+    assert environment.search("pizza recommendations", k=2)[0] == CRITIQUES[1]
+    assert len(environment.search("anything", k=5)) == 3
+
+
+def test_unchanged_critiques_keep_their_vectors():
+    previous = ReplicatedEnvironment(CRITIQUES, synced_at=0)
+    edited = [CRITIQUES[0], {"query": "best pasta in rome", "optimal": "irrelevant"}]
+
+    environment = ReplicatedEnvironment(edited, synced_at=1, previous=previous)
+
+    assert environment.changed == 1
+    assert environment.vectors[0] is previous.vectors[0]
+    assert environment.search("pasta", k=1) == [edited[1]]
+
+
+def test_empty_environment():
+    assert ReplicatedEnvironment([], synced_at=0).search("crm", k=3) == []
+
+
+def test_idle_environments_are_evicted(tmp_path):
+    clock = Clock()
+    replica = CritiqueReplica(lambda environment_name: CRITIQUES, directory=tmp_path, idle_after=60, clock=clock)
+
+    assert replica.search("used", "crm", 1) is None
+    assert replica.search("idle", "crm", 1) is None
+    replica.sync("used")
+    replica.sync("idle")
+
+    clock.now = 30
+    assert replica.evict_idle() == 0
+    assert replica.search("used", "crm", 1) == [CRITIQUES[0]]
+
+    clock.now = 70
+
+    assert replica.evict_idle() == 1
+    assert replica.search("used", "crm", 1) == [CRITIQUES[0]]
+    assert replica.stats()["environments"] == 1
+    assert replica.stats()["evicted"] == 1
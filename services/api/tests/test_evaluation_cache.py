@@ -0,0 +1,32 @@
+import diskcache as dc
+
+from src.lib.evaluation_cache import EvaluationCache
+from src.models import Evaluation, EvaluationResult
+
+
+def make_cache(tmp_path) -> EvaluationCache:
+    return EvaluationCache(directory=tmp_path, size_limit_mb=1, max_age=60)
+
+
+def test_returns_stored_result(tmp_path):
+    cache = make_cache(tmp_path)
+    result = EvaluationResult(evaluation=Evaluation(chain_of_thought="...", is_relevant=True), decided_by="senior")
+
+    cache.set("key", result)
+
+    assert cache.get("key") == result
+    assert cache.stats()["hits"] == 1
+
+
+def test_old_entries_are_misses(tmp_path):
+    # Written by an older version into the same directory
+    with dc.Cache(str(tmp_path)) as old_cache:
+        old_cache.set("tuple", (Evaluation(chain_of_thought="...", is_relevant=True), None))
+        old_cache.set("dict", {"evaluation": None})
+
+    cache = make_cache(tmp_path)
+
+    assert cache.get("tuple") is None
+    assert cache.get("dict") is None
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,58 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.lib import evaluate_relevance, usage
+from src.lib.micro_batch import MicroBatcher
+from src.models import Evaluation
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    """
+    A junior batcher whose batched call fails, so every post is evaluated alone and records its tags.
+    """
+    seen = {}
+
+    def failing_invoke(*args, **kwargs):
+        raise RuntimeError("batch failed")
+
+    def junior_evaluation(submission, project_prompt, examples):
+        seen[submission.id] = usage._tags.get()
+        return Evaluation(chain_of_thought="...", is_relevant=True)
+
+    batcher = MicroBatcher(evaluate_relevance._junior_batch_evaluation, window_ms=200, batch_size=2)
+    monkeypatch.setattr(evaluate_relevance, "JUNIOR_BATCHING", True)
+    monkeypatch.setattr(evaluate_relevance, "junior_batcher", batcher)
+    monkeypatch.setattr(evaluate_relevance.resilience, "invoke", failing_invoke)
+    monkeypatch.setattr(evaluate_relevance, "_junior_evaluation", junior_evaluation)
+    monkeypatch.setattr(evaluate_relevance, "submission_to_xml", lambda submission: submission.id)
+    monkeypatch.setattr(evaluate_relevance, "junior_prompt", SimpleNamespace(build=lambda *sections, **fields: []))
+
+    return SimpleNamespace(batcher=batcher, seen=seen)
+
+
+def evaluate_in_threads(posts: list[tuple[str, str, str]]) -> None:
+    def evaluate(post_id: str, project_id: str, team_name: str) -> None:
+        with usage.tags(project_id=project_id, team_name=team_name, post_id=post_id):
+            evaluate_relevance._junior(SimpleNamespace(id=post_id), "same prompt", "[]", project_id)
+
+    threads = [threading.Thread(target=evaluate, args=post) for post in posts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_projects_with_the_same_prompt_arent_batched_together(batcher):
+    evaluate_in_threads([("a", "project-1", "team-1"), ("b", "project-2", "team-2")])
+
+    assert batcher.batcher.batches == 2
+
+
+def test_posts_evaluated_alone_keep_their_own_tags(batcher):
+    evaluate_in_threads([("a", "project-1", "team-1"), ("b", "project-1", "team-1")])
+
+    assert batcher.batcher.batches == 1
+    assert {post_id: tags["post_id"] for post_id, tags in batcher.seen.items()} == {"a": "a", "b": "b"}
@@ -0,0 +1,189 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from src.interfaces import llm
+from src.lib import hedging, resilience
+from src.lib.hedging import Hedger
+from src.lib.resilience import CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeModel:
+    def __init__(self, answer: str, delay: float = 0.0, error: Exception | None = None):
+        self.answer = answer
+        self.delay = delay
+        self.error = error
+
+    def invoke(self, inputs):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.answer
+
+
+def slow_primary() -> FakeModel:
+    return FakeModel("primary", delay=0.3)
+
+
+def fast_failover() -> FakeModel:
+    return FakeModel("failover")
+
+
+class FirstCallPool:
+    """
+    Runs the first call submitted and leaves the others queued forever.
+    """
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._submitted = 0
+
+    def submit(self, fn, *args) -> Future:
+        self._submitted += 1
+        return self._pool.submit(fn, *args) if self._submitted == 1 else Future()
+
+
+def half_open(name: str) -> CircuitBreaker:
+    circuit = CircuitBreaker(name, failure_threshold=1, reset_timeout=0)
+    circuit.record_failure()
+    assert circuit.state == "half_open"
+    return circuit
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """
+    Fake primary and failover models on providers of their own, hedged right away.
+    """
+    circuits = {"primary": half_open("primary"), "failover": CircuitBreaker("failover")}
+
+    monkeypatch.setitem(llm.PROVIDERS, slow_primary, "primary")
+    monkeypatch.setitem(llm.PROVIDERS, fast_failover, "failover")
+    monkeypatch.setitem(llm.FAILOVER, slow_primary, fast_failover)
+    monkeypatch.setitem(resilience._breakers, "primary", circuits["primary"])
+    monkeypatch.setitem(resilience._breakers, "failover", circuits["failover"])
+    monkeypatch.setattr(hedging, "HEDGING", True)
+    monkeypatch.setattr(hedging, "hedger", Hedger(default_delay=0.05, max_ratio=1))
+
+    return circuits
+
+
+def test_breaker_opens_after_threshold():
+    clock = Clock()
+    circuit = CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=clock)
+
+    circuit.record_failure()
+    assert circuit.allow()
+
+    circuit.record_failure()
+    assert circuit.state == "open"
+    assert not circuit.allow()
+
+
+def test_half_open_grants_one_trial():
+    clock = Clock()
+    circuit = CircuitBreaker("test", failure_threshold=1, reset_timeout=10, clock=clock)
+    circuit.record_failure()
+    clock.now = 10
+
+    assert circuit.allow()
+    assert not circuit.allow()
+
+    circuit.record_success()
+    assert circuit.state == "closed"
+
+
+def test_failed_trial_reopens():
+    clock = Clock()
+    circuit = CircuitBreaker("test", failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(3):
+        circuit.record_failure()
+    clock.now = 10
+
+    assert circuit.allow()
+    circuit.record_failure()
+
+    assert circuit.state == "open"
+    assert not circuit.allow()
+
+
+def test_released_trial_is_granted_again():
+    circuit = half_open("test")
+
+    assert circuit.allow()
+    circuit.release()
+
+    assert circuit.allow()
+
+
+def test_hedge_over_budget_doesnt_take_the_trial():
+    circuit = half_open("failover")
+    hedger = Hedger(default_delay=0.01, max_ratio=0)
+
+    with hedging.scope("project"):
+        result, won = hedger.call("primary", lambda: time.sleep(0.05) or "primary", "failover", lambda: "failover", may_hedge=circuit.allow)
+
+    assert (result, won) == ("primary", False)
+    assert hedger.capped == 1
+    assert circuit.allow()
+
+
+def test_refused_hedge_is_refunded():
+    hedger = Hedger(default_delay=0.01, max_ratio=1)
+
+    with hedging.scope("project"):
+        result, won = hedger.call("primary", lambda: time.sleep(0.05) or "primary", "failover", lambda: "failover", may_hedge=lambda: False)
+
+    assert (result, won) == ("primary", False)
+    assert hedger.fired == 0
+
+
+def test_hedge_cancelled_before_starting_is_reported():
+    hedger = Hedger(default_delay=0.01, max_ratio=1)
+    hedger._pool = FirstCallPool()
+    cancelled = []
+
+    with hedging.scope("project"):
+        result, won = hedger.call(
+            "primary",
+            lambda: time.sleep(0.05) or "primary",
+            "failover",
+            lambda: "failover",
+            on_cancelled=cancelled.append,
+        )
+
+    assert (result, won) == ("primary", False)
+    assert cancelled == [True]
+
+
+def test_primary_losing_to_hedge_still_records_its_trial(providers):
+    with hedging.scope("project"):
+        assert resilience.invoke(lambda model: model, None, slow_primary, attempts=1) == "failover"
+
+    # The primary was the half-open trial and keeps running after losing
+    time.sleep(0.4)
+    assert providers["primary"].state == "closed"
+    assert providers["failover"].state == "closed"
+
+
+def test_provider_failures_open_the_circuit(monkeypatch, providers):
+    def failing() -> FakeModel:
+        return FakeModel("", error=httpx.ConnectError("down"))
+
+    monkeypatch.setitem(llm.PROVIDERS, failing, "primary")
+    monkeypatch.setitem(resilience._breakers, "primary", CircuitBreaker("primary", failure_threshold=1, reset_timeout=60))
+
+    with pytest.raises(httpx.ConnectError):
+        resilience.invoke(lambda model: model, None, failing, attempts=1)
+
+    assert resilience.breaker("primary").state == "open"
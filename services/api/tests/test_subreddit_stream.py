@@ -0,0 +1,43 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.lib.subreddit_stream import SubredditMultiplexer
+
+
+class FakeMultiplexer(SubredditMultiplexer):
+    """
+    Returns the given submissions on the first poll and nothing after.
+    """
+
+    def __init__(self, submissions: list, **kwargs):
+        super().__init__(**kwargs)
+        self.submissions = submissions
+
+    async def poll(self, subreddit: str) -> list:
+        submissions, self.submissions = self.submissions, []
+        return submissions
+
+
+def test_a_full_subscriber_doesnt_hold_up_the_others():
+    async def run() -> tuple[list, asyncio.Queue, SubredditMultiplexer]:
+        submissions = [SimpleNamespace(id=str(index)) for index in range(3)]
+        multiplexer = FakeMultiplexer(submissions, poll_interval=0.01, dispatch_timeout=0.05)
+        received = []
+        full_inbox: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+        async def receive(submission) -> None:
+            received.append(submission)
+
+        multiplexer.subscribe("slow", ["python"], full_inbox.put)
+        multiplexer.subscribe("fast", ["r/Python"], receive)
+        multiplexer.start()
+        await asyncio.sleep(0.2)
+        await multiplexer.stop()
+
+        return received, full_inbox, multiplexer
+
+    received, full_inbox, multiplexer = asyncio.run(run())
+
+    assert [submission.id for submission in received] == ["0", "1", "2"]
+    assert full_inbox.qsize() == 1
+    assert multiplexer.dropped == {"slow": 2}
@@ -0,0 +1,23 @@
+from src.lib.evaluate_relevance import TierAgreement
+
+
+def test_agreement_per_tier_and_confidence():
+    agreement = TierAgreement()
+
+    agreement.record("a", "gpt-4o-mini", True, True, True)
+    agreement.record("b", "gpt-4o-mini", True, False, True)
+    agreement.record("c", "gpt-4o-mini", False, False, False)
+
+    assert agreement.stats() == {
+        "gpt-4o-mini": {
+            "confident": {"compared": 2, "agreement": 0.5},
+            "uncertain": {"compared": 1, "agreement": 1.0},
+        }
+    }
+
+
+def test_no_comparisons_yet():
+    agreement = TierAgreement()
+    agreement.record("a", "gpt-4o", False, True, False)
+
+    assert agreement.stats()["gpt-4o"]["confident"] == {"compared": 0, "agreement": None}
@@ -0,0 +1,30 @@
+-- Remove duplicate submissions so (project_id, url) can be used as an upsert conflict target.
+-- The oldest row is kept, ties broken by id so exactly one survives.
+DELETE FROM public.submissions a
+USING public.submissions b
+WHERE a.project_id = b.project_id
+AND a.url = b.url
+AND (a.created_at > b.created_at OR (a.created_at = b.created_at AND a.id > b.id));
+
+CREATE UNIQUE INDEX IF NOT EXISTS submissions_project_id_url_key
+ON public.submissions (project_id, url);
+
+-- Create a function to atomically decrement credits by more than one
+CREATE OR REPLACE FUNCTION public.decrement_credits_by(user_id UUID, amount INTEGER)
+RETURNS TABLE (remaining_credits INTEGER) 
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH updated AS (
+        UPDATE usage
+        SET credits = GREATEST(credits - amount, 0)
+        WHERE profile_id = user_id
+        AND credits > 0
+        RETURNING credits
+    )
+    SELECT credits FROM updated;
+END;
+$$;
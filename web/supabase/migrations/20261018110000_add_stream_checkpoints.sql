@@ -0,0 +1,11 @@
+-- Create a table for each project's last processed submission per subreddit
+-- Read and written by the API's stream workers
+create table stream_checkpoints (
+  project_id uuid references projects on delete cascade not null,
+  subreddit text not null,
+  last_fullname text not null,
+  last_created_utc double precision not null,
+  updated_at timestamp with time zone default now() not null,
+
+  primary key (project_id, subreddit)
+);
@@ -0,0 +1,3 @@
+-- Per-project rules for the pre-filter that runs before the LLM evaluation
+alter table projects
+  add column prefilter jsonb;
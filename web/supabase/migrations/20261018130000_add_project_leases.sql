@@ -0,0 +1,59 @@
+-- Create tables for sharding running projects across API worker processes
+-- Read and written by the API's coordinator
+create table worker_members (
+  id text primary key,
+  heartbeat_at timestamp with time zone default now() not null
+);
+
+create table project_leases (
+  project_id uuid references projects on delete cascade primary key,
+  owner text not null,
+  expires_at timestamp with time zone not null
+);
+
+create or replace function public.heartbeat_worker_member(member_id text)
+returns void
+language sql
+as $$
+  insert into worker_members (id, heartbeat_at)
+  values (member_id, now())
+  on conflict (id) do update set heartbeat_at = now();
+$$;
+
+create or replace function public.live_worker_members(ttl_seconds double precision)
+returns table (member_id text)
+language sql
+as $$
+  select id from worker_members
+  where heartbeat_at > now() - make_interval(secs => ttl_seconds);
+$$;
+
+-- Takes the lease if it's free, expired or already held by the member
+create or replace function public.claim_project_lease(lease_project_id uuid, member_id text, ttl_seconds double precision)
+returns boolean
+language sql
+as $$
+  with claimed as (
+    insert into project_leases (project_id, owner, expires_at)
+    values (lease_project_id, member_id, now() + make_interval(secs => ttl_seconds))
+    on conflict (project_id) do update
+    set owner = excluded.owner, expires_at = excluded.expires_at
+    where project_leases.owner = excluded.owner
+    or project_leases.expires_at < now()
+    returning 1
+  )
+  select exists (select 1 from claimed);
+$$;
+
+-- Extends the member's unexpired leases and returns the projects it still holds
+create or replace function public.renew_project_leases(project_ids uuid[], member_id text, ttl_seconds double precision)
+returns table (project_id uuid)
+language sql
+as $$
+  update project_leases
+  set expires_at = now() + make_interval(secs => ttl_seconds)
+  where project_leases.project_id = any(project_ids)
+  and project_leases.owner = member_id
+  and project_leases.expires_at > now()
+  returning project_leases.project_id;
+$$;
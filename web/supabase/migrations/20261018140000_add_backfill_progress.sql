@@ -0,0 +1,14 @@
+-- Create a table for the progress of each project's historical backfill per subreddit
+-- Read and written by the API's stream workers
+create table backfill_progress (
+  project_id uuid references projects on delete cascade not null,
+  subreddit text not null,
+  cutoff_utc double precision not null,
+  after text,
+  fetched integer default 0 not null,
+  evaluated integer default 0 not null,
+  done boolean default false not null,
+  updated_at timestamp with time zone default now() not null,
+
+  primary key (project_id, subreddit)
+);
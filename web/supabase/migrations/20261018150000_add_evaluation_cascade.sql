@@ -0,0 +1,7 @@
+-- Per-project cascade of models run before the senior evaluation
+alter table projects
+  add column cascade jsonb;
+
+-- Which step decided each submission (e.g. prefilter, junior, senior, a cascade tier's model, cache)
+alter table submissions
+  add column decided_by text;
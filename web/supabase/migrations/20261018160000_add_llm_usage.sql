@@ -0,0 +1,50 @@
+-- Create a table for the tokens, latency and estimated cost of every LLM call
+-- Written in batches by the API and its stream workers
+create table llm_usage (
+  id bigint generated always as identity primary key,
+  project_id uuid references projects on delete set null,
+  team_name text,
+  stage text not null,
+  model text not null,
+  input_tokens integer default 0 not null,
+  output_tokens integer default 0 not null,
+  cached_tokens integer default 0 not null,
+  latency_ms integer default 0 not null,
+  cost_usd numeric(12, 6) default 0 not null,
+  created_at timestamp with time zone default now() not null
+);
+
+create index llm_usage_project_id_created_at_idx on llm_usage (project_id, created_at);
+
+-- Totals per project, stage and model since a point in time, most expensive first
+create or replace function public.llm_usage_summary(since timestamp with time zone, filter_project_id uuid default null)
+returns table (
+  project_id uuid,
+  stage text,
+  model text,
+  calls bigint,
+  input_tokens bigint,
+  output_tokens bigint,
+  cached_tokens bigint,
+  avg_latency_ms double precision,
+  cost_usd numeric
+)
+language sql
+stable
+as $$
+  select
+    u.project_id,
+    u.stage,
+    u.model,
+    count(*),
+    sum(u.input_tokens),
+    sum(u.output_tokens),
+    sum(u.cached_tokens),
+    avg(u.latency_ms),
+    sum(u.cost_usd)
+  from llm_usage u
+  where u.created_at >= since
+    and (filter_project_id is null or u.project_id = filter_project_id)
+  group by u.project_id, u.stage, u.model
+  order by sum(u.cost_usd) desc;
+$$;